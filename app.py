@@ -1,18 +1,57 @@
-from browser import document, html, window, timer, ajax
+from browser import document, html, window, ajax
 import json
-import random
+
+from engine import (
+    DEFAULTS, MIN_PLAYERS, MAX_PLAYERS, alive_players, get_player, win_check,
+    allowed_mafia_counts, normalize_names, new_game, start_night,
+    night_targets, resolve_night,
+)
+import engine
+from store import StateStore, GameIndex
+from dom import mount, on, keyed, fresh
+from facts import FactDeck
+import timers
+import history
+import tasks
+import perf
 
 LS_KEY = "palermo_osud_brython_v1"
+GAMES = GameIndex(perf.storage(window.localStorage), LS_KEY)
+STORE = None
+
+def open_game(slot):
+    """Make `slot` the active saved game; load() reads it on next use."""
+    global STORE
+    if STORE is not None:
+        STORE.flush()
+    GAMES.set_active(slot)
+    def indexed(data):
+        GAMES.update(slot, data, window.Date.now())
+    def pack(raw, done):
+        tasks.run("pack", raw, done)
+    # writes of one click (journal + snapshot, render) are flushed together
+    # after the handler returns; the snapshot is packed in the worker
+    STORE = StateStore(perf.storage(window.localStorage), GAMES.slot_key(slot), window.queueMicrotask, indexed, pack)
+    if perf.ON:
+        # a write of one interaction, and the parse + replay of a stored game
+        STORE.flush = perf.timed("store", "save")(STORE.flush)
+        STORE._read = perf.timed("store", "load")(STORE._read)
+
+open_game(GAMES.active)
 
 # -------- Utilities --------
+_toast_tm = None
+
 def toast(msg: str):
+    global _toast_tm
     t = document["toast"]
     t.text = msg
     t.style.display = "block"
     def hide():
         t.style.display = "none"
-    timer.clear_timeout(getattr(toast, "_tm", None) or 0)
-    toast._tm = timer.set_timeout(hide, 1800)
+    timers.cancel(_toast_tm)
+    # outlives the screen: a toast may come right before a render()
+    _toast_tm = timers.after(1800, hide, screen=False)
 
 
 def _bind_focus_scroll(inp, target):
@@ -45,28 +84,38 @@ def _set_pin_attrs(inp):
 
 
 def save(state):
-    window.localStorage.setItem(LS_KEY, json.dumps(state))
+    STORE.save(state)
 
 def load():
-    raw = window.localStorage.getItem(LS_KEY)
-    if not raw:
-        return None
-    try:
-        return json.loads(raw)
-    except Exception:
-        return None
+    return STORE.load()
 
 def clear_state():
-    window.localStorage.removeItem(LS_KEY)
+    STORE.clear()
+    GAMES.remove(GAMES.active)
+
+def journal(ev, hold=False):
+    """Apply an engine event to the live state and append it to the journal
+    (hold: write it with the next change, see StateStore.apply)."""
+    return STORE.apply(ev, hold)
+
+def _on_hide(ev):
+    # the page may not get another chance: write held and pending changes
+    if document.visibilityState == "hidden" or ev.type == "pagehide":
+        STORE.flush()
+
+def _on_storage(ev):
+    # another tab changed the index or the game on screen: drop the
+    # in-memory copy and redraw
+    key = ev.key
+    if key is None or key == GAMES.index_key:
+        GAMES.invalidate()
+    if key is None or key == STORE.key or key.startswith(STORE.key + ":ev:"):
+        STORE.invalidate()
+        render()
 
 def clamp(v, lo, hi):
     return max(lo, min(hi, v))
 
-def shuffle(lst):
-    lst = list(lst)
-    random.shuffle(lst)
-    return lst
-
 def role_label(role):
     return {
         "mafia": "Mafia",
@@ -78,69 +127,188 @@ def role_label(role):
 def side_label(role):
     return "MAFIA" if role == "mafia" else "OBČAN"
 
-def alive_players(state):
-    return [p for p in state["players"] if p["alive"]]
-
-def get_player(state, pid):
-    for p in state["players"]:
-        if p["id"] == pid:
-            return p
-    return None
-
-def win_check(state):
-    alive = alive_players(state)
-    mafia = sum(1 for p in alive if p["role"] == "mafia")
-    others = len(alive) - mafia
-    if mafia <= 0:
-        return {"over": True, "winner": "obcan"}
-    if mafia >= others and len(alive) > 0:
-        return {"over": True, "winner": "mafia"}
-    return {"over": False}
-
-def allowed_mafia_counts(n):
-    # defaults: 5-6 -> [1], 7-9 -> [1,2] (default 2), 10-12 -> [2,3] (default 3)
-    if n <= 6:
-        return [1]
-    if n <= 9:
-        return [1,2]
-    return [2,3]
-
 # -------- Facts loading --------
-FACTS = []
-FACTS_READY = False
+FACTS_LANG = "sk"
+DECK = FactDeck()
+_PACK_WAIT = {}   # pack file -> callbacks waiting for its fetch
 
 def load_facts():
-    global FACTS, FACTS_READY
+    """Fetch the fact manifest in the background; nothing waits for it, a
+    pick made before it arrives simply shows no fact."""
+    loaded = perf.start("manifest", "facts")
     def on_complete(req):
-        global FACTS, FACTS_READY
+        global DECK
+        loaded({"bytes": len(req.text or "")})
         if req.status in (200, 0):
             try:
-                FACTS = json.loads(req.text)
+                DECK = FactDeck(json.loads(req.text), FACTS_LANG)
             except Exception:
-                FACTS = []
-        FACTS_READY = True
-        render()
+                DECK = FactDeck()
     req = ajax.Ajax()
     req.bind("complete", lambda ev: on_complete(req))
-    req.open("GET", "facts_chobotnica.json", True)
+    req.open("GET", "facts/manifest.json", True)
     req.send()
 
-def pick_fact(state):
-    if not FACTS:
-        return None
-    no_spoiler = state["settings"]["facts_no_spoiler"]
-    pool = [f for f in FACTS if (not no_spoiler) or (not f.get("spoiler", False))]
-    if not pool:
-        return None
-    used = state.setdefault("_facts_used", [])
-    # avoid repeats: try a few times
-    for _ in range(10):
-        f = random.choice(pool)
-        if f.get("id") not in used:
-            used.append(f.get("id"))
-            used[:] = used[-200:]
-            return f
-    return random.choice(pool)
+def load_pack(file, on_ready):
+    """Call on_ready() once the pack is loaded (fetched on first use, the
+    SW caches it like any same-origin GET)."""
+    if file in DECK.packs:
+        on_ready()
+        return
+    waiting = _PACK_WAIT.setdefault(file, [])
+    waiting.append(on_ready)
+    if len(waiting) > 1:
+        return
+    deck = DECK
+    loaded = perf.start(file, "facts")
+    def ok(req):
+        loaded({"bytes": len(req.text or "")})
+        callbacks = _PACK_WAIT.pop(file, [])
+        if req.status not in (200, 0):
+            return
+        try:
+            deck.add_pack(file, json.loads(req.text))
+        except Exception:
+            return
+        for cb in callbacks:
+            cb()
+    try:
+        ajax.get(f"facts/{file}", oncomplete=ok, timeout=3)   # seconds
+    except Exception:
+        _PACK_WAIT.pop(file, None)
+
+def fact_slot(state):
+    """Slot of the game's next fact; the caller journals the draw (engine.use_fact)."""
+    return DECK.slot(engine.fact_cursor(state), state["settings"]["facts_no_spoiler"])
+
+def fact_box(slot):
+    """Result-card section that shows the fact in `slot` once its pack is loaded."""
+    box = fresh(html.DIV(Class="grid"))
+    def fill():
+        fact = DECK.fact(slot)
+        if fact:
+            box <= hr()
+            box <= html.DIV("🦑 Mikro‑obsah", Class="tag")
+            box <= html.P(fact.get("text",""), Class="small")
+    load_pack(slot[0], fill)
+    return box
+
+# -------- Balance table (tools/balance_exact.py) --------
+BALANCE = {}
+
+def load_balance():
+    """Precomputed mafia win probabilities for the setup screen (optional)."""
+    def ok(req):
+        global BALANCE
+        if req.status in (200, 0):
+            try:
+                BALANCE = json.loads(req.text).get("table", {})
+            except Exception:
+                BALANCE = {}
+    try:
+        ajax.get("balance.json", oncomplete=ok, timeout=2)   # seconds
+    except Exception:
+        pass
+
+def balance_text(n, mafia, katanyi, doctor, strict):
+    row = BALANCE.get(f"{n}/{mafia}/{int(katanyi)}{int(doctor)}{int(strict)}")
+    if not row:
+        return ""
+    return f"Šanca mafie: {round(100*row[0])} % pri náhodných hlasoch, {round(100*row[1])} % ak sa mafia dohodne."
+
+# -------- LAN host (tools/host.py) --------
+HOST_URL = None      # LAN URL of tools/host.py when it serves the app
+_HOST_WAIT = []      # callbacks waiting for the ping
+
+def _seat_token():
+    h = window.location.hash or ""
+    return h[len("#seat="):] if h.startswith("#seat=") else None
+
+# set when this is a player's own phone in a parallel night (#seat=<token>)
+SEAT = _seat_token()
+
+def host_call(method, path, data, on_ok, on_fail=None):
+    """JSON request to the host API: on_ok(dict) on 200, otherwise on_fail()."""
+    def done(req):
+        if req.status == 200:
+            try:
+                res = json.loads(req.text)
+            except Exception:
+                res = None
+            if isinstance(res, dict):
+                on_ok(res)
+                return
+        if on_fail:
+            on_fail()
+    try:
+        if method == "GET":
+            ajax.get(f"api/{path}", oncomplete=done, timeout=5)
+        else:
+            ajax.post(f"api/{path}", data=json.dumps(data), headers={"Content-Type": "application/json"},
+                      oncomplete=done, timeout=5)
+    except Exception:
+        if on_fail:
+            on_fail()
+
+def host_stream(path, on_msg, on_fail, poll_ms):
+    """Follow api/<path> while the screen is shown: pushed by the host as
+    server-sent events (api/<path>/stream), polled every poll_ms without
+    EventSource."""
+    try:
+        src = window.EventSource.new(f"api/{path}/stream")
+    except Exception:
+        timers.every(poll_ms, lambda: host_call("GET", path, None, on_msg, on_fail))
+        return
+    def message(ev):
+        try:
+            res = json.loads(ev.data)
+        except Exception:
+            return
+        on_msg(res)
+    # EventSource reconnects by itself after an error
+    src.onmessage = message
+    src.onerror = lambda ev: on_fail()
+    timers.on_leave(src.close)
+
+def ping_host():
+    """Is the app served by tools/host.py? when_host() callbacks run if so;
+    on a static server the ping is a 404 and nothing more happens."""
+    def ok(res):
+        global HOST_URL
+        HOST_URL = res.get("url") or window.location.origin + window.location.pathname
+        for cb in _HOST_WAIT[:]:
+            cb()
+        del _HOST_WAIT[:]
+    host_call("GET", "ping", None, ok, lambda: _HOST_WAIT.clear())
+
+def when_host(cb):
+    if HOST_URL:
+        cb()
+    else:
+        _HOST_WAIT.append(cb)
+
+def parallel(state):
+    return bool(state.get("host")) and state["settings"].get("parallel_night", False)
+
+def start_game(st):
+    """Save and show a new game; with parallel_night its table is first
+    registered with the host, and on failure the night is played by
+    passing the phone."""
+    if not (st["settings"].get("parallel_night") and HOST_URL):
+        st["settings"]["parallel_night"] = False
+        save(st)
+        render()
+        return
+    def joined(res):
+        st["host"] = {"url": HOST_URL, "table": res["table"], "seats": res["seats"]}
+        save(st)
+        render()
+    def failed():
+        toast("Hostiteľ neodpovedá – noc sa hrá podávaním mobilu")
+        st["settings"]["parallel_night"] = False
+        save(st)
+        render()
+    host_call("POST", "tables", {"state": engine.state_to_json(st)}, joined, failed)
 
 # -------- UI helpers --------
 def card(*children, cls="card"):
@@ -151,19 +319,68 @@ def para(text, cls=""): return html.P(text, Class=cls) if cls else html.P(text)
 def hr(): return html.DIV(Class="hr")
 def tag(text): return html.SPAN(text, Class="tag")
 
-def choice_row(label, on_click):
+def choice_row(label, pid):
     row = html.DIV(Class="choice")
     row <= html.SPAN(label)
     row <= html.SPAN("Vybrať", Class="kbd")
-    row.bind("click", on_click)
+    row.attrs["data-pid"] = str(pid)
+    return keyed(row, pid)
+
+# Rows carry no handlers, so a built row that the patcher did not need
+# (the live one was kept) can be reused for the next screen.
+_ROW_POOL = {}
+
+def _pooled_row(label, pid):
+    rows = _ROW_POOL.setdefault(str(pid), [])
+    for row in rows:
+        if not row.isConnected:
+            if row.children[0].text != label:
+                row.children[0].text = label
+            return row
+    row = choice_row(label, pid)
+    rows.append(row)
     return row
 
+def choice_list(items, on_choose):
+    """List of (pid, label) rows with one delegated click listener.
+    pid None is the "nobody" row; on_choose gets the pid back."""
+    box = html.DIV(Class="list")
+    for pid, label in items:
+        box <= _pooled_row(label, "none" if pid is None else pid)
+
+    def on_click(ev):
+        row = ev.target.closest(".choice")
+        if row is None:
+            return
+        raw = row.attrs.get("data-pid")
+        on_choose(None if raw == "none" else int(raw))
+    on(box, "click", on_click)
+    return box
+
+def show(*roots):
+    """Patch the #app container to the given screen (see dom.mount)."""
+    mount(document["app"], *roots)
+
 def set_subtitle(text):
     document["subtitle"].text = text
 
+def phase_title(phase, day=1):
+    """Subtitle of a phase (same texts in the pre-boot shell of index.html)."""
+    return {
+        "setup": "Nastavenie hry",
+        "role_pass": "Rozdanie rolí",
+        "night_turn": "Noc 🌙",
+        "dawn": f"Ráno • Deň {day}",
+        "day_admin": f"Deň {day} • administrácia",
+        "end": "Koniec hry",
+    }.get(phase, "")
+
 
 PUBLIC_URL = ""
 PUBLIC_URL_READY = False
+# {"url", "svg"} of the last encoded PUBLIC_URL; outside LS_KEY so
+# _on_storage does not redraw the game when it changes
+QR_KEY = "palermo_osud_qr_v1"
 
 def _is_local_host():
     try:
@@ -187,13 +404,50 @@ def _load_public_url():
             global PUBLIC_URL, PUBLIC_URL_READY
             if req.status in (200, 0):
                 PUBLIC_URL = (req.text or "").strip()
+                if PUBLIC_URL:
+                    # encode now, not when the About modal opens
+                    _qr_src(PUBLIC_URL, lambda src: None)
             PUBLIC_URL_READY = True
         def fail(req):
             global PUBLIC_URL_READY
             PUBLIC_URL_READY = True
-        ajax.get("public_url.txt", oncomplete=ok, onerror=fail, timeout=1500)
+        ajax.get("public_url.txt", oncomplete=ok, onerror=fail, timeout=2)   # seconds
+    except Exception:
+        PUBLIC_URL_READY = True
+
+def _qr_cached():
+    try:
+        entry = json.loads(window.localStorage.getItem(QR_KEY) or "null")
     except Exception:
+        return None
+    return entry if isinstance(entry, dict) and entry.get("url") and entry.get("svg") else None
+
+def _qr_src(url, done):
+    """done(data: URL of the QR code for `url`), encoded once per URL in
+    the worker (tasks.py) and kept in localStorage."""
+    entry = _qr_cached()
+    if entry is not None and entry["url"] == url:
+        done("data:image/svg+xml," + window.encodeURIComponent(entry["svg"]))
+        return
+    def encoded(svg):
+        try:
+            window.localStorage.setItem(QR_KEY, json.dumps({"url": url, "svg": svg}))
+        except Exception:
+            pass
+        done("data:image/svg+xml," + window.encodeURIComponent(svg))
+    tasks.run("qr", url, encoded)
+
+def _init_public_url():
+    """About is offered on a local host only; start from the cached URL so
+    the modal opens without waiting for public_url.txt."""
+    global PUBLIC_URL, PUBLIC_URL_READY
+    if not _is_local_host():
+        return
+    entry = _qr_cached()
+    if entry:
+        PUBLIC_URL = entry["url"]
         PUBLIC_URL_READY = True
+    _load_public_url()
 
 def _show_about():
     # overlay
@@ -214,13 +468,11 @@ def _show_about():
         right <= para("Načítavam URL…", "small")
     if PUBLIC_URL:
         right <= html.DIV(PUBLIC_URL, Class="kbd")
-        # QR via remote generator (lightweight)
-        try:
-            enc = window.encodeURIComponent(PUBLIC_URL)
-        except Exception:
-            enc = PUBLIC_URL
-        qr = html.IMG(Src=f"https://api.qrserver.com/v1/create-qr-code/?size=220x220&data={enc}", Class="qr", Alt="QR")
-        right <= qr
+        img = html.IMG(Class="qr", Alt="QR")
+        def show_qr(src):
+            img.src = src
+        _qr_src(PUBLIC_URL, show_qr)
+        right <= img
         right <= para("Naskenuj QR a otvor web. Potom si môžeš appku nainštalovať do zariadenia.", "small")
     else:
         right <= para("Doplň svoju GitHub Pages URL do súboru public_url.txt (v koreni projektu).", "small")
@@ -241,6 +493,54 @@ def _show_about():
     ov <= modal
     document <= ov
 
+def _show_perf():
+    """Debug panel of perf.py (header button Perf, only with #perf)."""
+    ov = html.DIV(Class="overlay")
+    modal = html.DIV(Class="card grid modal")
+    modal <= h2("Meranie výkonu")
+    n = len(perf.records())
+    note = f"{n} záznamov (posledných {perf.SIZE})"
+    if perf.dropped():
+        note += f", starších {perf.dropped()} prepísaných"
+    modal <= para(note + ". Časy v ms: počet • spolu • medián • max.", "small")
+    lst = html.DIV(Class="list")
+    for cat, name, count, total, p50, top in perf.summary():
+        row = html.DIV(Class="choice")
+        row <= html.SPAN(f"{cat} · {name}")
+        row <= html.SPAN(f"{count} • {total:.1f} • {p50:.1f} • {top:.1f}", Class="kbd")
+        lst <= row
+    modal <= lst
+    modal <= hr()
+
+    def do_close(ev=None):
+        ov.remove()
+
+    def do_export(ev=None):
+        blob = window.Blob.new([perf.chrome_trace()], {"type": "application/json"})
+        a = html.A(href=window.URL.createObjectURL(blob), download=f"palermo-trace-{int(window.Date.now())}.json")
+        document <= a
+        a.click()
+        a.remove()
+
+    def do_clear(ev=None):
+        perf.clear()
+        do_close()
+
+    def do_off(ev=None):
+        window.localStorage.removeItem(perf.KEY)
+        window.location.hash = ""
+        window.location.reload()
+
+    row = html.DIV(Class="row")
+    for label, handler, cls in (("Export (Chrome trace)", do_export, ""), ("Vymazať", do_clear, "secondary"),
+                                ("Vypnúť meranie", do_off, "danger"), ("Zavrieť", do_close, "secondary")):
+        btn = html.BUTTON(label, Class=cls)
+        btn.bind("click", handler)
+        row <= btn
+    modal <= row
+    ov <= modal
+    document <= ov
+
 def _wire_install_about_button(state):
     """Header button: on web show Install (if available), on local show About."""
     try:
@@ -301,96 +601,16 @@ def _wire_osud_button(state):
     if state.get("settings", {}).get("first_dead_osud") and state.get("osud", {}).get("enabled"):
         btn.style.display = "inline-flex"
 
-# -------- State / Phases --------
-# phases:
-# setup
-# role_pass
-# night_turn
-# dawn
-# day_admin
-# end
-
-DEFAULTS = {
-    "include_katanyi": True,
-    "include_doctor": False,
-    "mafia_know": True,
-    "mafia_strict_unanimity": True,
-    "reveal_after_judgement": "side", # none/side/full
-    "first_dead_osud": False,
-    "mask_citizens": True,
-    "facts_enabled": True,
-    "facts_for_all": False,
-    "facts_no_spoiler": True,
-    "min_screen_ms": 3000
-}
-
-
-def normalize_names(raw_lines):
-    """Strip names, drop empties, and make them unique (case-insensitive) while preserving order.
-    Returns (names, fixed_dupes) where fixed_dupes is a list of original duplicate base names.
-    """
-    cleaned = [x.strip() for x in raw_lines if x and x.strip()]
-    seen = {}
-    out = []
-    fixed = []
-    for name in cleaned:
-        key = name.casefold()
-        if key not in seen:
-            seen[key] = 1
-            out.append(name)
-        else:
-            seen[key] += 1
-            if name not in fixed:
-                fixed.append(name)
-            out.append(f"{name} ({seen[key]})")
-    return out, fixed
-
-def new_game(names, pin, mafia_count, settings):
-    players = [{"id": i, "name": n, "alive": True, "role": "citizen"} for i, n in enumerate(names)]
-    roles = []
-    roles += ["mafia"] * mafia_count
-    if settings["include_katanyi"]:
-        roles.append("katanyi")
-    if settings["include_doctor"]:
-        roles.append("doctor")
-    while len(roles) < len(players):
-        roles.append("citizen")
-    roles = shuffle(roles)
-    for i, r in enumerate(roles):
-        players[i]["role"] = r
-
-    state = {
-        "phase": "role_pass",
-        "day": 1,
-        "players": players,
-        "pin": pin,
-        "settings": settings,
-        "step_index": 0,
-        "night": {
-            "mafia_votes": {},      # voterId -> targetId
-            "katanyi_check": None,  # (voterId, targetId, isMafia)
-            "doctor_save": None,    # targetId
-            "citizen_dummy": {}     # voterId -> targetId
-        },
-        "last": {"night_dead": None, "day_dead": None},
-        "osud": {"enabled": False, "player_id": None}
-    }
-    return state
-
-def reset_night(state):
-    state["night"] = {"mafia_votes": {}, "katanyi_check": None, "doctor_save": None, "citizen_dummy": {}}
-    state["step_index"] = 0
-
 def goto(phase):
     state = load()
     if not state:
         return
-    state["phase"] = phase
-    state["step_index"] = 0
+    engine.goto(state, phase)
     save(state)
     render()
 
 # -------- Screens --------
+@perf.timed("screen")
 def screen_setup():
     set_subtitle("Nastavenie hry")
     root = html.DIV(Class="grid")
@@ -434,6 +654,7 @@ def screen_setup():
     cb_fact_all, row_fact_all = toggle("Mikro‑obsah aj pre špeciálne roly", "facts_for_all", False)
     cb_nospoil, row_nospoil = toggle("Mikro‑obsah bez spoilerov", "facts_no_spoiler", True)
     cb_osud, row_osud = toggle("Prvý mŕtvy sa stane Osudom", "first_dead_osud", False)
+    cb_par, row_par = toggle("Paralelná noc: každý volí na svojom mobile", "parallel_night", False)
 
     right <= row_k
     right <= row_d
@@ -447,6 +668,14 @@ def screen_setup():
     right <= row_nospoil
     right <= hr()
     right <= row_osud
+    # offered only when tools/host.py serves the app
+    host_slot = fresh(html.DIV(Class="grid"))
+    right <= host_slot
+    def offer_parallel():
+        host_slot <= hr()
+        host_slot <= row_par
+        host_slot <= para("Hostiteľ na LAN zbiera hlasy; mobil na stole ukáže pri rozdaní rolí každému QR kód pre jeho mobil.", "small")
+    when_host(offer_parallel)
 
     reveal = html.SELECT()
     reveal <= html.OPTION("Po odsúdení: nič", value="none")
@@ -457,6 +686,15 @@ def screen_setup():
     # mafia count placeholder (depends on names)
     mafia_sel = html.SELECT()
     right <= html.DIV([html.LABEL("Počet mafiánov (ponuka sa prispôsobí počtu hráčov)"), mafia_sel])
+    balance = fresh(html.DIV("", Class="small"))
+    right <= balance
+
+    def refresh_balance():
+        n = len([x for x in ta.value.splitlines() if x.strip()])
+        if not mafia_sel.value:
+            balance.text = ""
+            return
+        balance.text = balance_text(n, int(mafia_sel.value), cb_k.checked, cb_d.checked, cb_mu.checked)
 
     def refresh_mafia_options():
         names = [x.strip() for x in ta.value.splitlines() if x.strip()]
@@ -469,8 +707,11 @@ def screen_setup():
             if v == max(opts):
                 opt.selected = True
             mafia_sel <= opt
+        refresh_balance()
 
-    ta.bind("input", lambda ev: refresh_mafia_options())
+    on(ta, "input", lambda ev: refresh_mafia_options())
+    for el in (mafia_sel, cb_k, cb_d, cb_mu):
+        on(el, "change", lambda ev: refresh_balance())
     refresh_mafia_options()
 
     def on_start(ev=None):
@@ -478,7 +719,7 @@ def screen_setup():
         if dupes:
             toast("Duplicitné mená upravené: " + ", ".join(dupes))
             ta.value = "\n".join(names)
-        if len(names) < 5 or len(names) > 12:
+        if len(names) < MIN_PLAYERS or len(names) > MAX_PLAYERS:
             window.alert("V1 je navrhnutá pre 5–12 hráčov. Uprav počet mien.")
             return
         pin = (pin_in.value or "").strip()
@@ -498,16 +739,18 @@ def screen_setup():
             "facts_enabled": bool(cb_fact.checked),
             "facts_for_all": bool(cb_fact_all.checked),
             "facts_no_spoiler": bool(cb_nospoil.checked),
+            "parallel_night": bool(cb_par.checked) and bool(HOST_URL),
             "min_screen_ms": DEFAULTS["min_screen_ms"]
         }
         mafia_count = int(mafia_sel.value)
-        st = new_game(names, pin, mafia_count, settings)
-        save(st)
-        render()
+        start_game(new_game(names, pin, mafia_count, settings))
 
     btn = html.BUTTON("Začať a rozdať roly")
-    btn.bind("click", on_start)
+    on(btn, "click", on_start)
 
+    others = [g for g in GAMES.games() if g[0] != GAMES.active]
+    if others:
+        root <= games_card(others)
     root <= html.DIV([left, right], Class="split")
     root <= card(tag("Tip"), para("Po prvom online načítaní (GitHub Pages) bude appka fungovať aj offline vďaka cache.", "small"))
     root <= html.DIV([btn], Class="card center")
@@ -557,7 +800,7 @@ def pass_gate(title_text, subtitle_text, on_unlock):
         def on_btn(ev=None):
             if check_pin():
                 do_unlock()
-        btn.bind("click", on_btn)
+        on(btn, "click", on_btn)
     else:
         wrap <= para("Potiahni posuvník doprava na odomknutie.", "small")
         slider = html.INPUT(Type="range", Min="0", Max="100", Value="0", Class="unlock-slider")
@@ -569,52 +812,78 @@ def pass_gate(title_text, subtitle_text, on_unlock):
                     do_unlock()
                 # vždy vráť posuvník späť
                 slider.value = "0"
-        slider.bind("input", on_slide)
-        slider.bind("change", on_slide)
+        on(slider, "input", on_slide)
+        on(slider, "change", on_slide)
 
     return wrap
 
 def min_delay_button(label, ms, on_click, cls="secondary"):
     btn = html.BUTTON(label, Class=cls)
     btn.disabled = True
-    left = {"t": int(ms/1000)}
-    note = html.DIV(f"Môžeš pokračovať o {left['t']}s…", Class="small")
-
-    def tick():
-        left["t"] -= 1
-        if left["t"] <= 0:
-            btn.disabled = False
-            note.text = ""
-            timer.clear_interval(tick._i)
+    secs = max(1, int(ms/1000))
+    note = html.DIV(f"Môžeš pokračovať o {secs}s…", Class="small")
+
+    def tick(left):
+        note.text = f"Môžeš pokračovať o {left}s…"
+    def done():
+        btn.disabled = False
+        note.text = ""
+    # cancelled by the next render() if the screen is left early
+    timers.countdown(secs, tick, done)
+    on(btn, "click", lambda ev: on_click())
+    # the countdown keeps updating these nodes, so they must be the live ones
+    return fresh(html.DIV([btn, note], Class="grid"))
+
+def handoff(state, build_next):
+    """Click handler that passes the phone to the next player.
+
+    While the current card counts down, the next player's screen is built
+    off-screen (build_next(step index) -> tree, or None when the next step
+    is not a plain gate); the click then only journals the step and swaps
+    the prebuilt screen in. Anything unexpected falls back to render()."""
+    nxt = {"idx": state["step_index"] + 1, "tree": None}
+    def prebuild():
+        nxt["tree"] = build_next(nxt["idx"])
+    # a screen timer: dropped if this card is left some other way
+    timers.after(0, prebuild)
+
+    def go():
+        journal({"t": "step"})
+        if nxt["tree"] is not None and load() is state and state["step_index"] == nxt["idx"]:
+            timers.clear_screen()
+            show(nxt["tree"])
         else:
-            note.text = f"Môžeš pokračovať o {left['t']}s…"
-    tick._i = timer.set_interval(tick, 1000)
-    btn.bind("click", lambda ev: on_click())
-    return html.DIV([btn, note], Class="grid")
+            render()
+    return go
 
-def role_pass_screen(state):
+@perf.timed("screen")
+def role_pass_screen(state, idx=None):
     set_subtitle("Rozdanie rolí")
-    idx = state["step_index"]
+    if idx is None:
+        idx = state["step_index"]
     if idx >= len(state["players"]):
         # move to night
-        reset_night(state)
-        state["phase"] = "night_turn"
+        start_night(state)
         save(state)
+        # the night is already set up and saved; the button only redraws
+        btn = html.BUTTON("Začať noc", **{"Class":"", "id":"start_night"})
+        on(btn, "click", lambda ev: render())
         return card(
             tag("Roly rozdané"),
             html.DIV("Začína noc 🌙", Class="big"),
-            para("Počas noci koluje mobil u každého živého hráča. Každý prejde rovnakými krokmi.", "small"),
-            html.BUTTON("Začať noc", **{"Class":"", "id":"start_night"})
+            para("Každý živý hráč volí na svojom mobile, tento zostáva na stole." if parallel(state)
+                 else "Počas noci koluje mobil u každého živého hráča. Každý prejde rovnakými krokmi.", "small"),
+            btn
         , cls="card grid center")
 
     player = state["players"][idx]
 
     def unlock():
         # after unlock: show role card
-        role = player["role"]
+        role = player.role
         mafia_list = []
         if role == "mafia" and state["settings"]["mafia_know"]:
-            mafia_list = [p["name"] for p in state["players"] if p["role"] == "mafia" and p["id"] != player["id"]]
+            mafia_list = [p.name for p in state["players"] if p.role == "mafia" and p.id != player.id]
         role_card = html.DIV(Class="card grid center")
         role_card <= tag("Tvoja rola")
         role_card <= html.DIV(role_label(role), Class="big")
@@ -629,36 +898,68 @@ def role_pass_screen(state):
             role_card <= para("Raz za noc zachrániš jedného hráča. Ak mafia trafí toho istého, nikto nezomrie.", "small")
         else:
             role_card <= para("Nemáš špeciálnu schopnosť (môžeš mať maskovaciu akciu).", "small")
+        if parallel(state):
+            role_card <= hr()
+            role_card <= para("V noci voliš na svojom mobile: naskenuj tento kód (nikomu ho neukazuj).", "small")
+            role_card <= seat_qr(state, player)
 
-        def next_step():
-            st = load()
-            st["step_index"] += 1
-            save(st)
-            render()
-
+        # the last role leads to the night setup, which render() does
+        next_step = handoff(state, lambda i: role_pass_screen(state, i) if i < len(state["players"]) else None)
         role_card <= min_delay_button("Skryť a podať ďalšiemu", state["settings"]["min_screen_ms"], next_step)
-        document["app"].clear()
-        document["app"] <= role_card
+        show(role_card)
 
     return pass_gate(
-        f"Telefón pre: {player['name']}",
+        f"Telefón pre: {player.name}",
         "Zadaj PIN a odomkni. Potom si pozri rolu, skry a podaj ďalej.",
         unlock
     )
 
-def pick_target_list(state, exclude_ids=None):
+def seat_qr(state, player):
+    """QR code of the player's own-phone link, encoded in the worker
+    while the card is shown."""
+    host = state["host"]
+    url = host["url"] + "#seat=" + host["seats"][str(player.id)]
+    box = fresh(html.DIV(Class="grid center"))
+    def fill(svg):
+        box <= html.IMG(Src="data:image/svg+xml," + window.encodeURIComponent(svg),
+                        Class="qr", Alt="QR")
+        box <= html.DIV(url, Class="kbd")
+    tasks.run("qr", url, fill)
+    return box
+
+def pick_target_list(state, on_pick, exclude_ids=None):
     exclude_ids = set(exclude_ids or [])
     living = alive_players(state)
-    choices = [p for p in living if p["id"] not in exclude_ids]
-    box = html.DIV(Class="list")
-    for p in choices:
-        box <= choice_row(p["name"], lambda ev, pid=p["id"]: on_pick(pid))
-    return box, choices
-
-def night_turn_screen(state):
+    choices = [p for p in living if p.id not in exclude_ids]
+    return choice_list([(p.id, p.name) for p in choices], on_pick), choices
+
+def night_prompt(role):
+    if role == "mafia":
+        return "Tajný výber mafie: koho by si zabil?"
+    if role == "katanyi":
+        return "Katányi: koho chceš preveriť?"
+    if role == "doctor":
+        return "Lekár: koho chceš zachrániť? (môžeš aj seba)"
+    return "Maskovanie: koho si túto noc „všímaš“?"
+
+def pick_result(role, target_name, is_mafia):
+    """(headline, detail) of the card after a night pick."""
+    if role == "mafia":
+        return "Zaznamenané. (Mafia hlas)", f"Tvoj cieľ: {target_name}"
+    if role == "katanyi":
+        return "Výsledok", f"{target_name} je: {'MAFIA' if is_mafia else 'OBČAN'}"
+    if role == "doctor":
+        return "Zachránené", f"Chrániš: {target_name}"
+    return "Zaznamenané", f"Vybral(a) si: {target_name}"
+
+@perf.timed("screen")
+def night_turn_screen(state, idx=None):
     set_subtitle("Noc 🌙")
+    if parallel(state):
+        return parallel_night_screen(state)
     alive = alive_players(state)
-    idx = state["step_index"]
+    if idx is None:
+        idx = state["step_index"]
     if idx >= len(alive):
         # resolve night
         resolve_night(state)
@@ -666,145 +967,209 @@ def night_turn_screen(state):
         return dawn_screen(state)
 
     player = alive[idx]
+    picked = []   # perf span from unlock() to the pick
 
-    def unlock():
-        role = player["role"]
+    # the action card is built with the gate (also when prebuilt by handoff),
+    # unlocking only shows it
+    def action_card():
+        role = player.role
         settings = state["settings"]
 
         # unified screen: choose name from list
         action = html.DIV(Class="card grid")
-        action <= html.DIV([tag("Noc"), html.SPAN(f"Na rade: {player['name']}", Class="kbd")], Class="row")
+        action <= html.DIV([tag("Noc"), html.SPAN(f"Na rade: {player.name}", Class="kbd")], Class="row")
         action <= h2("Vyber meno zo zoznamu")
-        prompt = ""
-        if role == "mafia":
-            prompt = "Tajný výber mafie: koho by si zabil?"
-        elif role == "katanyi":
-            prompt = "Katányi: koho chceš preveriť?"
-        elif role == "doctor":
-            prompt = "Lekár: koho chceš zachrániť? (môžeš aj seba)"
-        else:
-            prompt = "Maskovanie: koho si túto noc „všímaš“?"
-        action <= para(prompt, "small")
-
-        result = html.DIV(Class="card grid center")
-        result.style.display = "none"
+        action <= para(night_prompt(role), "small")
 
         # define pick handler
         def do_pick(target_id):
-            # store action
-            if role == "mafia":
-                state["night"]["mafia_votes"][str(player["id"])] = target_id
-                res_main = f"Zaznamenané. (Mafia hlas)"
-                res_sub = f"Tvoj cieľ: {get_player(state, target_id)['name']}"
-            elif role == "katanyi":
-                target = get_player(state, target_id)
-                is_mafia = (target["role"] == "mafia")
-                state["night"]["katanyi_check"] = {"voter": player["id"], "target": target_id, "is_mafia": is_mafia}
-                res_main = "Výsledok"
-                res_sub = f"{target['name']} je: {'MAFIA' if is_mafia else 'OBČAN'}"
-            elif role == "doctor":
-                state["night"]["doctor_save"] = target_id
-                res_main = "Zachránené"
-                res_sub = f"Chrániš: {get_player(state, target_id)['name']}"
-            else:
-                state["night"]["citizen_dummy"][str(player["id"])] = target_id
-                res_main = "Zaznamenané"
-                res_sub = f"Vybral(a) si: {get_player(state, target_id)['name']}"
-
             # microfact logic
             show_fact = settings["facts_enabled"] and (settings["facts_for_all"] or role == "citizen")
-            fact = pick_fact(state) if show_fact else None
+            slot = fact_slot(state) if show_fact else None
+            if picked:
+                picked.pop()()
+
+            is_mafia = journal({"t": "pick", "v": player.id, "x": target_id, "f": 1 if slot else None}, hold=True)
+            res_main, res_sub = pick_result(role, get_player(state, target_id).name, is_mafia)
 
-            result.clear()
+            result = html.DIV(Class="card grid center")
             result <= tag("Hotovo")
             result <= html.DIV(res_main, Class="big")
             result <= para(res_sub, "small")
 
-            if fact:
-                result <= hr()
-                result <= html.DIV("🦑 Mikro‑obsah", Class="tag")
-                result <= html.P(fact.get("text",""), Class="small")
-
-            def next_player():
-                st = load()
-                st["step_index"] += 1
-                save(st)
-                render()
+            if slot:
+                result <= fact_box(slot)
 
+            # after the last player render() resolves the night
+            next_player = handoff(state, lambda i: night_turn_screen(state, i) if i < len(alive_players(state)) else None)
             result <= min_delay_button("Skryť a podať ďalej", settings["min_screen_ms"], next_player)
-            result.style.display = "grid"
-            action.style.display = "none"
-            save(state)
+            show(html.DIV([result], Class="grid"))
 
         # build list
-        exclude = []
-        if role != "doctor":
-            exclude = [player["id"]]
-        targets = [p for p in alive if p["id"] not in set(exclude)]
-        lst = html.DIV(Class="list")
-        for tgt in targets:
-            def make_click(tid):
-                return lambda ev: do_pick(tid)
-            lst <= choice_row(tgt["name"], make_click(tgt["id"]))
-        action <= lst
+        targets = night_targets(state, player)
+        action <= choice_list([(t.id, t.name) for t in targets], do_pick)
+        return action
 
-        document["app"].clear()
-        document["app"] <= html.DIV([action, result], Class="grid")
+    action = action_card()
+
+    def unlock():
+        picked[:] = [perf.start("unlock → pick", "input")]
+        show(html.DIV([action], Class="grid"))
 
     return pass_gate(
         f"Noc 🌙 • hráč {idx+1}/{len(alive)}",
-        f"Telefón si zoberie {player['name']}. Zadaj PIN a odomkni. (Každý vyberie jedno meno.)",
+        f"Telefón si zoberie {player.name}. Zadaj PIN a odomkni. (Každý vyberie jedno meno.)",
         unlock
     )
 
-def resolve_night(state):
-    alive = alive_players(state)
-    mafia_ids = [p["id"] for p in alive if p["role"] == "mafia"]
-    votes = state["night"]["mafia_votes"]
-    # collect only living mafia votes (some might be missing if a mafia didn't vote – treat as no kill)
-    mafia_votes = [votes.get(str(mid)) for mid in mafia_ids if str(mid) in votes]
-
-    kill_target = None
-    if mafia_ids and len(mafia_votes) == len(mafia_ids):
-        if state["settings"]["mafia_strict_unanimity"]:
-            # all must match
-            if len(set(mafia_votes)) == 1:
-                kill_target = mafia_votes[0]
-        else:
-            # plurality; tie => no kill
-            tally = {}
-            for tid in mafia_votes:
-                tally[tid] = tally.get(tid, 0) + 1
-            mx = max(tally.values()) if tally else 0
-            winners = [tid for tid, c in tally.items() if c == mx]
-            if len(winners) == 1:
-                kill_target = winners[0]
-
-    # doctor save
-    save_id = state["night"]["doctor_save"]
-    if kill_target is not None and save_id == kill_target:
-        kill_target = None
-
-    # apply death
-    state["last"]["night_dead"] = kill_target
-    if kill_target is not None:
-        victim = get_player(state, kill_target)
-        if victim:
-            victim["alive"] = False
-            # first dead becomes osud option
-            if state["settings"]["first_dead_osud"] and not state["osud"]["enabled"]:
-                state["osud"] = {"enabled": True, "player_id": victim["id"]}
-
-    # reset step index for next phase
-    state["step_index"] = 0
-    state["phase"] = "dawn"
+@perf.timed("screen")
+def parallel_night_screen(state):
+    """The table phone while the players pick on their own phones: the host
+    resolves the night once all have picked, this phone adopts its state."""
+    table = state["host"]["table"]
+    progress = fresh(html.DIV("Pripájam sa k hostiteľovi…", Class="small"))
+    root = html.DIV(Class="card grid center")
+    root <= tag("Noc")
+    root <= html.DIV("Každý volí na svojom mobile", Class="big")
+    root <= para("Mobil zostáva na stole. Ráno sa ukáže samo, keď zvolia všetci živí hráči.", "small")
+    root <= progress
+
+    shown = [True]
+    def left():
+        shown[0] = False
+    timers.on_leave(left)
+
+    def status(res):
+        if not shown[0] or res.get("night") != state["day"] or load() is not state:
+            return
+        if res.get("resolved"):
+            timers.clear_screen()
+            save(engine.state_from_json(res["state"]))
+            render()
+            return
+        progress.text = f"Zvolili: {res['picked']}/{res['alive']}"
+    def offline():
+        progress.text = "Hostiteľ neodpovedá, skúšam znova…"
+    # the host keeps the picks of this night if the upload repeats
+    def upload():
+        host_call("POST", f"tables/{table}/night", {"state": engine.state_to_json(state)}, uploaded, retry)
+    def uploaded(res):
+        if shown[0]:
+            status(res)
+            host_stream(f"tables/{table}", status, offline, 1000)
+    def retry():
+        offline()
+        timers.after(2000, upload)
+    upload()
+
+    def sequential(ev=None):
+        st = load()
+        st["settings"]["parallel_night"] = False
+        save(st)
+        render()
+    btn = html.BUTTON("Pokračovať podávaním mobilu", Class="secondary")
+    on(btn, "click", sequential)
+    root <= btn
+    return root
 
+@perf.timed("screen")
+def seat_screen():
+    """A player's own phone in a parallel night (#seat=<token>): role on
+    demand, the pick of the night and its result, all from the host."""
+    set_subtitle("Môj mobil • Palermo")
+    body = fresh(html.DIV(Class="grid"))
+    shown = {"key": None, "view": None, "hidden": None, "sent": None}
+
+    def role_box(view):
+        info = html.DIV(Class="grid center", style={"display": "none"})
+        info <= html.DIV(role_label(view["role"]), Class="big")
+        if view.get("mafia") is not None:
+            info <= para("Ostatní mafiáni: " + (", ".join(view["mafia"]) or "si jediný mafián."), "small")
+        btn = html.BUTTON("Ukázať rolu", Class="secondary")
+        def toggle(ev):
+            hidden = info.style.display == "none"
+            info.style.display = "" if hidden else "none"
+            btn.text = "Skryť rolu" if hidden else "Ukázať rolu"
+        on(btn, "click", toggle)
+        return html.DIV([btn, info], Class="grid center")
+
+    def waiting(view, text):
+        c = html.DIV(Class="card grid center")
+        c <= tag(view["name"])
+        c <= html.DIV(text, Class="big")
+        if view.get("night") and view["picked"] < view["expected"]:
+            c <= para(f"Zvolili: {view['picked']}/{view['expected']}", "small")
+        if view["alive"]:
+            c <= role_box(view)
+        return c
+
+    def pick_card(view):
+        night = view["night"]
+        c = html.DIV(Class="card grid")
+        c <= html.DIV([tag(f"Noc {night}"), html.SPAN(view["name"], Class="kbd")], Class="row")
+        c <= h2("Vyber meno zo zoznamu")
+        c <= para(night_prompt(view["role"]), "small")
+        def do_pick(target_id):
+            if shown["sent"] == night:
+                return
+            shown["sent"] = night
+            def failed():
+                shown["sent"] = None
+                toast("Voľbu sa nepodarilo odoslať, skús znova")
+            host_call("POST", f"seat/{SEAT}/pick", {"x": target_id}, draw, failed)
+        c <= choice_list([(pid, name) for pid, name in view["targets"]], do_pick)
+        return c
+
+    def result_card(view):
+        res = view["result"]
+        main, sub = pick_result(view["role"], res["target"], res["is_mafia"])
+        c = html.DIV(Class="card grid center")
+        c <= tag("Hotovo")
+        c <= html.DIV(main, Class="big")
+        c <= para(sub, "small")
+        btn = html.BUTTON("Skryť", Class="secondary")
+        def hide(ev):
+            shown["hidden"] = view["night"]
+            draw(shown["view"])
+        on(btn, "click", hide)
+        c <= btn
+        return c
+
+    def draw(view):
+        shown["view"] = view
+        night = view.get("night")
+        if not view["alive"]:
+            key, build = ("out",), lambda: waiting(view, "Si mimo hry")
+        elif "targets" in view:
+            key, build = ("pick", night), lambda: pick_card(view)
+        elif "result" in view and shown["hidden"] != night:
+            key, build = ("result", night), lambda: result_card(view)
+        elif night and view["picked"] < view["expected"]:
+            key, build = ("wait", night, view["picked"]), lambda: waiting(view, "Čakáme na ostatných")
+        else:
+            key, build = ("day", night), lambda: waiting(view, "Čakaj na noc")
+        if key != shown["key"]:
+            shown["key"] = key
+            body.clear()
+            body <= build()
+
+    def offline():
+        if shown["key"] != ("offline",):
+            shown["key"] = ("offline",)
+            body.clear()
+            body <= card(tag("Spojenie"), para("Hostiteľ neodpovedá, skúšam znova…", "small"), cls="card grid center")
+
+    host_call("GET", f"seat/{SEAT}", None, draw, offline)
+    host_stream(f"seat/{SEAT}", draw, offline, 1500)
+    return body
+
+@perf.timed("screen")
 def dawn_screen(state):
     set_subtitle(f"Ráno • Deň {state['day']}")
     dead_id = state["last"]["night_dead"]
     msg = "Nikto nezomrel."
     if dead_id is not None:
-        msg = f"{get_player(state, dead_id)['name']} zomrel(a)."
+        msg = f"{get_player(state, dead_id).name} zomrel(a)."
     w = win_check(state)
     if w["over"]:
         state["phase"] = "end"
@@ -821,14 +1186,14 @@ def dawn_screen(state):
     btn = html.BUTTON("Prejsť na deň (zadanie odsúdeného)", Class="")
     def go_day(ev=None):
         st = load()
-        st["phase"] = "day_admin"
-        st["step_index"] = 0
+        engine.goto(st, "day_admin")
         save(st)
         render()
-    btn.bind("click", go_day)
+    on(btn, "click", go_day)
     root <= btn
     return root
 
+@perf.timed("screen")
 def day_admin_screen(state):
     set_subtitle(f"Deň {state['day']} • administrácia")
     root = html.DIV(Class="grid")
@@ -839,67 +1204,48 @@ def day_admin_screen(state):
         panel <= para("Hlasovanie prebehlo mimo appky. Vyber odsúdeného zo zoznamu živých alebo zvoľ „Nikto“.", "small")
 
         alive = alive_players(state)
-        lst = html.DIV(Class="list")
 
-        def apply_judgement(target_id):
-            state["last"]["day_dead"] = target_id
+        def judge(target_id):
+            victim, w = journal({"t": "judge", "x": target_id})
             reveal_mode = state["settings"]["reveal_after_judgement"]
             outcome = html.DIV(Class="card grid center")
 
-            if target_id is not None:
-                victim = get_player(state, target_id)
-                victim["alive"] = False
-                if state["settings"]["first_dead_osud"] and not state["osud"]["enabled"]:
-                    state["osud"] = {"enabled": True, "player_id": victim["id"]}
-
+            if victim is not None:
                 outcome <= tag("Odsúdený")
-                outcome <= html.DIV(victim["name"], Class="big")
+                outcome <= html.DIV(victim.name, Class="big")
 
                 if reveal_mode == "none":
                     outcome <= para("Rola nebola zverejnená (podľa nastavenia).", "small")
                 elif reveal_mode == "side":
-                    outcome <= para(f"Bol to: {side_label(victim['role'])}", "small")
+                    outcome <= para(f"Bol to: {side_label(victim.role)}", "small")
                 else:
-                    outcome <= para(f"Rola: {role_label(victim['role'])}", "small")
+                    outcome <= para(f"Rola: {role_label(victim.role)}", "small")
             else:
                 outcome <= tag("Odsúdený")
                 outcome <= html.DIV("Nikto", Class="big")
                 outcome <= para("Tento deň nebol nikto vyradený.", "small")
 
-            w = win_check(state)
             if w["over"]:
-                state["phase"] = "end"
-                save(state)
-                document["app"].clear()
-                document["app"] <= end_screen(state)
+                show(end_screen(state))
                 return
 
-            # next night
-            state["day"] += 1
-            reset_night(state)
-            state["phase"] = "night_turn"
-            save(state)
-
             def next_night():
                 render()
             outcome <= min_delay_button("Pokračovať na noc", state["settings"]["min_screen_ms"], next_night, cls="")
 
-            document["app"].clear()
-            document["app"] <= outcome
+            show(outcome)
 
         # add "none" option
-        lst <= choice_row("Nikto nebol odsúdený", lambda ev: apply_judgement(None))
-        for p_ in alive:
-            lst <= choice_row(p_["name"], lambda ev, pid=p_["id"]: apply_judgement(pid))
-        panel <= lst
+        items = [(None, "Nikto nebol odsúdený")] + [(p_.id, p_.name) for p_ in alive]
+        panel <= choice_list(items, judge)
 
-        document["app"].clear()
-        document["app"] <= panel
+        show(panel)
 
     root <= pass_gate("Deň – admin PIN", "Zadaj PIN a podrž (zadanie odsúdeného).", unlock_admin)
     root <= card(tag("Poznámka"), para("Admin je chránený spoločným PIN-om, aby sa minimalizovali omyly/trolling.", "small"))
     return root
 
+@perf.timed("screen")
 def end_screen(state):
     w = win_check(state)
     winner = "Mafia" if w.get("winner") == "mafia" else "Občania"
@@ -910,33 +1256,33 @@ def end_screen(state):
     head <= tag("Koniec")
     head <= html.DIV(f"{winner} vyhrali!", Class="big")
     head <= para("Roly ukazujeme až teraz.", "small")
+    # once per game (keyed by its gid), however often this screen is drawn
+    history.record(state, lambda stored: toast("Hra uložená do histórie") if stored else None)
 
     roles = html.DIV(Class="card grid")
     roles <= h2("Roly")
     lst = html.DIV(Class="list")
     for p_ in state["players"]:
         row = html.DIV(Class="choice")
-        row <= html.SPAN(p_["name"])
-        row <= html.SPAN(role_label(p_["role"]), Class="kbd")
+        row <= html.SPAN(p_.name)
+        row <= html.SPAN(role_label(p_.role), Class="kbd")
         lst <= row
     roles <= lst
 
     btns = html.DIV(Class="card row")
     def new_same(ev=None):
-        names = [p_["name"] for p_ in state["players"]]
-        mafia_count = sum(1 for p_ in state["players"] if p_["role"] == "mafia")
-        settings = state["settings"]
-        st = new_game(names, state["pin"], mafia_count, settings)
-        save(st)
-        render()
+        names = [p_.name for p_ in state["players"]]
+        mafia_count = sum(1 for p_ in state["players"] if p_.role == "mafia")
+        settings = dict(state["settings"])
+        start_game(new_game(names, state["pin"], mafia_count, settings))
     def back_setup(ev=None):
         clear_state()
         render()
 
     b1 = html.BUTTON("Nová hra (tie isté mená)")
     b2 = html.BUTTON("Späť na nastavenie", Class="secondary")
-    b1.bind("click", new_same)
-    b2.bind("click", back_setup)
+    on(b1, "click", new_same)
+    on(b2, "click", back_setup)
     btns <= b1
     btns <= b2
 
@@ -945,12 +1291,128 @@ def end_screen(state):
     root <= btns
     return root
 
+def games_card(games):
+    """Saved games to resume, from the index record only."""
+    box = html.DIV(Class="card grid")
+    box <= h2("Rozohrané hry")
+    box <= para("Každý stôl má vlastnú uloženú hru. Ťukni na hru a pokračuj v nej.", "small")
+    lst = html.DIV(Class="list")
+    for slot, g in games:
+        when = window.Date.new(g.get("t", 0)).toLocaleTimeString("sk-SK", {"hour": "2-digit", "minute": "2-digit"})
+        row = html.DIV(Class="choice")
+        row <= html.SPAN(f"{g['label']} ({g['n']})")
+        row <= html.SPAN(f"{phase_title(g['phase'], g['day'])} • {when}", Class="kbd")
+        row.attrs["data-slot"] = slot
+        lst <= keyed(row, f"game-{slot}")
+
+    def on_click(ev):
+        row = ev.target.closest(".choice")
+        if row is None:
+            return
+        open_game(row.attrs.get("data-slot"))
+        render()
+    on(lst, "click", on_click)
+    box <= lst
+    return box
+
+@perf.timed("screen")
+def games_screen():
+    set_subtitle("Uložené hry")
+    root = html.DIV(Class="grid")
+    games = GAMES.games()
+    if games:
+        root <= games_card(games)
+    else:
+        root <= card(tag("Hry"), para("Zatiaľ žiadna uložená hra.", "small"))
+    btns = html.DIV(Class="card row")
+    b_new = html.BUTTON("Nová hra (ďalší stôl)")
+    b_stats = html.BUTTON("Štatistiky", Class="secondary")
+    b_back = html.BUTTON("Späť", Class="secondary")
+    def new_table(ev=None):
+        open_game(GAMES.new_slot())
+        render()
+    on(b_new, "click", new_table)
+    on(b_stats, "click", lambda ev: show(stats_screen()))
+    on(b_back, "click", lambda ev: render())
+    btns <= b_new
+    btns <= b_stats
+    btns <= b_back
+    root <= btns
+    return root
+
+def _pct(counter):
+    r = history.rate(counter)
+    return "–" if r is None else f"{round(100 * r)} %"
+
+def _stat_row(label, value):
+    row = html.DIV(Class="choice")
+    row <= html.SPAN(label)
+    row <= html.SPAN(value, Class="kbd")
+    return row
+
+@perf.timed("screen")
+def stats_screen():
+    """Aggregates of the game history (history.py); the cards are filled
+    when IndexedDB answers."""
+    set_subtitle("Štatistiky")
+    root = html.DIV(Class="grid")
+    overview = fresh(html.DIV(para("Načítavam…", "small"), Class="card grid"))
+    players_box = fresh(html.DIV(Class="grid"))
+    recent_box = fresh(html.DIV(Class="grid"))
+
+    def fill_overview(s):
+        overview.clear()
+        overview <= h2("Prehľad")
+        total = s and s["all"]
+        if not total:
+            overview <= para("Zatiaľ žiadna dohraná hra.", "small")
+            return
+        lst = html.DIV(Class="list")
+        lst <= _stat_row("Odohrané hry", str(total["games"]))
+        lst <= _stat_row("Priemerná dĺžka", f"{history.avg_days(total):.1f} dňa".replace(".", ","))
+        for key, label in (("mafia", "Výhry mafie"), ("obcan", "Výhry občanov")):
+            won = s["winners"].get(key, {}).get("games", 0)
+            lst <= _stat_row(label, f"{won} ({round(100 * won / total['games'])} %)")
+        for role, c in sorted(s["roles"].items()):
+            lst <= _stat_row(f"Úspešnosť: {role_label(role)}", f"{_pct(c)} z {c['games']}")
+        overview <= lst
+
+    def fill_players(rows):
+        if not rows:
+            return
+        lst = html.DIV(Class="list")
+        for c in rows:
+            lst <= _stat_row(c["name"], f"{_pct(c)} výhier z {c['games']}")
+        players_box <= card(h2("Hráči"), lst, cls="card grid")
+
+    def fill_recent(recs):
+        if not recs:
+            return
+        lst = html.DIV(Class="list")
+        for r in recs:
+            when = window.Date.new(r["ended"]).toLocaleDateString("sk-SK")
+            winner = "Mafia" if r["winner"] == "mafia" else "Občania"
+            names = ", ".join(p["name"] for p in r["players"][:3])
+            lst <= _stat_row(f"{when} • {names}…", f"{winner} • {r['days']}. deň")
+        recent_box <= card(h2("Posledné hry"), lst, cls="card grid")
+
+    history.summary(fill_overview)
+    history.players(fill_players, 30)
+    history.recent(fill_recent, 10)
+    back = html.BUTTON("Späť", Class="secondary")
+    on(back, "click", lambda ev: show(games_screen()))
+    root <= overview
+    root <= players_box
+    root <= recent_box
+    root <= html.DIV([back], Class="card row")
+    return root
+
 def osud_panel(state):
     # optional panel (if first dead becomes osud enabled and triggered)
     if not (state.get("settings", {}).get("first_dead_osud") and state.get("osud", {}).get("enabled")):
         return card(tag("Osud"), para("Režim „Prvý mŕtvy = Osud“ nie je aktívny.", "small"))
     pid = state["osud"]["player_id"]
-    osud_name = get_player(state, pid)["name"] if get_player(state, pid) else "?"
+    osud_name = get_player(state, pid).name if get_player(state, pid) else "?"
     panel = html.DIV(Class="card grid")
     panel <= h2("Osud")
     panel <= para(f"Osud: {osud_name}", "small")
@@ -960,17 +1422,24 @@ def osud_panel(state):
     lst = html.DIV(Class="list")
     for p_ in state["players"]:
         row = html.DIV(Class="choice")
-        row <= html.SPAN(("🟢 " if p_["alive"] else "⚫ ") + p_["name"])
-        row <= html.SPAN(role_label(p_["role"]), Class="kbd")
+        row <= html.SPAN(("🟢 " if p_.alive else "⚫ ") + p_.name)
+        row <= html.SPAN(role_label(p_.role), Class="kbd")
         lst <= row
     panel <= lst
     return panel
 
 # -------- Render --------
+@perf.timed("render")
 def render():
+    timers.clear_screen()
+    if SEAT:
+        # a player's own phone: no local game, only the seat on the host
+        for b in ("btn_games", "btn_status", "btn_reset"):
+            document[b].style.display = "none"
+        show(seat_screen())
+        return
     state = load()
     app = document["app"]
-    app.clear()
 
     # header buttons
     _wire_install_about_button(state)
@@ -980,19 +1449,9 @@ def render():
     if not state:
         set_subtitle("Hostless PWA • Brython")
     else:
-        ph = state.get("phase","")
-        if ph == "setup":
-            set_subtitle("Nastavenie hry")
-        elif ph == "role_pass":
-            set_subtitle("Rozdanie rolí")
-        elif ph == "night_turn":
-            set_subtitle("Noc 🌙")
-        elif ph == "dawn":
-            set_subtitle(f"Ráno • Deň {state.get('day',1)}")
-        elif ph == "day_admin":
-            set_subtitle(f"Deň {state.get('day',1)} • administrácia")
-        elif ph == "end":
-            set_subtitle("Koniec hry")
+        title = phase_title(state.get("phase", ""), state.get("day", 1))
+        if title:
+            set_subtitle(title)
 
     # top buttons
     def on_reset(ev=None):
@@ -1007,11 +1466,17 @@ def render():
         if not st:
             toast("Bez hry")
             return
-        alive = len(alive_players(st))
+        alive = st["players"].alive_count
         toast(f"Živí: {alive}/{len(st['players'])} • Deň {st['day']} • Fáza: {st['phase']}")
     document["btn_status"].unbind("click")
     document["btn_status"].bind("click", on_status)
 
+    def on_games(ev=None):
+        timers.clear_screen()
+        show(games_screen())
+    document["btn_games"].unbind("click")
+    document["btn_games"].bind("click", on_games)
+
     def on_osud(ev=None):
         st = load()
         if not st:
@@ -1025,40 +1490,40 @@ def render():
     document["btn_osud"].unbind("click")
     document["btn_osud"].bind("click", on_osud)
 
-    if not FACTS_READY:
-        app <= card(tag("Načítavam…"), para("Pripájam mikro‑obsah (facts_chobotnica.json).", "small"))
-        return
-
     if not state:
-        app <= screen_setup()
+        show(screen_setup())
         return
 
     phase = state.get("phase", "setup")
     if phase == "setup":
-        app <= screen_setup()
+        show(screen_setup())
     elif phase == "role_pass":
-        app <= role_pass_screen(state)
-        # bind start night button if present
-        btn = document.select_one("#start_night")
-        if btn:
-            def start_night(ev=None):
-                st = load()
-                reset_night(st)
-                st["phase"] = "night_turn"
-                save(st)
-                render()
-            btn.bind("click", start_night)
+        show(role_pass_screen(state))
     elif phase == "night_turn":
-        app <= night_turn_screen(state)
+        show(night_turn_screen(state))
     elif phase == "dawn":
-        app <= dawn_screen(state)
+        show(dawn_screen(state))
     elif phase == "day_admin":
-        app <= day_admin_screen(state)
+        show(day_admin_screen(state))
     elif phase == "end":
-        app <= end_screen(state)
+        show(end_screen(state))
     else:
-        app <= card(tag("Chyba"), para("Neznáma fáza.", "small"))
+        show(card(tag("Chyba"), para("Neznáma fáza.", "small")))
 
 # -------- Boot --------
+window.addEventListener("storage", _on_storage)
+# saves from before the game index: list the game once
+if GAMES.entry(GAMES.active) is None and load():
+    GAMES.update(GAMES.active, engine.state_to_json(load()), window.Date.now())
+document.addEventListener("visibilitychange", _on_hide)
+window.addEventListener("pagehide", _on_hide)
+render()
 load_facts()
-render()
\ No newline at end of file
+load_balance()
+if not SEAT:
+    ping_host()
+    tasks.start()
+if perf.ON:
+    document["btn_perf"].style.display = "inline-flex"
+    document["btn_perf"].bind("click", lambda ev: _show_perf())
+_init_public_url()
\ No newline at end of file
@@ -0,0 +1,110 @@
+// Brython boot with a persistent cache of the app's compiled modules.
+//
+// Brython transpiles every .py file to JS at each launch. Before brython()
+// runs, bootBrython() fetches the app's modules (served by the SW cache),
+// registers them in Brython's VFS and, when IndexedDB has JS compiled from
+// the same source by the same Brython, hands it over as precompiled code so
+// the VFS loader skips compilation. Misses are compiled by Brython as usual
+// and stored once the import has finished.
+//
+// Records are keyed by module name and carry a SHA-256 of Brython version +
+// source; sw.js drops the whole database when a new CACHE version activates.
+// Modules already precompiled (tools/build_bundle.py) are left alone.
+//
+// worker.js loads this file too (importScripts) and boots the worker's
+// Brython with its own module list, reusing the same cache.
+(function () {
+  "use strict";
+  var DB = "palermo-osud-modules";
+  var MODULES = ["app", "engine", "store", "dom", "facts", "timers", "qr", "codec", "history", "tasks", "worker", "perf"];
+
+  function done(r) {
+    return new Promise(function (ok, fail) {
+      r.onsuccess = function () { ok(r.result); };
+      r.onerror = function () { fail(r.error); };
+    });
+  }
+
+  function openDb() {
+    var r = indexedDB.open(DB, 1);
+    r.onupgradeneeded = function () { r.result.createObjectStore("modules", {keyPath: "name"}); };
+    return done(r).then(function (db) {
+      // let sw.js delete the database while a page is open
+      db.onversionchange = function () { db.close(); };
+      return db;
+    });
+  }
+
+  function sha256(text) {
+    return crypto.subtle.digest("SHA-256", new TextEncoder().encode(text)).then(function (buf) {
+      return Array.from(new Uint8Array(buf), function (b) { return b.toString(16).padStart(2, "0"); }).join("");
+    });
+  }
+
+  function source(name) {
+    return fetch(name + ".py").then(function (res) {
+      if (!res.ok) throw new Error(name + ".py: HTTP " + res.status);
+      return res.text();
+    });
+  }
+
+  // -> [{name, hash}] of the modules Brython will have to compile
+  async function prepare(modules) {
+    var B = __BRYTHON__;
+    var todo = modules.filter(function (n) { return !B.precompiled.hasOwnProperty(n); });
+    if (!todo.length || !self.indexedDB || !(self.crypto && crypto.subtle)) return [];
+    var version = B.implementation.slice(0, 3).join(".");
+    var sources = await Promise.all(todo.map(source));
+    var hashes = await Promise.all(sources.map(function (src) { return sha256(version + "\n" + src); }));
+    var db = await openDb();
+    var records;
+    try {
+      var store = db.transaction("modules").objectStore("modules");
+      records = await Promise.all(todo.map(function (n) { return done(store.get(n)); }));
+    } finally {
+      db.close();
+    }
+    var misses = [];
+    todo.forEach(function (name, i) {
+      var scripts = {$timestamp: parseInt(hashes[i].slice(0, 12), 16)};
+      scripts[name] = [".py", sources[i], []];
+      B.update_VFS(scripts);
+      var rec = records[i];
+      if (rec && rec.hash === hashes[i]) {
+        B.precompiled[name] = rec.js;
+      } else {
+        misses.push({name: name, hash: hashes[i]});
+      }
+    });
+    return misses;
+  }
+
+  // The VFS loader leaves the JS it compiled in __BRYTHON__.precompiled.
+  function save(misses, tries) {
+    var B = __BRYTHON__;
+    var ready = misses.filter(function (m) { return typeof B.precompiled[m.name] === "string"; });
+    if (ready.length < misses.length && tries > 0) {
+      setTimeout(function () { save(misses, tries - 1); }, 500);
+      return;
+    }
+    if (!ready.length) return;
+    openDb().then(function (db) {
+      var tx = db.transaction("modules", "readwrite");
+      var store = tx.objectStore("modules");
+      ready.forEach(function (m) { store.put({name: m.name, hash: m.hash, js: B.precompiled[m.name]}); });
+      tx.oncomplete = tx.onabort = tx.onerror = function () { db.close(); };
+    }).catch(function () {});
+  }
+
+  // -> Promise resolved once brython(options) has run
+  self.bootBrython = function (options, modules) {
+    return prepare(modules || MODULES).catch(function (err) {
+      // no cache: Brython fetches and compiles the .py files itself
+      console.warn("boot.js:", err);
+      return [];
+    }).then(function (misses) {
+      brython(options);
+      if (misses.length) save(misses, 20);
+    });
+  };
+})();
@@ -0,0 +1,269 @@
+"""Kompaktný zápis uloženého stavu.
+
+No `browser` import. store.py writes the snapshot through encode() and
+reads it back through decode(), which returns the dict shape of
+engine.state_to_json (old plain-JSON snapshots are read as they are).
+
+    <kind><VERSION>|<phase>|<day>|<body>
+
+The header stays readable for index.html's pre-boot shell. The body is a
+positional JSON list instead of keyed dicts:
+
+  players   names, roles as 2-bit fields and alive flags as bits of two
+            ints, ids only when they are not 0..n-1
+  settings  0 for the PROFILE of this VERSION, otherwise only the keys that
+            differ from it (PROFILE is engine.DEFAULTS as it was when the
+            version was introduced; it never follows later changes)
+  night, last, osud  positional lists (kept as dicts if their keys change)
+  extra     any key this layout does not know, stored as is
+
+kind "z" packs the UTF-8 of that JSON with LZW into 15 bits per UTF-16
+code unit (localStorage quota is counted in code units, all of them stay
+below the surrogate range); kind "j" keeps it as plain text when packing
+would not make it shorter.
+"""
+import json
+
+VERSION = 2
+# settings every VERSION-2 snapshot is diffed against: a copy, not
+# engine.DEFAULTS, so that changing a default does not change what old
+# snapshots decode to
+PROFILE = {
+    "include_katanyi": True,
+    "include_doctor": False,
+    "mafia_know": True,
+    "mafia_strict_unanimity": True,
+    "reveal_after_judgement": "side",
+    "first_dead_osud": False,
+    "mask_citizens": True,
+    "facts_enabled": True,
+    "facts_for_all": False,
+    "facts_no_spoiler": True,
+    "min_screen_ms": 3000,
+}
+ROLES = ("citizen", "mafia", "katanyi", "doctor")
+_ROLE_BITS = {r: i for i, r in enumerate(ROLES)}
+_NIGHT = ("mafia_votes", "katanyi_check", "doctor_save", "citizen_dummy")
+_LAST = ("night_dead", "day_dead")
+_OSUD = ("enabled", "player_id")
+_LAYOUT = ("phase", "day", "players", "pin", "settings", "step_index",
+           "night", "last", "osud", "facts", "_epoch")
+
+
+# -------- LZW, 15 bits per character --------
+_CAP = 1 << 15   # largest dictionary, codes never exceed 15 bits
+
+
+def _width(i):
+    # the i-th code can name at most the entry added just before it
+    return max(8, (min(256 + i, _CAP) - 1).bit_length())
+
+
+def pack(data):
+    """bytes -> str of LZW codes packed 15 bits per character."""
+    codes = []
+    table = {}
+    size = 256
+    prefix = None
+    for b in data:
+        if prefix is None:
+            prefix = b
+            continue
+        code = table.get(prefix << 8 | b)
+        if code is not None:
+            prefix = code
+            continue
+        codes.append(prefix)
+        if size < _CAP:
+            table[prefix << 8 | b] = size
+            size += 1
+        prefix = b
+    if prefix is not None:
+        codes.append(prefix)
+    out = []
+    acc = nbits = 0
+    for i, code in enumerate(codes):
+        w = _width(i)
+        acc = (acc << w) | code
+        nbits += w
+        while nbits >= 15:
+            nbits -= 15
+            out.append(chr(32 + (acc >> nbits)))
+            acc &= (1 << nbits) - 1
+    if nbits:
+        out.append(chr(32 + (acc << (15 - nbits))))
+    return f"{len(codes)}:" + "".join(out)
+
+
+def unpack(text):
+    count, _, body = text.partition(":")
+    count = int(count)
+    # entries as latin-1 text: str slicing is native in Brython, bytes is not
+    entries = [chr(i) for i in range(256)]
+    out = []
+    acc = nbits = 0
+    pos = 0
+    prev = None
+    for i in range(count):
+        w = _width(i)
+        while nbits < w:
+            acc = (acc << 15) | (ord(body[pos]) - 32)
+            pos += 1
+            nbits += 15
+        nbits -= w
+        code = acc >> nbits
+        acc &= (1 << nbits) - 1
+        if code < len(entries):
+            entry = entries[code]
+        elif prev is not None and code == len(entries):
+            entry = prev + prev[:1]
+        else:
+            raise ValueError("corrupt LZW data")
+        if prev is not None and len(entries) < _CAP:
+            entries.append(prev + entry[:1])
+        out.append(entry)
+        prev = entry
+    return "".join(out).encode("latin-1")
+
+
+# -------- State layout --------
+def _fields(d, keys):
+    """Values of `d` in `keys` order, or d itself when its keys differ."""
+    if isinstance(d, dict) and set(d) == set(keys):
+        return [d[k] for k in keys]
+    return d
+
+
+def _unfields(v, keys):
+    return dict(zip(keys, v)) if isinstance(v, list) else v
+
+
+def _pairs(d):
+    return [x for k, t in d.items() for x in (int(k), t)]
+
+
+def _unpairs(flat):
+    return {str(flat[i]): flat[i + 1] for i in range(0, len(flat), 2)}
+
+
+def _players(rows):
+    roles = alive = 0
+    for i, r in enumerate(rows):
+        roles |= _ROLE_BITS[r["role"]] << (2 * i)
+        alive |= (1 if r["alive"] else 0) << i
+    ids = [r["id"] for r in rows]
+    return [[r["name"] for r in rows], roles, alive, 0 if ids == list(range(len(rows))) else ids]
+
+
+def _unplayers(v):
+    names, roles, alive, ids = v
+    ids = ids or list(range(len(names)))
+    return [{"id": ids[i], "name": name, "alive": bool(alive >> i & 1), "role": ROLES[roles >> (2 * i) & 3]}
+            for i, name in enumerate(names)]
+
+
+_MISSING = object()
+
+
+def _settings(s):
+    if s == PROFILE:
+        return 0
+    diff = {k: v for k, v in s.items() if PROFILE.get(k, _MISSING) != v}
+    missing = [k for k in PROFILE if k not in s]
+    return [diff, missing] if missing else diff
+
+
+def _unsettings(v):
+    if v == 0:
+        return dict(PROFILE)
+    diff, missing = (v if isinstance(v, list) else (v, []))
+    s = {k: x for k, x in PROFILE.items() if k not in missing}
+    s.update(diff)
+    return s
+
+
+def _compact(data):
+    if any(r.get("role") not in _ROLE_BITS for r in data["players"]):
+        raise ValueError("unknown role")
+    night = _fields(data["night"], _NIGHT)
+    if isinstance(night, list):
+        night[0] = _pairs(night[0])
+        night[1] = _fields(night[1], ("voter", "target", "is_mafia"))
+        night[3] = _pairs(night[3])
+    facts = data["facts"]
+    return [
+        _players(data["players"]),
+        data["pin"],
+        _settings(data["settings"]),
+        data["step_index"],
+        night,
+        _fields(data["last"], _LAST),
+        _fields(data["osud"], _OSUD),
+        [facts["seed"], facts["pos"]],
+        data.get("_epoch", 0),
+        {k: v for k, v in data.items() if k not in _LAYOUT},
+    ]
+
+
+def _expand(phase, day, body):
+    players, pin, settings, step_index, night, last, osud, facts, epoch, extra = body
+    if isinstance(night, list):
+        night = _unfields(night, _NIGHT)
+        night["mafia_votes"] = _unpairs(night["mafia_votes"])
+        night["katanyi_check"] = _unfields(night["katanyi_check"], ("voter", "target", "is_mafia"))
+        night["citizen_dummy"] = _unpairs(night["citizen_dummy"])
+    data = {
+        "phase": phase,
+        "day": day,
+        "players": _unplayers(players),
+        "pin": pin,
+        "settings": _unsettings(settings),
+        "step_index": step_index,
+        "night": night,
+        "last": _unfields(last, _LAST),
+        "osud": _unfields(osud, _OSUD),
+        "facts": {"seed": facts[0], "pos": facts[1]},
+        "_epoch": epoch,
+    }
+    data.update(extra)
+    return data
+
+
+# -------- API --------
+def encode(data, compress=True):
+    """engine.state_to_json dict -> stored string. compress=False leaves
+    the body as plain text (kind "j"), for repack() to pack later."""
+    try:
+        body = json.dumps(_compact(data), ensure_ascii=False, separators=(",", ":"))
+    except (KeyError, TypeError, ValueError):
+        # a shape this layout does not cover: keep the plain snapshot
+        return json.dumps(data)
+    # concatenated: Brython's str.format mangles combining marks, which
+    # packed text contains
+    raw = f"j{VERSION}|{data['phase']}|{data['day']}|" + body
+    return repack(raw) if compress else raw
+
+
+def repack(raw):
+    """Stored string -> the same snapshot with its body packed (kind "z")
+    when that is shorter. The LZW pass is the costly part of encode(); the
+    app runs it in a Web Worker (worker.py)."""
+    if not raw.startswith("j"):
+        return raw
+    head, phase, day, body = raw.split("|", 3)
+    packed = pack(body.encode("utf-8"))
+    if len(packed) >= len(body):
+        return raw
+    return "z" + head[1:] + "|" + phase + "|" + day + "|" + packed
+
+
+def decode(raw):
+    """Stored string -> engine.state_to_json dict."""
+    if raw.startswith("{"):
+        return json.loads(raw)   # snapshot of version 1 (plain JSON)
+    head, phase, day, body = raw.split("|", 3)
+    if head[1:] != str(VERSION):
+        raise ValueError(f"unknown state encoding {head!r}")
+    if head[0] == "z":
+        body = unpack(body).decode("utf-8")
+    return _expand(phase, int(day), json.loads(body))
@@ -0,0 +1,158 @@
+"""Malý keyed patcher pre Brython `html` elementy.
+
+Screens are still built with `browser.html`; mount() then patches the live
+container to look like the freshly built (detached) tree instead of
+clearing it, so unchanged nodes, keyed list rows and card shells survive
+between renders and only changed text/attributes touch the live DOM.
+
+Rules for code that builds trees for mount():
+- bind handlers with on(), not elt.bind(): a reused live node gets the new
+  handler through a single trampoline listener;
+- list rows get keyed() so they are matched by key, not by position;
+- a node the caller keeps a reference to after mounting (countdowns,
+  elements updated in place) must be marked fresh(); it is always moved
+  into the live tree instead of being patched. Form controls are always
+  fresh, their value/checked state is not an attribute.
+
+A tree may be built together with the screen before it and mounted by the
+next mount() (the night gate builds its hidden action card): handlers of a
+tree that a mount() did not show are kept for one more mount.
+"""
+
+FORM_TAGS = ("INPUT", "TEXTAREA", "SELECT")
+
+_handlers = {}   # hid -> {event type: fn}, for the currently mounted tree
+_pending = {}    # registered since the last mount()
+_parked = {}     # registered before the last mount(), not shown by it
+_seq = [0]
+
+
+def on(elt, evt, fn):
+    """Bind `fn` for `evt` through the patch-aware trampoline."""
+    hid = elt.attrs.get("data-hid")
+    if hid is None or hid not in _pending:
+        _seq[0] += 1
+        hid = str(_seq[0])
+        elt.attrs["data-hid"] = hid
+        _pending[hid] = {}
+    types = _pending[hid]
+    if evt not in types:
+        bound = (elt.attrs.get("data-on") or "").split()
+        if evt not in bound:
+            elt.bind(evt, _dispatch)
+            elt.attrs["data-on"] = " ".join(bound + [evt])
+    types[evt] = fn
+    return elt
+
+
+def keyed(elt, key):
+    elt.attrs["data-key"] = str(key)
+    return elt
+
+
+def fresh(elt):
+    elt.attrs["data-fresh"] = "1"
+    return elt
+
+
+def _dispatch(ev):
+    hid = ev.currentTarget.attrs.get("data-hid")
+    fn = (_handlers.get(hid) or _pending.get(hid) or {}).get(ev.type)
+    if fn is not None:
+        fn(ev)
+
+
+def _key(elt):
+    return elt.attrs.get("data-key")
+
+
+def _mixed(elt):
+    # text nodes next to elements: patch as a whole
+    return len(elt.children) and len(elt.childNodes) != len(elt.children)
+
+
+def _reusable(live, new):
+    return (live.tagName == new.tagName
+            and live.tagName not in FORM_TAGS
+            and "data-fresh" not in new.attrs
+            and not _mixed(live) and not _mixed(new))
+
+
+def _sync_attrs(live, new):
+    bound = (live.attrs.get("data-on") or "").split()
+    for name in list(live.attrs.keys()):
+        if name not in new.attrs:
+            del live.attrs[name]
+    for name, value in new.attrs.items():
+        if live.attrs.get(name) != value:
+            live.attrs[name] = value
+    # the trampoline must be listening for every event the new node wants
+    wanted = (new.attrs.get("data-on") or "").split()
+    for evt in wanted:
+        if evt not in bound:
+            live.bind(evt, _dispatch)
+            bound.append(evt)
+    if bound:
+        live.attrs["data-on"] = " ".join(bound)
+
+
+def _patch(live, new):
+    """Make `live` look like `new`; returns the node that ends up in the tree."""
+    if not _reusable(live, new):
+        live.parentNode.replaceChild(new, live)
+        return new
+    if live.isEqualNode(new):
+        return live
+    _sync_attrs(live, new)
+    if not new.children:
+        if live.children or live.text != new.text:
+            live.text = new.text
+    else:
+        patch_children(live, list(new.children))
+    return live
+
+
+def patch_children(live, new_kids):
+    """Reconcile the element children of `live` with `new_kids` (detached)."""
+    old = list(live.children)
+    if len(live.childNodes) != len(old):
+        live.clear()
+        old = []
+    by_key = {}
+    loose = []
+    for node in old:
+        k = _key(node)
+        if k is not None:
+            by_key[k] = node
+        else:
+            loose.append(node)
+    keep = []
+    for i, new in enumerate(new_kids):
+        k = _key(new)
+        cand = None
+        if k is not None:
+            cand = by_key.pop(k, None)
+        else:
+            for j, node in enumerate(loose):
+                if node.tagName == new.tagName:
+                    cand = loose.pop(j)
+                    break
+        node = _patch(cand, new) if cand is not None else new
+        cur = live.children
+        if i >= len(cur) or not cur[i].isSameNode(node):
+            live.insertBefore(node, cur[i] if i < len(cur) else None)
+        keep.append(node)
+    for node in list(live.children)[len(keep):]:
+        node.remove()
+
+
+def mount(container, *roots):
+    """Patch `container` so its children are `roots`; activates their handlers."""
+    global _handlers, _pending, _parked
+    patch_children(container, list(roots))
+    live = {node.attrs.get("data-hid") for node in container.select("[data-hid]")}
+    built = dict(_parked)
+    built.update(_pending)
+    _handlers = {hid: types for hid, types in built.items() if hid in live}
+    _parked = {hid: types for hid, types in _pending.items() if hid not in live}
+    _pending = {}
@@ -0,0 +1,352 @@
+"""Palermo – Osud: herné pravidlá bez DOM.
+
+Pure-Python game engine. No `browser` / `window` imports here, so the same
+rules run in Brython (app.py) and on CPython (simulations, tests, server).
+All functions work on the state dict stored by the UI; its "players" are
+a PlayerTable (state_to_json / state_from_json convert to the stored JSON).
+"""
+import random
+
+# phases:
+# setup
+# role_pass
+# night_turn
+# dawn
+# day_admin
+# end
+
+DEFAULTS = {
+    "include_katanyi": True,
+    "include_doctor": False,
+    "mafia_know": True,
+    "mafia_strict_unanimity": True,
+    "reveal_after_judgement": "side", # none/side/full
+    "first_dead_osud": False,
+    "mask_citizens": True,
+    "facts_enabled": True,
+    "facts_for_all": False,
+    "facts_no_spoiler": True,
+    "parallel_night": False,          # picks on the players' own phones (tools/host.py)
+    "min_screen_ms": 3000
+}
+
+MIN_PLAYERS = 5
+MAX_PLAYERS = 12
+
+
+def shuffle(lst, rng=random):
+    lst = list(lst)
+    rng.shuffle(lst)
+    return lst
+
+# -------- Players --------
+class Player:
+    __slots__ = ("id", "name", "role", "alive")
+
+    def __init__(self, id, name, role="citizen", alive=True):
+        self.id = id
+        self.name = name
+        self.role = role
+        self.alive = alive
+
+    def to_json(self):
+        return {"id": self.id, "name": self.name, "alive": self.alive, "role": self.role}
+
+
+class PlayerTable:
+    """Players in seat order with an id -> seat map and live counters.
+    Deaths must go through kill() so the counters stay right."""
+    __slots__ = ("rows", "index", "alive_count", "mafia_alive", "_alive")
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.index = {p.id: i for i, p in enumerate(rows)}
+        self.alive_count = sum(1 for p in rows if p.alive)
+        self.mafia_alive = sum(1 for p in rows if p.alive and p.role == "mafia")
+        self._alive = None
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __getitem__(self, seat):
+        return self.rows[seat]
+
+    def get(self, pid):
+        i = self.index.get(pid)
+        return self.rows[i] if i is not None else None
+
+    def alive(self):
+        """Living players in seat order (shared list, do not mutate)."""
+        if self._alive is None:
+            self._alive = [p for p in self.rows if p.alive]
+        return self._alive
+
+    def kill(self, pid):
+        p = self.get(pid)
+        if p is None or not p.alive:
+            return p
+        p.alive = False
+        self.alive_count -= 1
+        if p.role == "mafia":
+            self.mafia_alive -= 1
+        self._alive = None
+        return p
+
+    def to_json(self):
+        return [p.to_json() for p in self.rows]
+
+    @classmethod
+    def from_json(cls, rows):
+        return cls([Player(r["id"], r["name"], r.get("role", "citizen"), r.get("alive", True)) for r in rows])
+
+
+def state_to_json(state):
+    """Plain dict for json.dumps (players as the v1 list of dicts)."""
+    out = dict(state)
+    out["players"] = state["players"].to_json()
+    return out
+
+def state_from_json(data):
+    data["players"] = PlayerTable.from_json(data["players"])
+    if "facts" not in data:
+        # saves before the fact deck kept a list of shown fact ids
+        data.pop("_facts_used", None)
+        data["facts"] = new_fact_cursor()
+    if "gid" not in data:
+        # saves before game ids: the same id at every load of that save
+        seats = "\n".join(f"{p.name}:{p.role}" for p in data["players"])
+        data["gid"] = "s" + fnv1a(f"{data.get('pin', '')}\n{seats}")
+    return data
+
+def alive_players(state):
+    return state["players"].alive()
+
+def get_player(state, pid):
+    return state["players"].get(pid)
+
+def win_check(state):
+    table = state["players"]
+    mafia = table.mafia_alive
+    others = table.alive_count - mafia
+    if mafia <= 0:
+        return {"over": True, "winner": "obcan"}
+    if mafia >= others and table.alive_count > 0:
+        return {"over": True, "winner": "mafia"}
+    return {"over": False}
+
+def allowed_mafia_counts(n):
+    # defaults: 5-6 -> [1], 7-9 -> [1,2] (default 2), 10-12 -> [2,3] (default 3)
+    if n <= 6:
+        return [1]
+    if n <= 9:
+        return [1,2]
+    return [2,3]
+
+
+def normalize_names(raw_lines):
+    """Strip names, drop empties, and make them unique (case-insensitive) while preserving order.
+    Returns (names, fixed_dupes) where fixed_dupes is a list of original duplicate base names.
+    """
+    cleaned = [x.strip() for x in raw_lines if x and x.strip()]
+    seen = {}
+    out = []
+    fixed = []
+    for name in cleaned:
+        key = name.casefold()
+        if key not in seen:
+            seen[key] = 1
+            out.append(name)
+        else:
+            seen[key] += 1
+            if name not in fixed:
+                fixed.append(name)
+            out.append(f"{name} ({seen[key]})")
+    return out, fixed
+
+def deal_roles(n, mafia_count, settings, rng=random):
+    roles = []
+    roles += ["mafia"] * mafia_count
+    if settings["include_katanyi"]:
+        roles.append("katanyi")
+    if settings["include_doctor"]:
+        roles.append("doctor")
+    while len(roles) < n:
+        roles.append("citizen")
+    return shuffle(roles, rng)
+
+def new_game(names, pin, mafia_count, settings, rng=random):
+    roles = deal_roles(len(names), mafia_count, settings, rng)
+    players = PlayerTable([Player(i, n, roles[i]) for i, n in enumerate(names)])
+
+    state = {
+        "phase": "role_pass",
+        "day": 1,
+        "players": players,
+        "pin": pin,
+        "settings": settings,
+        "step_index": 0,
+        "night": {
+            "mafia_votes": {},      # voterId -> targetId
+            "katanyi_check": None,  # (voterId, targetId, isMafia)
+            "doctor_save": None,    # targetId
+            "citizen_dummy": {}     # voterId -> targetId
+        },
+        "last": {"night_dead": None, "day_dead": None},
+        "osud": {"enabled": False, "player_id": None},
+        "facts": new_fact_cursor(rng),
+        "gid": new_game_id(rng)
+    }
+    return state
+
+def new_game_id(rng=random):
+    """Id of one game (the key of its history record)."""
+    return f"{rng.getrandbits(32):08x}{rng.getrandbits(32):08x}"
+
+def fnv1a(text):
+    """Stable 32-bit hash as 8 hex digits (str hash() is salted per process)."""
+    h = 0x811C9DC5
+    for b in text.encode("utf-8"):
+        h = ((h ^ b) * 0x01000193) & 0xFFFFFFFF
+    return f"{h:08x}"
+
+def reset_night(state):
+    state["night"] = {"mafia_votes": {}, "katanyi_check": None, "doctor_save": None, "citizen_dummy": {}}
+    state["step_index"] = 0
+
+def goto(state, phase):
+    state["phase"] = phase
+    state["step_index"] = 0
+
+def next_step(state):
+    state["step_index"] += 1
+
+def start_night(state):
+    reset_night(state)
+    state["phase"] = "night_turn"
+
+# -------- Night --------
+def night_targets(state, player):
+    """Living players `player` may pick at night (doctor may pick self)."""
+    return [p for p in alive_players(state) if p.id != player.id or player.role == "doctor"]
+
+def record_pick(state, voter_id, target_id):
+    """Store one night pick according to the voter's role.
+    Returns the katanyi verdict (True/False) for a check, otherwise None.
+    """
+    voter = get_player(state, voter_id)
+    role = voter.role
+    night = state["night"]
+    if role == "mafia":
+        night["mafia_votes"][str(voter_id)] = target_id
+    elif role == "katanyi":
+        is_mafia = (get_player(state, target_id).role == "mafia")
+        night["katanyi_check"] = {"voter": voter_id, "target": target_id, "is_mafia": is_mafia}
+        return is_mafia
+    elif role == "doctor":
+        night["doctor_save"] = target_id
+    else:
+        night["citizen_dummy"][str(voter_id)] = target_id
+    return None
+
+def mafia_kill_target(votes, strict):
+    """Victim chosen by a complete list of mafia votes, or None."""
+    if not votes:
+        return None
+    if strict:
+        # all must match
+        if len(set(votes)) == 1:
+            return votes[0]
+        return None
+    # plurality; tie => no kill
+    tally = {}
+    for tid in votes:
+        tally[tid] = tally.get(tid, 0) + 1
+    mx = max(tally.values())
+    winners = [tid for tid, c in tally.items() if c == mx]
+    if len(winners) == 1:
+        return winners[0]
+    return None
+
+def kill(state, pid):
+    """Mark a player dead; the first dead becomes Osud when enabled."""
+    victim = state["players"].kill(pid)
+    if not victim:
+        return None
+    if state["settings"]["first_dead_osud"] and not state["osud"]["enabled"]:
+        state["osud"] = {"enabled": True, "player_id": victim.id}
+    return victim
+
+def resolve_night(state):
+    alive = alive_players(state)
+    mafia_ids = [p.id for p in alive if p.role == "mafia"]
+    votes = state["night"]["mafia_votes"]
+    # collect only living mafia votes (some might be missing if a mafia didn't vote – treat as no kill)
+    mafia_votes = [votes.get(str(mid)) for mid in mafia_ids if str(mid) in votes]
+
+    kill_target = None
+    if mafia_ids and len(mafia_votes) == len(mafia_ids):
+        kill_target = mafia_kill_target(mafia_votes, state["settings"]["mafia_strict_unanimity"])
+
+    # doctor save
+    save_id = state["night"]["doctor_save"]
+    if kill_target is not None and save_id == kill_target:
+        kill_target = None
+
+    # apply death
+    state["last"]["night_dead"] = kill_target
+    if kill_target is not None:
+        kill(state, kill_target)
+
+    # reset step index for next phase
+    state["step_index"] = 0
+    state["phase"] = "dawn"
+
+# -------- Day --------
+def apply_judgement(state, target_id):
+    """Execute the day verdict (None = nobody) and advance to the next night
+    or the end. Returns (victim, win_check result)."""
+    state["last"]["day_dead"] = target_id
+    victim = kill(state, target_id) if target_id is not None else None
+    w = win_check(state)
+    if w["over"]:
+        state["phase"] = "end"
+        return victim, w
+    # next night
+    state["day"] += 1
+    start_night(state)
+    return victim, w
+
+# -------- Facts --------
+def new_fact_cursor(rng=random):
+    return {"seed": rng.getrandbits(32), "pos": 0}
+
+def fact_cursor(state):
+    """Position in the game's fact deck (facts.FactDeck)."""
+    return state["facts"]
+
+def use_fact(state):
+    state["facts"]["pos"] += 1
+
+# -------- Journal events --------
+# Small records the store appends instead of rewriting the whole state:
+#   {"t": "step"}                        role viewed / night turn done
+#   {"t": "pick", "v": voter, "x": target, "f": 1 if a fact was shown}
+#   {"t": "day"}                         dawn over, the day starts
+#   {"t": "judge", "x": target_or_None}
+def apply_event(state, ev):
+    """Apply one journal event; returns what the underlying transition returns."""
+    t = ev["t"]
+    if t == "step":
+        return next_step(state)
+    if t == "pick":
+        if ev.get("f") is not None:
+            use_fact(state)
+        return record_pick(state, ev["v"], ev["x"])
+    if t == "day":
+        return goto(state, "day_admin")
+    if t == "judge":
+        return apply_judgement(state, ev["x"])
+    raise ValueError(f"unknown event {t!r}")
@@ -0,0 +1,71 @@
+"""Balíček faktov pre maskovaciu akciu.
+
+No `browser` import. The deck is built from facts/manifest.json
+(tools/fact_packs.py): the facts live in packs split by topic, language and
+spoiler flag, and only the pack counts are known up front. The packs of one
+language form two pools the settings can ask for (all / without spoilers).
+A draw reads one slot of a seeded permutation of the pool, so the game
+state keeps only the cursor {"seed", "pos"} (engine.fact_cursor) and no
+fact repeats until the whole pool has been shown; then the next round is
+shuffled from the same seed. The slot names a pack and an offset; the
+caller fetches the pack the first time it is needed (add_pack).
+"""
+import random
+from bisect import bisect_right
+
+
+class FactDeck:
+    __slots__ = ("pools", "packs", "_orders")
+
+    def __init__(self, manifest=None, lang="sk"):
+        entries = [p for p in (manifest or {}).get("packs", []) if p["lang"] == lang and p["count"]]
+        # keyed by settings["facts_no_spoiler"]: (pack files, cumulative start offsets, size)
+        self.pools = {
+            False: self._pool(entries),
+            True: self._pool([p for p in entries if not p["spoiler"]]),
+        }
+        self.packs = {}     # file -> list of facts, once fetched
+        self._orders = {}   # no_spoiler -> ((seed, round), permutation)
+
+    @staticmethod
+    def _pool(entries):
+        files, starts, size = [], [], 0
+        for p in entries:
+            files.append(p["file"])
+            starts.append(size)
+            size += p["count"]
+        return files, starts, size
+
+    def __len__(self):
+        return self.pools[False][2]
+
+    def _order(self, no_spoiler, seed, rnd):
+        cached = self._orders.get(no_spoiler)
+        if cached is None or cached[0] != (seed, rnd):
+            order = list(range(self.pools[no_spoiler][2]))
+            random.Random(seed + (rnd << 32)).shuffle(order)
+            cached = self._orders[no_spoiler] = ((seed, rnd), order)
+        return cached[1]
+
+    def slot(self, cursor, no_spoiler):
+        """(pack file, offset) under the cursor, or None for an empty pool.
+        Does not move the cursor: the pick event that shows the fact does
+        (engine.use_fact)."""
+        no_spoiler = bool(no_spoiler)
+        files, starts, size = self.pools[no_spoiler]
+        if not size:
+            return None
+        rnd, i = divmod(cursor["pos"], size)
+        k = self._order(no_spoiler, cursor["seed"], rnd)[i]
+        j = bisect_right(starts, k) - 1
+        return files[j], k - starts[j]
+
+    def add_pack(self, file, facts):
+        self.packs[file] = facts
+
+    def fact(self, slot):
+        """The fact in `slot`, None while its pack is not loaded."""
+        facts = self.packs.get(slot[0])
+        if facts is None or slot[1] >= len(facts):
+            return None
+        return facts[slot[1]]
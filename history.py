@@ -0,0 +1,245 @@
+"""História odohraných hier (IndexedDB).
+
+A game that reaches the end is stored once, keyed by state["gid"], in the
+"games" store with indexes on the end time, player names, roles and the
+winner. The same readwrite transaction adds the game to the counters in
+"stats" (one record per key of counter_updates()), so the aggregates, win
+rate per role and per player and the average length in days, are read from
+a few small records however many games the device has seen.
+
+Records cross into IndexedDB as JSON (window.JSON), which keeps them plain
+dicts on the Python side whatever Brython does with JS objects.
+"""
+import json
+
+from browser import window
+
+from engine import win_check
+
+DB = "palermo-osud-history"
+DB_VERSION = 1
+RECENT = 20
+
+
+# -------- Records and counters --------
+def name_key(name):
+    """Player name as indexed (one person across tables)."""
+    return " ".join(name.split()).lower()
+
+
+def side(role):
+    return "mafia" if role == "mafia" else "obcan"
+
+
+def game_record(state, ended):
+    """History record of a finished game; ended in ms since the epoch."""
+    players = [{"name": p.name, "role": p.role, "alive": p.alive} for p in state["players"]]
+    return {
+        "id": state["gid"],
+        "ended": ended,
+        "days": state["day"],
+        "winner": win_check(state).get("winner"),
+        "players": players,
+        "names": sorted({name_key(p["name"]) for p in players}),
+        "roles": sorted({p["role"] for p in players}),
+    }
+
+
+def counter_updates(rec):
+    """{counter key: {"games", "wins", "days"} increments} for one game;
+    player counters also carry the name as last written ("name")."""
+    out = {"all": {"games": 1, "wins": 0, "days": rec["days"]},
+           f"winner:{rec['winner']}": {"games": 1, "wins": 1, "days": rec["days"]}}
+
+    def bump(key, won):
+        c = out.setdefault(key, {"games": 0, "wins": 0, "days": 0})
+        c["games"] += 1
+        c["wins"] += 1 if won else 0
+        c["days"] += rec["days"]
+    for p in rec["players"]:
+        won = side(p["role"]) == rec["winner"]
+        bump(f"role:{p['role']}", won)
+        bump(f"player:{name_key(p['name'])}", won)
+        out[f"player:{name_key(p['name'])}"]["name"] = p["name"]
+    return out
+
+
+def rate(counter):
+    return counter["wins"] / counter["games"] if counter and counter.get("games") else None
+
+
+def avg_days(counter):
+    return counter["days"] / counter["games"] if counter and counter.get("games") else None
+
+
+# -------- IndexedDB --------
+def _js(obj):
+    return window.JSON.parse(json.dumps(obj))
+
+
+def _py(value):
+    text = window.JSON.stringify(value)
+    return json.loads(text) if isinstance(text, str) else None
+
+
+def _prefix(p):
+    return window.IDBKeyRange.bound(p, p + "\uffff")
+
+
+_db = [None]
+_waiting = []
+
+
+def _open(cb):
+    """cb(db), or cb(None) without IndexedDB."""
+    if _db[0] is not None:
+        cb(_db[0])
+        return
+    _waiting.append(cb)
+    if len(_waiting) > 1:
+        return
+
+    def finish(db):
+        _db[0] = db
+        for f in _waiting[:]:
+            f(db)
+        del _waiting[:]
+    try:
+        req = window.indexedDB.open(DB, DB_VERSION)
+    except Exception:
+        finish(None)
+        return
+
+    def upgrade(ev):
+        db = req.result
+        games = db.createObjectStore("games", _js({"keyPath": "id"}))
+        games.createIndex("ended", "ended")
+        games.createIndex("name", "names", _js({"multiEntry": True}))
+        games.createIndex("role", "roles", _js({"multiEntry": True}))
+        games.createIndex("winner", "winner")
+        db.createObjectStore("stats", _js({"keyPath": "key"}))
+    req.onupgradeneeded = upgrade
+    req.onsuccess = lambda ev: finish(req.result)
+    req.onerror = lambda ev: finish(None)
+
+
+_recorded = set()   # gids stored by this page
+
+
+def record(state, on_done=None):
+    """Store a finished game once and add it to the counters.
+    on_done(True) when this call stored it, on_done(False) otherwise."""
+    gid = state.get("gid")
+    done = on_done or (lambda stored: None)
+    if gid is None or gid in _recorded or state.get("phase") != "end":
+        done(False)
+        return
+    rec = game_record(state, window.Date.now())
+
+    def write(db):
+        if db is None:
+            done(False)
+            return
+        tx = db.transaction(["games", "stats"], "readwrite")
+        games = tx.objectStore("games")
+        stats = tx.objectStore("stats")
+        stored = [False]
+        seen = games.count(gid)
+
+        def add(ev):
+            _recorded.add(gid)
+            if seen.result:
+                return
+            stored[0] = True
+            games.add(_js(rec))
+            for key, inc in counter_updates(rec).items():
+                bump(key, inc)
+
+        def bump(key, inc):
+            get = stats.get(key)
+
+            def put(ev):
+                cur = _py(get.result) or {"key": key, "games": 0, "wins": 0, "days": 0}
+                for k, v in inc.items():
+                    cur[k] = v if isinstance(v, str) else cur.get(k, 0) + v
+                stats.put(_js(cur))
+            get.onsuccess = put
+        seen.onsuccess = add
+        tx.oncomplete = lambda ev: done(stored[0])
+        tx.onerror = tx.onabort = lambda ev: done(False)
+    _open(write)
+
+
+def summary(cb):
+    """cb({"all": counter, "winners": {side: counter}, "roles": {role: counter}}),
+    None without IndexedDB."""
+    def read(db):
+        if db is None:
+            cb(None)
+            return
+        stats = db.transaction("stats").objectStore("stats")
+        out = {"all": None, "winners": {}, "roles": {}}
+        total = stats.get("all")
+        winners = stats.getAll(_prefix("winner:"))
+        roles = stats.getAll(_prefix("role:"))
+
+        def ready(ev):
+            out["all"] = _py(total.result)
+            for c in _py(winners.result) or []:
+                out["winners"][c["key"].split(":", 1)[1]] = c
+            for c in _py(roles.result) or []:
+                out["roles"][c["key"].split(":", 1)[1]] = c
+            cb(out)
+        # requests of one transaction complete in order
+        roles.onsuccess = ready
+    _open(read)
+
+
+def players(cb, limit=None):
+    """cb([counter + "name"]) sorted by games played, None without IndexedDB."""
+    def read(db):
+        if db is None:
+            cb(None)
+            return
+        req = db.transaction("stats").objectStore("stats").getAll(_prefix("player:"))
+
+        def ready(ev):
+            rows = _py(req.result) or []
+            for c in rows:
+                c.setdefault("name", c["key"].split(":", 1)[1])
+            rows.sort(key=lambda c: (-c["games"], c["name"]))
+            cb(rows[:limit] if limit else rows)
+        req.onsuccess = ready
+    _open(read)
+
+
+def recent(cb, limit=RECENT, index=None, key=None):
+    """cb([records]) newest first. Without an index the "ended" index is
+    walked backwards with a cursor, so only `limit` games are read; with
+    one (name / role / winner) only the games under `key` are."""
+    def read(db):
+        if db is None:
+            cb(None)
+            return
+        games = db.transaction("games").objectStore("games")
+        if index is not None:
+            req = games.index(index).getAll(name_key(key) if index == "name" else key)
+
+            def ready(ev):
+                rows = _py(req.result) or []
+                rows.sort(key=lambda r: -r["ended"])
+                cb(rows[:limit])
+            req.onsuccess = ready
+            return
+        req = games.index("ended").openCursor(None, "prev")
+        out = []
+
+        def step(ev):
+            cur = req.result
+            if cur is None or len(out) >= limit:
+                cb(out)
+                return
+            out.append(_py(cur.value))
+            getattr(cur, "continue")()
+        req.onsuccess = step
+    _open(read)
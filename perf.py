@@ -0,0 +1,157 @@
+"""Meranie času na horúcich cestách (kruhový buffer, export pre Chrome).
+
+Off by default. Opening the app with #perf turns it on for this device
+(stored in localStorage, #perf=0 turns it off); the state is read once at
+import. While off, timed() returns the function unchanged, start() hands
+out one shared no-op and storage() the storage itself, so a normal game
+runs exactly the code it ran before.
+
+While on, spans go to a ring buffer of the last SIZE records
+(name, category, start ms, duration ms, args). The debug panel in app.py
+summarises them and exports them as Chrome trace events (chrome://tracing,
+ui.perfetto.dev), one track per category group in TRACKS.
+"""
+import json
+
+from browser import window
+
+KEY = "palermo_osud_perf"
+SIZE = 2000
+# trace-viewer thread of each category: the UI thread's nested spans, the
+# worker round trips and the player's think time overlap, so each gets its own
+TRACKS = {"render": (1, "UI"), "screen": (1, "UI"), "store": (1, "UI"), "facts": (1, "UI"),
+          "worker": (2, "Worker"), "input": (3, "Hráč")}
+
+
+def _enabled():
+    try:
+        h = window.location.hash or ""
+        if h in ("#perf", "#perf=1"):
+            window.localStorage.setItem(KEY, "1")
+        elif h == "#perf=0":
+            window.localStorage.removeItem(KEY)
+        return window.localStorage.getItem(KEY) == "1"
+    except Exception:
+        return False
+
+
+ON = _enabled()
+_buf = [None] * SIZE if ON else []
+_count = [0]   # records written since the last clear()
+
+
+def now():
+    return window.performance.now()
+
+
+def record(name, cat, start, args=None):
+    """A span that began at `start` (now()) and ends now."""
+    _buf[_count[0] % SIZE] = (name, cat, start, now() - start, args)
+    _count[0] += 1
+
+
+def _noop(args=None):
+    pass
+
+
+def start(name, cat):
+    """end(args=None) closing a span that starts now (e.g. a fetch)."""
+    if not ON:
+        return _noop
+    t0 = now()
+
+    def end(args=None):
+        record(name, cat, t0, args)
+    return end
+
+
+def timed(cat, name=None):
+    """Decorator: every call is a span named after the function."""
+    def wrap(fn):
+        if not ON:
+            return fn
+        label = name or fn.__name__
+
+        def timed_fn(*args, **kw):
+            t0 = now()
+            try:
+                return fn(*args, **kw)
+            finally:
+                record(label, cat, t0)
+        timed_fn.__name__ = fn.__name__
+        timed_fn.__doc__ = fn.__doc__
+        return timed_fn
+    return wrap
+
+
+class _Storage:
+    """localStorage with every read and write recorded, with its size
+    (UTF-16, as the quota counts it)."""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def getItem(self, key):
+        t0 = now()
+        value = self.storage.getItem(key)
+        record("getItem", "store", t0, {"key": key, "bytes": 2 * len(value) if value else 0})
+        return value
+
+    def setItem(self, key, value):
+        t0 = now()
+        self.storage.setItem(key, value)
+        record("setItem", "store", t0, {"key": key, "bytes": 2 * len(value)})
+
+    def removeItem(self, key):
+        self.storage.removeItem(key)
+
+
+def storage(s):
+    return _Storage(s) if ON else s
+
+
+# -------- Reading the buffer --------
+def records():
+    """Recorded spans, oldest first."""
+    n = _count[0]
+    if n <= SIZE:
+        return _buf[:n]
+    i = n % SIZE
+    return _buf[i:] + _buf[:i]
+
+
+def dropped():
+    return max(0, _count[0] - SIZE)
+
+
+def clear():
+    _count[0] = 0
+
+
+def summary():
+    """[(category, name, count, total, p50, max)] in ms, by total time."""
+    groups = {}   # category -> name -> durations
+    for name, cat, start, dur, args in records():
+        groups.setdefault(cat, {}).setdefault(name, []).append(dur)
+    rows = []
+    for cat in groups:
+        for name, durs in groups[cat].items():
+            durs.sort()
+            rows.append((cat, name, len(durs), sum(durs), durs[len(durs) // 2], durs[-1]))
+    rows.sort(key=lambda r: -r[3])
+    return rows
+
+
+def chrome_trace():
+    """JSON of the buffer in the Chrome trace-event format (complete
+    events, timestamps in µs since the page started)."""
+    events = []
+    for tid, label in sorted(set(TRACKS.values())):
+        events.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": label}})
+    for name, cat, start, dur, args in records():
+        ev = {"name": name, "cat": cat, "ph": "X", "pid": 1, "tid": TRACKS.get(cat, (1,))[0],
+              "ts": int(start * 1000), "dur": int(dur * 1000)}
+        if args:
+            ev["args"] = args
+        events.append(ev)
+    return json.dumps({"traceEvents": events, "displayTimeUnit": "ms"})
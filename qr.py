@@ -0,0 +1,318 @@
+"""QR kód bez siete (byte mode, verzie 1–40).
+
+No `browser` import: encode() returns the module matrix, svg() turns it
+into an SVG document the UI shows as a data: URL. The encoder follows
+ISO/IEC 18004: Reed-Solomon blocks per version and error correction
+level, function patterns, zigzag data placement and the mask with the
+lowest penalty.
+"""
+import re
+
+# error correction level -> format bits
+LEVELS = {"L": 1, "M": 0, "Q": 3, "H": 2}
+
+# index 0 unused; [level][version]
+ECC_PER_BLOCK = {
+    "L": (-1, 7, 10, 15, 20, 26, 18, 20, 24, 30, 18, 20, 24, 26, 30, 22, 24, 28, 30, 28, 28, 28, 28, 30, 30, 26, 28, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30),
+    "M": (-1, 10, 16, 26, 18, 24, 16, 18, 22, 22, 26, 30, 22, 22, 24, 24, 28, 28, 26, 26, 26, 26, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28),
+    "Q": (-1, 13, 22, 18, 26, 18, 24, 18, 22, 20, 24, 28, 26, 24, 20, 30, 24, 28, 28, 26, 30, 28, 30, 30, 30, 30, 28, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30),
+    "H": (-1, 17, 28, 22, 16, 22, 28, 26, 26, 24, 28, 24, 28, 22, 24, 24, 30, 28, 28, 26, 28, 30, 24, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30),
+}
+NUM_BLOCKS = {
+    "L": (-1, 1, 1, 1, 1, 1, 2, 2, 2, 2, 4, 4, 4, 4, 4, 6, 6, 6, 6, 7, 8, 8, 9, 9, 10, 12, 12, 12, 13, 14, 15, 16, 17, 18, 19, 19, 20, 21, 22, 24, 25),
+    "M": (-1, 1, 1, 1, 2, 2, 4, 4, 4, 5, 5, 5, 8, 9, 9, 10, 10, 11, 13, 14, 16, 17, 17, 18, 20, 21, 23, 25, 26, 28, 29, 31, 33, 35, 37, 38, 40, 43, 45, 47, 49),
+    "Q": (-1, 1, 1, 2, 2, 4, 4, 6, 6, 8, 8, 8, 10, 12, 16, 12, 17, 16, 18, 21, 20, 23, 23, 25, 27, 29, 34, 34, 35, 38, 40, 43, 45, 48, 51, 53, 56, 59, 62, 65, 68),
+    "H": (-1, 1, 1, 2, 4, 4, 4, 5, 6, 8, 8, 11, 11, 16, 16, 18, 16, 19, 21, 25, 25, 25, 34, 30, 32, 35, 37, 40, 42, 45, 48, 51, 54, 57, 60, 63, 66, 70, 74, 77, 81),
+}
+
+
+# -------- Reed-Solomon over GF(256), polynomial 0x11D --------
+_EXP = [0] * 510
+_LOG = [0] * 256
+_x = 1
+for _i in range(255):
+    _EXP[_i] = _EXP[_i + 255] = _x
+    _LOG[_x] = _i
+    _x <<= 1
+    if _x & 0x100:
+        _x ^= 0x11D
+
+
+def _gf_mul(x, y):
+    if not x or not y:
+        return 0
+    return _EXP[_LOG[x] + _LOG[y]]
+
+
+def _rs_divisor(degree):
+    result = [0] * (degree - 1) + [1]
+    root = 1
+    for _ in range(degree):
+        for j in range(degree):
+            result[j] = _gf_mul(result[j], root)
+            if j + 1 < degree:
+                result[j] ^= result[j + 1]
+        root = _gf_mul(root, 0x02)
+    return result
+
+
+def _rs_remainder(data, divisor):
+    result = [0] * len(divisor)
+    for b in data:
+        factor = b ^ result.pop(0)
+        result.append(0)
+        for i, coef in enumerate(divisor):
+            result[i] ^= _gf_mul(coef, factor)
+    return result
+
+
+# -------- Capacity --------
+def _raw_modules(ver):
+    result = (16 * ver + 128) * ver + 64
+    if ver >= 2:
+        align = ver // 7 + 2
+        result -= (25 * align - 10) * align - 55
+        if ver >= 7:
+            result -= 36
+    return result
+
+
+def _data_codewords(ver, level):
+    return _raw_modules(ver) // 8 - ECC_PER_BLOCK[level][ver] * NUM_BLOCKS[level][ver]
+
+
+def _alignment_positions(ver, size):
+    if ver == 1:
+        return []
+    align = ver // 7 + 2
+    step = (ver * 8 + align * 3 + 5) // (align * 4 - 4) * 2
+    return [6] + sorted(size - 7 - i * step for i in range(align - 1))
+
+
+# -------- Codewords --------
+def _data_bits(data, ver):
+    bits = []
+
+    def put(value, n):
+        bits.extend((value >> i) & 1 for i in range(n - 1, -1, -1))
+    put(0b0100, 4)                       # byte mode
+    put(len(data), 8 if ver < 10 else 16)
+    for b in data:
+        put(b, 8)
+    return bits
+
+
+def _codewords(data, ver, level):
+    capacity = _data_codewords(ver, level) * 8
+    bits = _data_bits(data, ver)
+    bits += [0] * min(4, capacity - len(bits))
+    bits += [0] * (-len(bits) % 8)
+    words = [int("".join(map(str, bits[i:i + 8])), 2) for i in range(0, len(bits), 8)]
+    pad = 0xEC
+    while len(words) * 8 < capacity:
+        words.append(pad)
+        pad ^= 0xEC ^ 0x11
+    # split into blocks, add ECC, interleave
+    blocks_n = NUM_BLOCKS[level][ver]
+    ecc_len = ECC_PER_BLOCK[level][ver]
+    raw = _raw_modules(ver) // 8
+    short_n = blocks_n - raw % blocks_n
+    short_len = raw // blocks_n
+    divisor = _rs_divisor(ecc_len)
+    blocks = []
+    k = 0
+    for i in range(blocks_n):
+        n = short_len - ecc_len + (0 if i < short_n else 1)
+        dat = words[k:k + n]
+        k += n
+        ecc = _rs_remainder(dat, divisor)
+        if i < short_n:
+            dat.append(0)
+        blocks.append(dat + ecc)
+    out = []
+    for i in range(len(blocks[0])):
+        for j, blk in enumerate(blocks):
+            if i != short_len - ecc_len or j >= short_n:
+                out.append(blk[i])
+    return out
+
+
+# -------- Matrix --------
+class _Grid:
+    def __init__(self, ver):
+        self.size = ver * 4 + 17
+        self.dark = [[False] * self.size for _ in range(self.size)]
+        self.func = [[False] * self.size for _ in range(self.size)]
+
+    def set(self, x, y, dark):
+        self.dark[y][x] = dark
+        self.func[y][x] = True
+
+
+def _finder(g, cx, cy):
+    for dy in range(-4, 5):
+        for dx in range(-4, 5):
+            x, y = cx + dx, cy + dy
+            if 0 <= x < g.size and 0 <= y < g.size:
+                g.set(x, y, max(abs(dx), abs(dy)) not in (2, 4))
+
+
+def _format_bits(g, level, mask):
+    data = LEVELS[level] << 3 | mask
+    rem = data
+    for _ in range(10):
+        rem = (rem << 1) ^ ((rem >> 9) * 0x537)
+    bits = (data << 10 | rem) ^ 0x5412
+
+    def bit(i):
+        return (bits >> i) & 1 != 0
+    for i in range(6):
+        g.set(8, i, bit(i))
+    g.set(8, 7, bit(6))
+    g.set(8, 8, bit(7))
+    g.set(7, 8, bit(8))
+    for i in range(9, 15):
+        g.set(14 - i, 8, bit(i))
+    for i in range(8):
+        g.set(g.size - 1 - i, 8, bit(i))
+    for i in range(8, 15):
+        g.set(8, g.size - 15 + i, bit(i))
+    g.set(8, g.size - 8, True)
+
+
+def _function_patterns(g, ver):
+    size = g.size
+    for i in range(size):
+        g.set(6, i, i % 2 == 0)
+        g.set(i, 6, i % 2 == 0)
+    _finder(g, 3, 3)
+    _finder(g, size - 4, 3)
+    _finder(g, 3, size - 4)
+    pos = _alignment_positions(ver, size)
+    last = len(pos) - 1
+    for i, ax in enumerate(pos):
+        for j, ay in enumerate(pos):
+            if (i, j) in ((0, 0), (0, last), (last, 0)):
+                continue
+            for dy in range(-2, 3):
+                for dx in range(-2, 3):
+                    g.set(ax + dx, ay + dy, max(abs(dx), abs(dy)) != 1)
+    _format_bits(g, "M", 0)   # reserve the area, real bits come with the mask
+    if ver >= 7:
+        rem = ver
+        for _ in range(12):
+            rem = (rem << 1) ^ ((rem >> 11) * 0x1F25)
+        bits = ver << 12 | rem
+        for i in range(18):
+            dark = (bits >> i) & 1 != 0
+            a, b = size - 11 + i % 3, i // 3
+            g.set(a, b, dark)
+            g.set(b, a, dark)
+
+
+def _place(g, words):
+    size = g.size
+    i = 0
+    total = len(words) * 8
+    right = size - 1
+    while right >= 1:
+        if right == 6:
+            right = 5
+        upward = ((right + 1) & 2) == 0
+        for vert in range(size):
+            y = size - 1 - vert if upward else vert
+            for x in (right, right - 1):
+                if not g.func[y][x] and i < total:
+                    g.dark[y][x] = (words[i >> 3] >> (7 - (i & 7))) & 1 != 0
+                    i += 1
+        right -= 2
+
+
+MASKS = (
+    lambda x, y: (x + y) % 2 == 0,
+    lambda x, y: y % 2 == 0,
+    lambda x, y: x % 3 == 0,
+    lambda x, y: (x + y) % 3 == 0,
+    lambda x, y: (x // 3 + y // 2) % 2 == 0,
+    lambda x, y: x * y % 2 + x * y % 3 == 0,
+    lambda x, y: (x * y % 2 + x * y % 3) % 2 == 0,
+    lambda x, y: ((x + y) % 2 + x * y % 3) % 2 == 0,
+)
+
+
+def _masked(g, mask):
+    """Masked matrix as "0"/"1" row strings."""
+    # every mask repeats with period 6 in x and 12 in y
+    fn = MASKS[mask]
+    tile = [[fn(x, y) for x in range(6)] for y in range(12)]
+    rows = []
+    for y in range(g.size):
+        t, dark, func = tile[y % 12], g.dark[y], g.func[y]
+        rows.append("".join("1" if dark[x] != (t[x % 6] and not func[x]) else "0"
+                            for x in range(g.size)))
+    return rows
+
+
+# Rows and columns are scored as "0"/"1" strings: regex and str.find run
+# natively under Brython, a loop over modules does not.
+_RUN = re.compile(r"0{5,}|1{5,}")
+_FINDER_LIKE = ("10111010000", "00001011101")
+
+
+def _count(line, pattern):
+    n = 0
+    i = line.find(pattern)
+    while i >= 0:
+        n += 1
+        i = line.find(pattern, i + 1)
+    return n
+
+
+def _penalty(rows):
+    cols = ["".join(col) for col in zip(*rows)]
+    score = 0
+    for line in rows + cols:
+        score += sum(len(r) - 2 for r in _RUN.findall(line))
+        score += 40 * (_count(line, _FINDER_LIKE[0]) + _count(line, _FINDER_LIKE[1]))
+    # 2x2 blocks: two equal horizontal neighbours in both rows, same colour
+    for upper, lower in zip(rows, rows[1:]):
+        for x in range(len(upper) - 1):
+            c = upper[x]
+            if c == upper[x + 1] == lower[x] == lower[x + 1]:
+                score += 3
+    size = len(rows)
+    dark = sum(row.count("1") for row in rows)
+    total = size * size
+    score += abs(dark * 20 - total * 10) // total * 10
+    return score
+
+
+def encode(text, level="M"):
+    """Module matrix (list of rows of bools, True = dark) for `text`."""
+    data = text.encode("utf-8")
+    for ver in range(1, 41):
+        header = 4 + (8 if ver < 10 else 16)
+        if header + 8 * len(data) <= _data_codewords(ver, level) * 8:
+            break
+    else:
+        raise ValueError("text too long for a QR code")
+    g = _Grid(ver)
+    _function_patterns(g, ver)
+    _place(g, _codewords(data, ver, level))
+    best = None
+    for mask in range(8):
+        _format_bits(g, level, mask)
+        rows = _masked(g, mask)
+        score = _penalty(rows)
+        if best is None or score < best[0]:
+            best = (score, rows)
+    return [[c == "1" for c in row] for row in best[1]]
+
+
+def svg(matrix, border=4):
+    """Standalone SVG document: one path, one unit per module."""
+    n = len(matrix) + 2 * border
+    path = "".join(f"M{x + border},{y + border}h1v1h-1z"
+                   for y, row in enumerate(matrix) for x, dark in enumerate(row) if dark)
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {n} {n}" shape-rendering="crispEdges">'
+            f'<rect width="{n}" height="{n}" fill="#fff"/><path d="{path}" fill="#000"/></svg>')
@@ -0,0 +1,270 @@
+"""Perzistencia stavu hry.
+
+No `browser` import: the storage backend is passed in (window.localStorage
+in Brython, any object with getItem/setItem/removeItem on CPython).
+
+Layout in storage:
+    <key>                 snapshot: the full state dict, with "_epoch"
+                          (compact encoding, codec.py)
+    <key>:ev:<epoch>:<i>  journal: i-th event (engine.apply_event) since
+                          the snapshot of that epoch
+A journal record is one event or a list of events. Phase changes (and
+every COMPACT_EVERY records) write a new snapshot with a new epoch and drop
+the old journal, so a half-finished compaction never replays stale events.
+
+GameIndex keeps several games (slots) side by side: slot "0" is the bare
+<key> (saves from before the slots), slot s lives under <key>#<s>, and the
+small record <key>:index lists them for the resume screen without parsing
+any state.
+
+Writes are deferred: save()/apply() change the live state and mark it
+dirty, flush() writes what one interaction changed (a snapshot, or the
+new events as one record) and the `schedule` hook decides when. The app
+flushes in a microtask after each handler and synchronously when the page
+is hidden; without a hook every change is flushed at once.
+
+The snapshot's LZW pass (codec.repack) can run elsewhere: with a `pack`
+hook flush() writes the unpacked snapshot at once and hands it to the
+hook, whose result replaces it only if the key still holds that text.
+"""
+import json
+
+import codec
+import engine
+
+COMPACT_EVERY = 64
+
+
+class StateStore:
+    """Live game state kept in memory and written back to storage.
+
+    The stored JSON is parsed once; later load() calls return the same
+    object. Call invalidate() when another tab changes the key (the
+    `storage` event), the next load() then re-reads it.
+    """
+
+    def __init__(self, storage, key, schedule=None, on_snapshot=None, pack=None):
+        self.storage = storage
+        self.key = key
+        self.schedule = schedule   # schedule(flush), called once per dirty batch
+        self.on_snapshot = on_snapshot   # on_snapshot(json dict) after a snapshot write
+        self.pack = pack           # pack(raw, done): done(codec.repack(raw)) later
+        self._state = None
+        self._loaded = False
+        self._epoch = 0
+        self._count = 0
+        self._snapshot = False     # a snapshot is due
+        self._pending = []         # events since the last flush
+        self._scheduled = False
+
+    def _ev_key(self, epoch, i):
+        return f"{self.key}:ev:{epoch}:{i}"
+
+    def _drop_journal(self, epoch, start=0):
+        i = start
+        while self.storage.getItem(self._ev_key(epoch, i)) is not None:
+            self.storage.removeItem(self._ev_key(epoch, i))
+            i += 1
+
+    def _read(self):
+        self._epoch = 0
+        self._count = 0
+        raw = self.storage.getItem(self.key)
+        if not raw:
+            return None
+        try:
+            state = engine.state_from_json(codec.decode(raw))
+        except Exception:
+            return None
+        self._epoch = state.get("_epoch", 0)
+        # replay the journal written since the snapshot (crash recovery)
+        while True:
+            raw_ev = self.storage.getItem(self._ev_key(self._epoch, self._count))
+            if raw_ev is None:
+                break
+            try:
+                rec = json.loads(raw_ev)
+                for ev in rec if isinstance(rec, list) else [rec]:
+                    engine.apply_event(state, ev)
+            except Exception:
+                # torn/unknown record: keep what replayed cleanly
+                self._drop_journal(self._epoch, self._count)
+                break
+            self._count += 1
+        # leftovers of an interrupted compaction
+        self._drop_journal(self._epoch - 1)
+        return state
+
+    def load(self):
+        if not self._loaded:
+            self._state = self._read()
+            self._loaded = True
+        return self._state
+
+    def _dirty(self):
+        if self.schedule is None:
+            self.flush()
+        elif not self._scheduled:
+            self._scheduled = True
+            self.schedule(self.flush)
+
+    def save(self, state):
+        """Make `state` the live state; the next flush writes a full
+        snapshot (compaction) and starts a new journal."""
+        self.load()
+        self._state = state
+        self._snapshot = True
+        self._pending = []         # the snapshot contains them
+        self._dirty()
+
+    def apply(self, ev, hold=False):
+        """Apply one engine event to the live state and journal it.
+        Returns the engine result (e.g. the Katányi verdict of a pick).
+
+        hold=True keeps the event pending until the next change is flushed
+        (or flush() is called): a pick is written together with the step
+        that ends the turn. Lost only if the page dies without a hide
+        event, and then the turn is replayed from its gate anyway."""
+        state = self.load()
+        phase = state["phase"]
+        res = engine.apply_event(state, ev)
+        if state["phase"] != phase or self._count >= COMPACT_EVERY:
+            self.save(state)
+        else:
+            if not self._snapshot:
+                self._pending.append(ev)
+            if not hold:
+                self._dirty()
+        return res
+
+    def flush(self):
+        """Write the deferred changes (one setItem, plus the removal of the
+        old journal after a snapshot)."""
+        self._scheduled = False
+        if self._snapshot:
+            self._snapshot = False
+            state = self._state
+            old_epoch, old_count = self._epoch, self._count
+            self._epoch = max(old_epoch, state.get("_epoch", 0)) + 1
+            self._count = 0
+            state["_epoch"] = self._epoch
+            data = engine.state_to_json(state)
+            raw = codec.encode(data, compress=self.pack is None)
+            self.storage.setItem(self.key, raw)
+            if self.pack is not None:
+                self.pack(raw, lambda packed: self._packed(raw, packed))
+            for i in range(old_count):
+                self.storage.removeItem(self._ev_key(old_epoch, i))
+            if self.on_snapshot is not None:
+                self.on_snapshot(data)
+        elif self._pending:
+            rec = self._pending[0] if len(self._pending) == 1 else self._pending
+            self.storage.setItem(self._ev_key(self._epoch, self._count), json.dumps(rec))
+            self._count += 1
+        self._pending = []
+
+    def _packed(self, raw, packed):
+        # a later snapshot, clear() or another tab may have replaced it
+        if packed != raw and self.storage.getItem(self.key) == raw:
+            self.storage.setItem(self.key, packed)
+
+    def clear(self):
+        self.load()
+        self._snapshot = False
+        self._pending = []
+        self._drop_journal(self._epoch)
+        self._state = None
+        self._loaded = True
+        self._epoch = 0
+        self._count = 0
+        self.storage.removeItem(self.key)
+
+    def invalidate(self):
+        # another tab wrote the key: its state wins over unflushed changes
+        self._snapshot = False
+        self._pending = []
+        self._state = None
+        self._loaded = False
+
+
+def names_hash(names):
+    """The same table across its games."""
+    return engine.fnv1a("\n".join(names))
+
+
+class GameIndex:
+    """Saved games and the index record listing them.
+
+    {"active": slot, "games": {slot: {"names": names_hash, "label",
+    "n", "day", "phase", "t": last update (ms)}}}
+
+    The entry of a slot is refreshed with each snapshot of its game
+    (StateStore.on_snapshot), journal appends do not touch the index.
+    """
+    LABEL_NAMES = 3
+
+    def __init__(self, storage, key):
+        self.storage = storage
+        self.key = key
+        self.index_key = f"{key}:index"
+        self._data = None
+
+    def _read(self):
+        if self._data is None:
+            try:
+                data = json.loads(self.storage.getItem(self.index_key) or "null")
+            except Exception:
+                data = None
+            if not isinstance(data, dict):
+                data = {}
+            data.setdefault("active", "0")
+            data.setdefault("games", {})
+            self._data = data
+        return self._data
+
+    def _write(self):
+        self.storage.setItem(self.index_key, json.dumps(self._data))
+
+    def slot_key(self, slot):
+        return self.key if slot == "0" else f"{self.key}#{slot}"
+
+    @property
+    def active(self):
+        return self._read()["active"]
+
+    def set_active(self, slot):
+        if self._read()["active"] != slot:
+            self._data["active"] = slot
+            self._write()
+
+    def games(self):
+        """[(slot, entry)], most recently updated first."""
+        return sorted(self._read()["games"].items(), key=lambda kv: -kv[1].get("t", 0))
+
+    def entry(self, slot):
+        return self._read()["games"].get(slot)
+
+    def new_slot(self):
+        """An unused slot id (not stored until its first snapshot)."""
+        used = set(self._read()["games"]) | {self._data["active"]}
+        i = 1
+        while str(i) in used:
+            i += 1
+        return str(i)
+
+    def update(self, slot, data, now):
+        """Refresh the entry of `slot` from a state_to_json dict."""
+        names = [p["name"] for p in data["players"]]
+        label = ", ".join(names[:self.LABEL_NAMES]) + (", …" if len(names) > self.LABEL_NAMES else "")
+        self._read()["games"][slot] = {
+            "names": names_hash(names), "label": label, "n": len(names),
+            "day": data.get("day", 1), "phase": data.get("phase", "setup"), "t": now,
+        }
+        self._write()
+
+    def remove(self, slot):
+        if self._read()["games"].pop(slot, None) is not None:
+            self._write()
+
+    def invalidate(self):
+        self._data = None
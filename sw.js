@@ -1,10 +1,26 @@
-const CACHE = "palermo-osud-brython-v1.7";
+const CACHE = "palermo-osud-brython-v1.33";
+// compiled-module cache of boot.js, dropped with every new CACHE version
+const MODULE_DB = "palermo-osud-modules";
 const ASSETS = [
   "./",
   "./index.html",
   "./styles.css",
+  "./boot.js",
+  "./worker.js",
   "./app.py",
-  "./facts_chobotnica.json",
+  "./engine.py",
+  "./store.py",
+  "./dom.py",
+  "./facts.py",
+  "./timers.py",
+  "./qr.py",
+  "./codec.py",
+  "./history.py",
+  "./tasks.py",
+  "./worker.py",
+  "./perf.py",
+  "./facts/manifest.json",
+  "./balance.json",
   "./manifest.json",
   "./assets/logo.svg",
   "./assets/icon-192.png",
@@ -33,11 +49,17 @@ self.addEventListener("activate", (evt) => {
   evt.waitUntil((async () => {
     const keys = await caches.keys();
     await Promise.all(keys.filter(k => k !== CACHE).map(k => caches.delete(k)));
+    await new Promise((done) => {
+      const req = indexedDB.deleteDatabase(MODULE_DB);
+      req.onsuccess = req.onerror = req.onblocked = () => done();
+    });
     await self.clients.claim();
   })());
 });
 
 self.addEventListener("fetch", (evt) => {
+  // the game host API (tools/host.py) is live data: never cached
+  if (evt.request.url.startsWith(new URL("api/", self.registration.scope).href)) return;
   evt.respondWith((async () => {
     const cache = await caches.open(CACHE);
     const cached = await cache.match(evt.request, {ignoreVary:true});
@@ -45,7 +67,7 @@ self.addEventListener("fetch", (evt) => {
 
     try {
       const res = await fetch(evt.request);
-      // Cache same-origin GETs
+      // Cache same-origin GETs (fact packs land here on first use)
       if (evt.request.method === "GET" && new URL(evt.request.url).origin === self.location.origin) {
         cache.put(evt.request, res.clone());
       }
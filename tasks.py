@@ -0,0 +1,93 @@
+"""Úlohy na pozadí: pomalé výpočty vo Web Workeri (worker.js, worker.py).
+
+run(task, arg, done) sends the task to the worker and calls done(result)
+when it answers, so a snapshot's LZW pass or a QR code never blocks a
+tap. The worker boots its own Brython after the first screen (start());
+tasks sent before it is ready wait for it. Without Worker support, or
+when the worker fails or is not up within READY_MS, the same
+worker.handle() runs on the page in a timeout, after the current handler.
+
+done() is called only for a result; errors are logged.
+"""
+import json
+
+from browser import document, window
+
+import perf
+import timers
+import worker
+
+READY_MS = 30000
+
+_worker = [None]    # the Worker while it is usable
+_ready = [False]
+_failed = [False]
+_seq = [0]
+_waiting = {}       # request id -> (message, done, perf span)
+
+
+def _scripts():
+    """Brython scripts of this page (CDN, or dist/'s bundle) for the worker."""
+    return [s.src for s in document.select("script[src]") if "brython" in s.src.split("/")[-1]]
+
+
+def start():
+    if _worker[0] is not None or _failed[0]:
+        return
+    try:
+        w = window.Worker.new("worker.js")
+    except Exception:
+        _fail()
+        return
+    _worker[0] = w
+    w.onmessage = lambda ev: _answer(ev.data)
+    w.onerror = lambda ev: _fail()
+    w.postMessage(json.dumps({"scripts": _scripts()}))
+
+    def late():
+        if not _ready[0]:
+            _fail()
+    timers.after(READY_MS, late, screen=False)
+
+
+def _fail():
+    if _worker[0] is not None:
+        _worker[0].terminate()
+        _worker[0] = None
+    _ready[0] = False
+    _failed[0] = True
+    for mid in sorted(_waiting, key=int):
+        _local(mid)
+
+
+def _local(mid):
+    msg = _waiting[mid][0]
+    timers.after(0, lambda: _answer(worker.handle(msg)), screen=False)
+
+
+def _answer(reply):
+    mid, status, result = reply.split("|", 2)
+    if mid == "0":
+        _ready[0] = True
+        for m in sorted(_waiting, key=int):
+            _worker[0].postMessage(_waiting[m][0])
+        return
+    entry = _waiting.pop(mid, None)
+    if entry is None:
+        return
+    entry[2]({"bytes": 2 * len(result)})
+    if status == "ok":
+        entry[1](result)
+    else:
+        window.console.warn("tasks.py: " + result)
+
+
+def run(task, arg, done):
+    """done(result) of worker.TASKS[task](arg), later."""
+    _seq[0] += 1
+    mid = str(_seq[0])
+    _waiting[mid] = (mid + "|" + task + "|" + arg, done, perf.start(task, "worker"))
+    if _ready[0]:
+        _worker[0].postMessage(_waiting[mid][0])
+    elif _worker[0] is None:
+        _local(mid)
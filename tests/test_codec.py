@@ -0,0 +1,71 @@
+"""codec.py snapshot encoding and LZW packing, round trips."""
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import codec  # noqa: E402
+import engine  # noqa: E402
+
+NAMES = ["Ana", "Boris", "Cyril", "Dana", "Eva", "Fero", "Gabika", "Ľubo"]
+
+
+def app_state(settings=None, seed=7):
+    state = engine.new_game(NAMES, "1234", 2, dict(settings or engine.DEFAULTS), random.Random(seed))
+    return dict(engine.state_to_json(state), _epoch=3)   # store.py's snapshots carry their epoch
+
+
+def played_state():
+    state = engine.state_from_json(app_state())
+    engine.start_night(state)
+    state["night"]["mafia_votes"] = {1: 3}
+    state["night"]["citizen_dummy"] = {0: 2, 4: 5}
+    state["last"]["night_dead"] = 3
+    state["players"][3].alive = False
+    return dict(engine.state_to_json(state), _epoch=3)
+
+
+def test_pack_round_trip():
+    rng = random.Random(1)
+    samples = [b"", b"a", b"abababababababab" * 50, "Ľubo žije, Šimon nie.".encode("utf-8") * 40,
+               bytes(rng.randrange(256) for _ in range(5000)),
+               bytes(rng.choice(b"ab ") for _ in range(200000))]   # fills the 15-bit dictionary
+    for data in samples:
+        packed = codec.pack(data)
+        assert all(ord(c) < 0xD800 for c in packed)
+        assert codec.unpack(packed) == data
+
+
+def test_encode_decode_round_trip():
+    for data in (app_state(), played_state(), app_state(dict(engine.DEFAULTS, include_doctor=True,
+                                                            parallel_night=True, unlock_mode="pin"))):
+        data = json.loads(json.dumps(data))
+        for compress in (True, False):
+            raw = codec.encode(data, compress)
+            assert raw[0] in "zj" and raw[1:].startswith(f"{codec.VERSION}|{data['phase']}|{data['day']}|")
+            assert codec.decode(raw) == data
+        assert codec.decode(codec.repack(codec.encode(data, False))) == data
+
+
+def test_unknown_keys_and_old_snapshots_survive():
+    data = app_state()
+    data["host"] = {"url": "http://10.0.0.2:8000/", "table": "t", "seats": {"0": "s"}}
+    data["gid"] = "abc"
+    assert codec.decode(codec.encode(data)) == data
+    assert codec.decode(json.dumps(data)) == data
+
+
+def test_settings_are_diffed_against_the_frozen_profile(monkeypatch):
+    data = app_state(codec.PROFILE)
+    raw = codec.encode(data, compress=False)
+    monkeypatch.setitem(engine.DEFAULTS, "mask_citizens", False)
+    monkeypatch.setitem(engine.DEFAULTS, "new_setting", 1)
+    assert codec.encode(data, compress=False) == raw
+    assert codec.decode(raw)["settings"] == codec.PROFILE
+
+    settings = dict(codec.PROFILE)
+    del settings["facts_enabled"]
+    data = app_state(settings)
+    assert codec.decode(codec.encode(data))["settings"] == settings
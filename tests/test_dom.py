@@ -0,0 +1,117 @@
+"""dom.py against a minimal fake DOM (dom.py has no `browser` import)."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dom  # noqa: E402
+
+
+class Event:
+    def __init__(self, type_, target):
+        self.type = type_
+        self.target = target
+        self.currentTarget = target
+
+
+class Node:
+    def __init__(self, tag, *kids, text=""):
+        self.tagName = tag
+        self.attrs = {}
+        self.text = text
+        self.children = []
+        self.parentNode = None
+        self.listeners = {}
+        for kid in kids:
+            self.insertBefore(kid, None)
+
+    @property
+    def childNodes(self):
+        return self.children
+
+    def bind(self, evt, fn):
+        self.listeners.setdefault(evt, []).append(fn)
+
+    def insertBefore(self, node, ref):
+        if node.parentNode is not None:
+            node.parentNode.children.remove(node)
+        node.parentNode = self
+        self.children.insert(self.children.index(ref) if ref is not None else len(self.children), node)
+
+    def replaceChild(self, new, old):
+        self.insertBefore(new, old)
+        old.remove()
+
+    def remove(self):
+        self.parentNode.children.remove(self)
+        self.parentNode = None
+
+    def clear(self):
+        for kid in list(self.children):
+            kid.remove()
+
+    def isSameNode(self, other):
+        return self is other
+
+    def isEqualNode(self, other):
+        return (self.tagName == other.tagName and self.attrs == other.attrs and self.text == other.text
+                and len(self.children) == len(other.children)
+                and all(a.isEqualNode(b) for a, b in zip(self.children, other.children)))
+
+    def select(self, css):
+        assert css == "[data-hid]"
+        out = []
+        for kid in self.children:
+            if "data-hid" in kid.attrs:
+                out.append(kid)
+            out.extend(kid.select(css))
+        return out
+
+    def click(self):
+        for fn in self.listeners.get("click", []):
+            fn(Event("click", self))
+
+
+def test_handler_of_tree_built_before_the_gate_survives_its_mount():
+    # night_turn_screen: the action card is built with the pass gate and
+    # shown by unlock(), one mount later
+    app = Node("DIV")
+    picked = []
+    button = Node("BUTTON", text="Vyber")
+    dom.on(button, "click", lambda ev: picked.append(1))
+    action = Node("DIV", button)
+
+    unlock = Node("BUTTON", text="Odomknúť")
+    dom.on(unlock, "click", lambda ev: dom.mount(app, action))
+    dom.mount(app, Node("DIV", unlock))
+
+    app.children[0].children[0].click()
+    assert app.children[0].children[0].text == "Vyber"
+    app.children[0].children[0].click()
+    assert picked == [1]
+
+
+def test_reused_node_dispatches_to_the_new_handler():
+    app = Node("DIV")
+    calls = []
+    first = Node("BUTTON", text="Ďalej")
+    dom.on(first, "click", lambda ev: calls.append("old"))
+    dom.mount(app, first)
+    second = Node("BUTTON", text="Ďalej")
+    dom.on(second, "click", lambda ev: calls.append("new"))
+    dom.mount(app, second)
+
+    live = app.children[0]
+    assert live is first
+    live.click()
+    assert calls == ["new"]
+
+
+def test_unshown_tree_is_dropped_after_one_more_mount():
+    app = Node("DIV")
+    stale = Node("BUTTON")
+    dom.on(stale, "click", lambda ev: None)
+    dom.mount(app, Node("P"))
+    dom.mount(app, Node("P"))
+    hid = stale.attrs["data-hid"]
+    assert hid not in dom._handlers and hid not in dom._parked and hid not in dom._pending
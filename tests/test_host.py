@@ -0,0 +1,202 @@
+"""tools/host.py request handling, without a socket (respond())."""
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import engine  # noqa: E402
+import tools.host as host_module  # noqa: E402
+from tools.host import Host, respond  # noqa: E402
+
+NAMES = ["Ana", "Boris", "Cyril", "Dana", "Eva", "Fero"]
+
+
+def call(host, method, path, obj=None, raw=None):
+    if raw is None:
+        raw = json.dumps(obj).encode("utf-8") if obj is not None else b""
+    status, ctype, payload = respond(host, method, path, raw)
+    return status, json.loads(payload)
+
+
+def app_state():
+    state = engine.new_game(NAMES, "1234", 2, dict(engine.DEFAULTS), random.Random(7))
+    return engine.state_to_json(state)
+
+
+def test_mirrored_table_accepts_the_app_state():
+    host = Host()
+    status, out = call(host, "POST", "/api/tables", {"state": app_state()})
+    assert status == 200 and len(out["seats"]) == len(NAMES)
+    assert call(host, "GET", f"/api/tables/{out['table']}")[0] == 200
+
+
+def test_structurally_invalid_state_is_refused():
+    host = Host()
+    broken = []
+    for key in ("phase", "day", "settings", "night", "last", "osud", "step_index"):
+        state = app_state()
+        del state[key]
+        broken.append(state)
+    state = app_state()
+    state["night"] = {}
+    broken.append(state)
+    state = app_state()
+    state["players"][0]["id"] = [0]
+    broken.append(state)
+    broken += [{"players": []}, [], "x", None]
+    for state in broken:
+        assert call(host, "POST", "/api/tables", {"state": state}) == (400, {"error": "invalid state"})
+    assert not host.tables
+
+
+def hosted_game(host):
+    status, out = call(host, "POST", "/api/games", {"names": NAMES, "seed": 3})
+    assert status == 200
+    return out
+
+
+def test_wrong_json_types_are_client_errors():
+    host = Host()
+    for body in ({"names": NAMES, "seed": {}}, {"names": NAMES, "seed": [1]}, {"names": "Ana"},
+                 {"names": NAMES, "settings": []}, {"names": NAMES, "mafia": [2]}):
+        status, out = call(host, "POST", "/api/games", body)
+        assert status == 400, (body, out)
+    game = hosted_game(host)
+    act = f"/api/tables/{game['table']}/act"
+    seq = 0
+    for _ in NAMES:
+        assert call(host, "POST", act, {"seq": seq, "ev": {"t": "step"}})[0] == 200
+        seq += 1
+    for ev in ({"t": "pick", "v": 0, "x": [1]}, {"t": "pick", "v": 0, "x": {"a": 1}},
+               {"t": "pick", "v": [0], "x": 1}, {"t": "pick", "v": {}, "x": 1}):
+        status, out = call(host, "POST", act, {"seq": seq, "ev": ev})
+        assert status == 400, (ev, out)
+    token = next(iter(game["seats"].values()))
+    assert call(host, "POST", f"/api/seat/{token}/pick", {"x": [1]})[0] == 400
+
+
+def test_judge_with_a_wrong_target_type():
+    host = Host()
+    game = hosted_game(host)
+    table = host.tables[game["table"]]
+    engine.goto(table.state, "day_admin")
+    for x in ([1], {"x": 1}, "1"):
+        status, out = call(host, "POST", f"/api/tables/{game['table']}/act",
+                           {"seq": table.seq, "ev": {"t": "judge", "x": x}})
+        assert status == 400, (x, out)
+
+
+def test_invalid_json_and_handler_errors():
+    host = Host()
+    assert call(host, "POST", "/api/games", raw=b"{nope") == (400, {"error": "invalid JSON"})
+    assert call(host, "POST", "/api/games", raw=b"[1]") == (400, {"error": "expected a JSON object"})
+
+    def broken(*args):
+        raise ValueError("not from json.loads")
+    host.api = broken
+    assert call(host, "GET", "/api/ping") == (500, {"error": "internal error"})
+
+
+def mirrored_night(host, state):
+    """Register `state` as a mirrored table and start its first night."""
+    status, out = call(host, "POST", "/api/tables", {"state": state})
+    assert status == 200
+    state = engine.state_from_json(state)
+    engine.start_night(state)
+    status, _ = call(host, "POST", f"/api/tables/{out['table']}/night",
+                     {"state": engine.state_to_json(state)})
+    assert status == 200
+    return out["table"], out["seats"], state
+
+
+def pick_all(host, tid, seats, state):
+    """Every living seat picks its first target; the last response."""
+    table = host.tables[tid]
+    for p in engine.alive_players(state):
+        target = table.seat_view(p.id)["targets"][0][0]
+        res = call(host, "POST", f"/api/seat/{seats[str(p.id)]}/pick", {"x": target})
+    return res
+
+
+def test_state_settings_missing_engine_keys_resolve_with_defaults():
+    host = Host()
+    state = app_state()
+    state["settings"]["parallel_night"] = True
+    del state["settings"]["mafia_strict_unanimity"]
+    del state["settings"]["first_dead_osud"]
+    tid, seats, live = mirrored_night(host, state)
+    status, _ = pick_all(host, tid, seats, live)
+    assert status == 200
+    assert host.tables[tid].status()["resolved"]
+
+
+def test_state_with_wrong_setting_types_or_roles_is_refused():
+    host = Host()
+    for change in (lambda s: s["settings"].update(mafia_strict_unanimity="yes"),
+                   lambda s: s["night"].update(mafia_votes=[]),
+                   lambda s: s["night"].update(citizen_dummy=None),
+                   lambda s: s["players"][0].update(role="godfather")):
+        state = app_state()
+        change(state)
+        assert call(host, "POST", "/api/tables", {"state": state}) == (400, {"error": "invalid state"})
+
+
+def test_night_upload_with_other_players_is_refused():
+    host = Host()
+    state = app_state()
+    state["settings"]["parallel_night"] = True
+    tid, seats, live = mirrored_night(host, state)
+    other = engine.state_to_json(live)
+    for i, row in enumerate(other["players"]):
+        row["id"] = 100 + i
+    other["day"] = 2
+    status, _ = call(host, "POST", f"/api/tables/{tid}/night", {"state": other})
+    assert status == 409
+    for token in seats.values():
+        assert call(host, "GET", f"/api/seat/{token}")[0] == 200
+
+
+def test_failed_resolution_rolls_back_the_last_pick(monkeypatch):
+    host = Host()
+    state = app_state()
+    state["settings"]["parallel_night"] = True
+    tid, seats, live = mirrored_night(host, state)
+    table = host.tables[tid]
+
+    def broken(state):
+        raise KeyError("boom")
+    monkeypatch.setattr(engine, "resolve_night", broken)
+    status, _ = pick_all(host, tid, seats, live)
+    assert status == 500
+    assert table.status()["picked"] == len(NAMES) - 1 and not table.resolved
+
+    monkeypatch.undo()
+    last = engine.alive_players(live)[-1]
+    target = table.seat_view(last.id)["targets"][0][0]
+    assert call(host, "POST", f"/api/seat/{seats[str(last.id)]}/pick", {"x": target})[0] == 200
+    assert table.resolved and table.state["phase"] in ("dawn", "end")
+
+
+def test_refused_pick_after_the_night_keeps_it_resolved():
+    host = Host()
+    state = app_state()
+    state["settings"]["parallel_night"] = True
+    tid, seats, live = mirrored_night(host, state)
+    assert pick_all(host, tid, seats, live)[0] == 200
+    assert call(host, "POST", f"/api/seat/{seats['0']}/pick", {"x": 1})[0] == 409
+    assert host.tables[tid].status()["resolved"]
+
+
+def test_snapshots_are_not_served_as_static_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(host_module, "ROOT", str(tmp_path))
+    (tmp_path / "index.html").write_text("<html></html>")
+    data = tmp_path / "host-data"
+    data.mkdir()
+    (data / "t1.json").write_text('{"pin": "1234"}')
+    host = Host(data_dir=str(data))
+    assert respond(host, "GET", "/", b"")[0] == 200
+    for path in ("/host-data/t1.json", "/host-data/../host-data/t1.json", "/host-data%2Ft1.json"):
+        assert respond(host, "GET", path, b"")[0] == 404
+    assert respond(Host(), "GET", "/host-data/t1.json", b"")[0] == 200
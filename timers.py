@@ -0,0 +1,106 @@
+"""Jeden plánovač pre všetky časovače UI.
+
+Every timeout, interval and countdown of the UI goes through here. A timer
+belongs to the current screen unless created with `screen=False` (the
+toast); render() calls clear_screen() before building the next screen, so
+countdowns of screens that were left early stop instead of ticking on
+detached nodes.
+
+One browser timeout is the tick source: it is armed for the nearest
+deadline only and re-armed after each tick, so a long night does not keep
+a set_interval per visited screen alive. (A requestAnimationFrame loop
+would wake 60 times a second for one-second countdowns.)
+"""
+from browser import timer, window
+
+_timers = {}          # id -> [due ms, fn, period ms or None, screen]
+_seq = [0]
+_armed = [None, 0.0]  # browser timeout id, due it is armed for
+_leave = []           # cleanups of the current screen (open event streams)
+
+
+def _now():
+    return window.performance.now()
+
+
+def _arm():
+    if not _timers:
+        if _armed[0] is not None:
+            timer.clear_timeout(_armed[0])
+            _armed[0] = None
+        return
+    due = min(t[0] for t in _timers.values())
+    if _armed[0] is not None:
+        if _armed[1] <= due:
+            return
+        timer.clear_timeout(_armed[0])
+    _armed[0] = timer.set_timeout(_tick, max(0, due - _now()))
+    _armed[1] = due
+
+
+def _tick():
+    _armed[0] = None
+    now = _now()
+    for tid in sorted(_timers, key=lambda k: _timers[k][0]):
+        t = _timers.get(tid)   # an earlier callback may have cancelled it
+        if t is None or t[0] > now:
+            continue
+        if t[2] is None:
+            del _timers[tid]
+        else:
+            t[0] += t[2]
+            if t[0] <= now:    # the page slept: skip the missed ticks
+                t[0] = now + t[2]
+        t[1]()
+    _arm()
+
+
+def _add(ms, fn, period, screen):
+    _seq[0] += 1
+    _timers[_seq[0]] = [_now() + ms, fn, period, screen]
+    _arm()
+    return _seq[0]
+
+
+def after(ms, fn, screen=True):
+    """Call fn() once after `ms`; returns an id for cancel()."""
+    return _add(ms, fn, None, screen)
+
+
+def every(ms, fn, screen=True):
+    return _add(ms, fn, ms, screen)
+
+
+def cancel(tid):
+    if _timers.pop(tid, None) is not None:
+        _arm()
+
+
+def countdown(seconds, on_tick, on_done, screen=True):
+    """on_tick(left) once a second for left = seconds-1 .. 1, then on_done()."""
+    left = [seconds]
+
+    def step():
+        left[0] -= 1
+        if left[0] <= 0:
+            cancel(tid)
+            on_done()
+        else:
+            on_tick(left[0])
+    tid = every(1000, step, screen)
+    return tid
+
+
+def on_leave(fn):
+    """Call fn() when the current screen is left, with its timers."""
+    _leave.append(fn)
+
+
+def clear_screen():
+    """Cancel the timers of the screen being left."""
+    for tid in [k for k, t in _timers.items() if t[3]]:
+        del _timers[tid]
+    _arm()
+    for fn in _leave[:]:
+        fn()
+    del _leave[:]
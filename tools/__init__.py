@@ -0,0 +1 @@
+"""Vývojárske nástroje (CPython), nie sú súčasťou PWA."""
@@ -0,0 +1,168 @@
+"""Exact mafia win probability by memoized dynamic programming.
+
+A game position is (living mafia, living citizens, Katányi alive, Lekár
+alive, strict unanimity). Night kills are enumerated over every possible
+vote tuple and decided by engine.mafia_kill_target, the doctor save and
+the win condition mirror engine.resolve_night / engine.win_check, and the
+day verdict removes one living player. Every cycle removes at least one
+player, so the recursion is a DAG and memoization makes it instant.
+
+Policies:
+  random       every mafioso votes for any living player but himself,
+               the doctor saves anyone, the town convicts anyone
+               (same as RandomPolicy in tools.balance_sim)
+  coordinated  the mafia agrees on one living non-mafia victim, the rest
+               of the table is blind as in `random`
+
+    python -m tools.balance_exact              # print table, write balance.json
+    python -m tools.balance_exact --state 2 5 1 0 strict
+
+balance.json is precomputed so the setup screen only does a dict lookup.
+"""
+import argparse
+import itertools
+import json
+import sys
+from functools import lru_cache
+
+import engine
+
+POLICIES = ("random", "coordinated")
+OUT = "balance.json"
+
+
+def table_key(n, mafia, katanyi, doctor, strict):
+    """Key into balance.json (same format in app.py)."""
+    return f"{n}/{mafia}/{int(katanyi)}{int(doctor)}{int(strict)}"
+
+
+@lru_cache(maxsize=None)
+def kill_distribution(m, c, k, d, strict, policy):
+    """{victim kind: probability} for one night before the doctor acts.
+    Kinds: "mafia", "citizen", "katanyi", "doctor", None (nobody)."""
+    kinds = ["mafia"] * m + ["katanyi"] * k + ["doctor"] * d + ["citizen"] * c
+    n = len(kinds)
+    dist = {}
+    if policy == "coordinated":
+        town = n - m
+        for kind in ("citizen", "katanyi", "doctor"):
+            cnt = kinds.count(kind)
+            if cnt:
+                dist[kind] = cnt / town
+        return dist
+    choices = [[t for t in range(n) if t != voter] for voter in range(m)]
+    p = 1.0
+    for ch in choices:
+        p /= len(ch)
+    for votes in itertools.product(*choices):
+        victim = engine.mafia_kill_target(list(votes), strict)
+        kind = kinds[victim] if victim is not None else None
+        dist[kind] = dist.get(kind, 0.0) + p
+    return dist
+
+
+def _remove(m, c, k, d, kind):
+    if kind == "mafia":
+        return m - 1, c, k, d
+    if kind == "citizen":
+        return m, c - 1, k, d
+    if kind == "katanyi":
+        return m, c, 0, d
+    if kind == "doctor":
+        return m, c, k, 0
+    return m, c, k, d
+
+
+def _over(m, c, k, d):
+    """engine.win_check on counts: 1.0 mafia, 0.0 town, None running."""
+    others = c + k + d
+    if m <= 0:
+        return 0.0
+    if m >= others:
+        return 1.0
+    return None
+
+
+@lru_cache(maxsize=None)
+def night(m, c, k, d, strict, policy="random"):
+    """P(mafia wins) from the start of a night."""
+    done = _over(m, c, k, d)
+    if done is not None:
+        return done
+    n = m + c + k + d
+    total = 0.0
+    for kind, p in kill_distribution(m, c, k, d, strict, policy).items():
+        if kind is not None and d:
+            # doctor saves a uniformly chosen living player (self included)
+            total += p / n * _after_night(m, c, k, d, strict, policy)
+            p *= 1 - 1 / n
+        total += p * _after_night(*_remove(m, c, k, d, kind), strict, policy)
+    return total
+
+
+def _after_night(m, c, k, d, strict, policy):
+    done = _over(m, c, k, d)
+    if done is not None:
+        return done
+    return day(m, c, k, d, strict, policy)
+
+
+@lru_cache(maxsize=None)
+def day(m, c, k, d, strict, policy="random"):
+    """P(mafia wins) from the day verdict (town convicts a random living player)."""
+    n = m + c + k + d
+    total = 0.0
+    for kind, cnt in (("mafia", m), ("citizen", c), ("katanyi", k), ("doctor", d)):
+        if cnt:
+            nxt = _remove(m, c, k, d, kind)
+            done = _over(*nxt)
+            total += cnt / n * (done if done is not None else night(*nxt, strict, policy))
+    return total
+
+
+def game(n, mafia, katanyi, doctor, strict, policy="random"):
+    """P(mafia wins) of a fresh game as dealt by engine.new_game."""
+    c = n - mafia - int(katanyi) - int(doctor)
+    return night(mafia, c, int(katanyi), int(doctor), bool(strict), policy)
+
+
+def build_table():
+    table = {}
+    for n in range(engine.MIN_PLAYERS, engine.MAX_PLAYERS + 1):
+        for m in range(1, (n - 1) // 2 + 1):
+            for kat, doc, strict in itertools.product((True, False), repeat=3):
+                if m + kat + doc > n:
+                    continue
+                table[table_key(n, m, kat, doc, strict)] = [
+                    round(game(n, m, kat, doc, strict, pol), 4) for pol in POLICIES
+                ]
+    return {"version": 1, "policies": list(POLICIES), "table": table}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Palermo – Osud: exact mafia win probability")
+    ap.add_argument("--state", nargs=5, metavar=("MAFIA", "CITIZENS", "KATANYI", "DOCTOR", "RULE"),
+                    help="single position, RULE = strict|plurality")
+    ap.add_argument("--policy", choices=POLICIES, default="random")
+    ap.add_argument("-o", "--out", default=OUT, help="table file for the setup screen")
+    args = ap.parse_args(argv)
+
+    if args.state:
+        m, c, k, d = (int(x) for x in args.state[:4])
+        p = night(m, c, min(k, 1), min(d, 1), args.state[4] == "strict", args.policy)
+        print(f"{p:.6f}")
+        return 0
+
+    data = build_table()
+    for key, (p_rand, p_coord) in data["table"].items():
+        n, m, flags = key.split("/")
+        allowed = "*" if int(m) in engine.allowed_mafia_counts(int(n)) else " "
+        print(f"{key:>10}{allowed} random {100 * p_rand:5.1f} %   coordinated {100 * p_coord:5.1f} %")
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"))
+    print(f"{len(data['table'])} pozícií -> {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
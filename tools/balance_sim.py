@@ -0,0 +1,302 @@
+"""Monte Carlo balance simulator (CPython + NumPy, not shipped to the phone).
+
+Simulates whole games in batches: every array row is one game, every column
+one player. Night and day resolution follow engine.resolve_night /
+engine.win_check; `--verify` replays a config through the engine itself and
+prints both win rates side by side.
+
+    python -m tools.balance_sim                  # full sweep, 5-12 players
+    python -m tools.balance_sim -n 9 -g 1000000  # one table size
+    python -m tools.balance_sim --policy heuristic --json balance_sim.json
+
+Roles are placed at fixed columns (mafia first, then Katányi, then Lekár).
+All policies pick targets uniformly among eligible players, so the layout
+does not bias results and no per-game role shuffle is needed.
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import engine
+
+MAX_DAYS = 40   # safety cap; games still running are reported as "unfinished"
+NOBODY = -1
+
+
+class Batch:
+    """G games of one configuration advanced in lock-step."""
+
+    def __init__(self, games, n, mafia, katanyi, doctor, strict):
+        self.n = n
+        self.m = mafia
+        self.strict = strict
+        self.katanyi = mafia if katanyi else None
+        self.doctor = mafia + int(katanyi) if doctor else None
+        self.alive = np.ones((games, n), dtype=bool)
+        # Katányi's notebook: 0 unknown, 1 checked citizen, 2 checked mafia
+        self.known = np.zeros((games, n), dtype=np.int8)
+        self.running = np.ones(games, dtype=bool)
+        self.winner = np.zeros(games, dtype=np.int8)  # 0 running, 1 mafia, 2 obcan
+        self.days = np.zeros(games, dtype=np.int16)
+        self.is_mafia = np.zeros(n, dtype=bool)
+        self.is_mafia[:mafia] = True
+
+    def role_alive(self, col):
+        if col is None:
+            return np.zeros(len(self.alive), dtype=bool)
+        return self.alive[:, col]
+
+    def mafia_alive(self):
+        return self.alive[:, :self.m]
+
+
+def pick_uniform(rng, eligible):
+    """Uniform column among eligible ones per row; NOBODY where none is eligible."""
+    keys = rng.random(eligible.shape)
+    keys[~eligible] = -1.0
+    out = keys.argmax(axis=1)
+    out[~eligible.any(axis=1)] = NOBODY
+    return out
+
+
+def _not_self(b, col):
+    el = b.alive.copy()
+    el[:, col] = False
+    return el
+
+
+# -------- Voter policies --------
+class RandomPolicy:
+    """Everybody picks blindly: each mafioso votes for any living player but
+    himself, the town convicts a random living player."""
+    name = "random"
+
+    def mafia_votes(self, b, rng):
+        return np.stack([pick_uniform(rng, _not_self(b, i)) for i in range(b.m)], axis=1)
+
+    def katanyi_check(self, b, rng):
+        return pick_uniform(rng, _not_self(b, b.katanyi))
+
+    def doctor_save(self, b, rng):
+        return pick_uniform(rng, b.alive)
+
+    def day_verdict(self, b, rng):
+        return pick_uniform(rng, b.alive)
+
+
+class HeuristicPolicy(RandomPolicy):
+    """Coordinated mafia and an outspoken Katányi: mafiosi agree on one living
+    non-mafia victim, Katányi checks players he has not checked yet and the
+    town convicts a mafioso he found (otherwise anyone not cleared by him)."""
+    name = "heuristic"
+
+    def mafia_votes(self, b, rng):
+        target = pick_uniform(rng, b.alive & ~b.is_mafia)
+        return np.repeat(target[:, None], b.m, axis=1)
+
+    def katanyi_check(self, b, rng):
+        el = _not_self(b, b.katanyi) & (b.known == 0)
+        out = pick_uniform(rng, el)
+        fallback = out == NOBODY
+        if fallback.any():
+            out[fallback] = pick_uniform(rng, _not_self(b, b.katanyi)[fallback])
+        return out
+
+    def day_verdict(self, b, rng):
+        kat = b.role_alive(b.katanyi)[:, None]
+        found = b.alive & (b.known == 2) & kat
+        suspects = b.alive & ~((b.known == 1) & kat)
+        out = pick_uniform(rng, suspects)
+        has_found = found.any(axis=1)
+        out[has_found] = pick_uniform(rng, found[has_found])
+        return out
+
+
+POLICIES = {p.name: p for p in (RandomPolicy, HeuristicPolicy)}
+
+
+# -------- Resolution (vectorized engine.resolve_night / win_check) --------
+def mafia_kill(b, votes):
+    """Victim per game, NOBODY when the votes do not produce a kill."""
+    living = b.mafia_alive()
+    big = b.n + 1
+    if b.strict:
+        cand = living
+    else:
+        # plurality: a living vote counts if no other target got more votes
+        same = (votes[:, :, None] == votes[:, None, :]) & living[:, None, :]
+        counts = np.where(living, same.sum(axis=2), 0)
+        cand = living & (counts == counts.max(axis=1, keepdims=True))
+    lo = np.where(cand, votes, big).min(axis=1)
+    hi = np.where(cand, votes, -1).max(axis=1)
+    # strict: every living vote equal; plurality: a single top target
+    return np.where(cand.any(axis=1) & (lo == hi), lo, NOBODY)
+
+
+def kill(b, target, mask):
+    rows = np.nonzero(mask & (target != NOBODY))[0]
+    b.alive[rows, target[rows]] = False
+
+
+def win_check(b):
+    mafia = b.mafia_alive().sum(axis=1)
+    others = b.alive.sum(axis=1) - mafia
+    town = b.running & (mafia <= 0)
+    mob = b.running & ~town & (mafia >= others)
+    b.winner[town] = 2
+    b.winner[mob] = 1
+    b.running &= ~(town | mob)
+
+
+def play(b, policy, rng):
+    rows = np.arange(len(b.alive))
+    for _ in range(MAX_DAYS):
+        if not b.running.any():
+            break
+        # night
+        target = mafia_kill(b, policy.mafia_votes(b, rng))
+        if b.katanyi is not None:
+            kat = b.running & b.role_alive(b.katanyi)
+            checked = policy.katanyi_check(b, rng)
+            hit = kat & (checked != NOBODY)
+            b.known[rows[hit], checked[hit]] = np.where(b.is_mafia[checked[hit]], 2, 1)
+        if b.doctor is not None:
+            saved = policy.doctor_save(b, rng)
+            target = np.where(b.role_alive(b.doctor) & (saved == target), NOBODY, target)
+        kill(b, target, b.running)
+        win_check(b)
+        # day
+        kill(b, policy.day_verdict(b, rng), b.running)
+        b.days[b.running] += 1
+        win_check(b)
+
+
+def simulate(config):
+    """Worker entry point: one configuration -> win counts."""
+    n, mafia, katanyi, doctor, strict, policy, games, seed, chunk = config
+    rng = np.random.default_rng(seed)
+    pol = POLICIES[policy]()
+    mafia_w = town_w = unfinished = 0
+    day_sum = 0
+    left = games
+    while left > 0:
+        g = min(chunk, left)
+        b = Batch(g, n, mafia, katanyi, doctor, strict)
+        play(b, pol, rng)
+        mafia_w += int((b.winner == 1).sum())
+        town_w += int((b.winner == 2).sum())
+        unfinished += int((b.winner == 0).sum())
+        day_sum += int(b.days.sum())
+        left -= g
+    return {
+        "players": n, "mafia": mafia, "include_katanyi": katanyi,
+        "include_doctor": doctor, "mafia_strict_unanimity": strict,
+        "policy": policy, "games": games,
+        "mafia_win": mafia_w / games, "obcan_win": town_w / games,
+        "unfinished": unfinished / games, "avg_days": day_sum / games,
+        "allowed": mafia in engine.allowed_mafia_counts(n),
+    }
+
+
+def sweep_configs(players, policies, games, seed, chunk):
+    configs = []
+    for n in players:
+        for m in range(1, (n - 1) // 2 + 1):
+            for kat, doc, strict in itertools.product((True, False), repeat=3):
+                if m + int(kat) + int(doc) > n:
+                    continue
+                for pol in policies:
+                    configs.append([n, m, kat, doc, strict, pol, games, None, chunk])
+    seeds = np.random.SeedSequence(seed).spawn(len(configs))
+    for cfg, ss in zip(configs, seeds):
+        cfg[7] = ss
+    return [tuple(c) for c in configs]
+
+
+# -------- Reference run through engine.py --------
+def engine_game(rng, n, mafia, katanyi, doctor, strict):
+    """One RandomPolicy game played through the real engine."""
+    settings = dict(engine.DEFAULTS, include_katanyi=katanyi, include_doctor=doctor,
+                    mafia_strict_unanimity=strict)
+    st = engine.new_game([f"p{i}" for i in range(n)], "0000", mafia, settings, rng)
+    engine.start_night(st)
+    for _ in range(MAX_DAYS):
+        for p in engine.alive_players(st):
+            engine.record_pick(st, p.id, rng.choice(engine.night_targets(st, p)).id)
+        engine.resolve_night(st)
+        w = engine.win_check(st)
+        if w["over"]:
+            return w["winner"]
+        _, w = engine.apply_judgement(st, rng.choice(engine.alive_players(st)).id)
+        if w["over"]:
+            return w["winner"]
+    return None
+
+
+def verify(n, mafia, katanyi, doctor, strict, games, seed):
+    rng = random.Random(seed)
+    wins = sum(engine_game(rng, n, mafia, katanyi, doctor, strict) == "mafia" for _ in range(games))
+    res = simulate((n, mafia, katanyi, doctor, strict, "random", games, seed, games))
+    print(f"engine.py mafia win {wins / games:.4f}  vs  numpy {res['mafia_win']:.4f}  ({games} games)")
+
+
+# -------- Output --------
+def _flag(v):
+    return "áno" if v else "nie"
+
+def print_table(results):
+    head = f"{'hráči':>5} {'mafia':>5} {'katányi':>7} {'lekár':>5} {'zhoda':>5} {'policy':>9} {'mafia%':>7} {'občan%':>7} {'dni':>5}"
+    print(head)
+    print("-" * len(head))
+    for r in results:
+        mark = "*" if r["allowed"] else " "
+        print(f"{r['players']:>5} {r['mafia']:>4}{mark} {_flag(r['include_katanyi']):>7} "
+              f"{_flag(r['include_doctor']):>5} {_flag(r['mafia_strict_unanimity']):>5} "
+              f"{r['policy']:>9} {100 * r['mafia_win']:>7.1f} {100 * r['obcan_win']:>7.1f} "
+              f"{r['avg_days']:>5.2f}")
+    print("* = počet mafiánov ponúkaný v nastavení (engine.allowed_mafia_counts)")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Palermo – Osud: Monte Carlo balance sweep")
+    ap.add_argument("-n", "--players", type=int, nargs="*",
+                    default=list(range(engine.MIN_PLAYERS, engine.MAX_PLAYERS + 1)))
+    ap.add_argument("-g", "--games", type=int, default=100_000, help="games per configuration")
+    ap.add_argument("--policy", choices=sorted(POLICIES), nargs="*", default=sorted(POLICIES))
+    ap.add_argument("--seed", type=int, default=1986)
+    ap.add_argument("--chunk", type=int, default=200_000, help="games per NumPy batch")
+    ap.add_argument("-j", "--jobs", type=int, default=os.cpu_count())
+    ap.add_argument("--json", help="write results to this file")
+    ap.add_argument("--verify", type=int, metavar="GAMES",
+                    help="compare the first configuration against engine.py and exit")
+    args = ap.parse_args(argv)
+
+    configs = sweep_configs(args.players, args.policy, args.games, args.seed, args.chunk)
+    if args.verify:
+        n, m, kat, doc, strict = configs[0][:5]
+        verify(n, m, kat, doc, strict, args.verify, args.seed)
+        return 0
+
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        results = list(pool.map(simulate, configs))
+    dt = time.perf_counter() - t0
+
+    print_table(results)
+    total = sum(r["games"] for r in results)
+    print(f"{total} hier za {dt:.2f}s ({total / dt:,.0f} hier/s, {args.jobs} procesov)")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
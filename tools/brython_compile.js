@@ -0,0 +1,77 @@
+// Node helper for tools/build_bundle.py: runs brython.js outside the browser.
+//
+//   node brython_compile.js trace BRYTHON_JS STDLIB_JS < {"modules": {...}, "imports": [...]}
+//       imports every name and prints {"loaded": [...], "failed": {name: error}}
+//   node brython_compile.js compile BRYTHON_JS < {"modules": {name: [src, is_package]}}
+//       prints {name: js} in the format of __BRYTHON__.precompiled
+//
+// "modules" are the app's own .py files, put into the VFS so imports of them
+// resolve without any network access.
+const fs = require("fs");
+const vm = require("vm");
+
+// brython.js reports errors with console.log; stdout carries the JSON reply
+console.log = console.error;
+
+// just enough of a browser for brython.js to initialize
+globalThis.self = globalThis;
+globalThis.window = globalThis;
+globalThis.module = {};
+globalThis.document = {
+  characterSet: "utf-8",
+  getElementsByTagName: () => [],
+  querySelectorAll: () => [],
+  addEventListener: () => {},
+};
+globalThis.__BRYTHON__ = {brython_path: "http://localhost/"};
+
+const [cmd, brythonJs, stdlibJs] = process.argv.slice(2);
+vm.runInThisContext(fs.readFileSync(brythonJs, "utf8"), {filename: "brython.js"});
+const $B = globalThis.__BRYTHON__;
+const req = JSON.parse(fs.readFileSync(0, "utf8"));
+$B.parse_options({debug: 0});
+$B.meta_path = $B.$meta_path.slice();
+
+function compile(name, src, isPackage) {
+  // same call as run_py() makes for a module found in the VFS
+  const mod = $B.imported[name] = $B.module.$factory(name, undefined, isPackage);
+  const path = "VFS." + name + (isPackage ? "/__init__.py" : ".py");
+  $B.url2name[path] = name;
+  return $B.py2js({src, filename: path, imported: true}, mod, name, $B.builtins_scope).to_js();
+}
+
+function trace() {
+  vm.runInThisContext(fs.readFileSync(stdlibJs, "utf8"), {filename: "brython_stdlib.js"});
+  for (const [name, src] of Object.entries(req.modules)) {
+    $B.VFS[name] = [".py", src, []];
+  }
+  const before = new Set(Object.keys($B.imported));
+  const failed = {};
+  for (const name of req.imports) {
+    const main = "__main__";
+    $B.imported[main] = $B.module.$factory(main, "", "");
+    try {
+      const js = $B.py2js({src: "import " + name, filename: main}, main, main).to_js();
+      new Function("locals_" + main, js)($B.imported[main]);
+    } catch (err) {
+      failed[name] = String(err.$py_error ? $B.class_name(err) : err);
+      $B.frames_stack = [];
+    }
+  }
+  const loaded = Object.keys($B.imported).filter(k => !before.has(k) && k !== "__main__");
+  return {loaded, failed};
+}
+
+let out;
+if (cmd === "trace") {
+  out = trace();
+} else if (cmd === "compile") {
+  out = {};
+  for (const [name, [src, isPackage]] of Object.entries(req.modules)) {
+    out[name] = compile(name, src, isPackage);
+    delete $B.imported[name];
+  }
+} else {
+  throw new Error("unknown command " + cmd);
+}
+process.stdout.write(JSON.stringify(out));
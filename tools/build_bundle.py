@@ -0,0 +1,280 @@
+"""Build a deployable copy of the PWA with a trimmed, precompiled Brython.
+
+The development index.html loads brython.min.js + the whole
+brython_stdlib.min.js (~4.5 MB) from the CDN and compiles app.py and every
+imported stdlib module in the browser at each launch. This build writes
+dist/ where
+
+  brython.js          the Brython runtime, served locally
+  brython_modules.js  VFS with only the stdlib modules the app imports plus
+                      the app's own modules, all .py ones precompiled to JS
+                      (loaded by Brython's VFS loader without compiling)
+
+and index.html / sw.js are rewritten to load and precache them. The rest of
+the static files are copied unchanged.
+
+Imports are found by executing the app's external imports in Node with the
+full stdlib (tools/brython_compile.js); a static scan of the VFS import lists
+would pull in most of the stdlib. Modules imported only lazily at run time
+can be forced in with --extra.
+
+    python -m tools.build_bundle --brython ~/brython-3.12.4   # -> dist/
+    python -m tools.build_bundle                              # fetch the CDN version
+
+Precompiled JS only runs on the Brython it was compiled with, so the
+bundle always ships the runtime from the same directory. Needs `node`.
+"""
+import argparse
+import ast
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HELPER = os.path.join(ROOT, "tools", "brython_compile.js")
+ENTRY = "app"
+OUT = "dist"
+CDN = "https://cdn.jsdelivr.net/npm/brython@{version}/{name}"
+EXTRA_FILES = ("public_url.txt",)  # fetched by the app, not precached
+FACTS_MANIFEST = "facts/manifest.json"
+
+VFS_HEAD = "var scripts = "
+VFS_TAIL = "__BRYTHON__.update_VFS(scripts)"
+
+
+# -------- Brython distribution --------
+def pinned_version(index_html):
+    m = re.search(r"brython@([\d.]+)/", index_html)
+    if not m:
+        raise SystemExit("index.html: Brython CDN version not found")
+    return m.group(1)
+
+
+def runtime_version(brython_js):
+    m = re.search(r"// implementation \[(\d+), (\d+), (\d+)", brython_js)
+    return ".".join(m.groups()) if m else "?"
+
+
+def _first(directory, names):
+    for name in names:
+        path = os.path.join(directory, name)
+        if os.path.exists(path):
+            return path
+    raise SystemExit(f"{directory}: none of {', '.join(names)}")
+
+
+def fetch_brython(version, directory):
+    for name in ("brython.min.js", "brython_stdlib.js"):
+        url = CDN.format(version=version, name=name)
+        print(f"sťahujem {url}")
+        with urllib.request.urlopen(url) as res, open(os.path.join(directory, name), "wb") as f:
+            shutil.copyfileobj(res, f)
+
+
+def read_vfs(stdlib_js):
+    """{name: [ext, source, imports, (is_package)]} from brython_stdlib.js."""
+    start = stdlib_js.index(VFS_HEAD) + len(VFS_HEAD)
+    end = stdlib_js.rindex(VFS_TAIL)
+    vfs = json.loads(stdlib_js[start:end].strip().rstrip(";"))
+    vfs.pop("$timestamp", None)
+    return vfs
+
+
+# -------- Import closure --------
+def scan_imports(src):
+    """Absolute module names imported anywhere in `src`, including the
+    dotted candidates of `from pkg import name` (name may be a submodule)."""
+    names = set()
+    for node in ast.walk(ast.parse(src)):
+        if isinstance(node, ast.Import):
+            names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            names.add(node.module)
+            names.update(f"{node.module}.{alias.name}" for alias in node.names)
+    return names
+
+
+def local_modules(root, entry):
+    """The entry module and the top-level .py modules it reaches: {name: source},
+    plus the set of other names they import."""
+    found = {}
+    external = set()
+    todo = [entry]
+    while todo:
+        name = todo.pop()
+        if name in found:
+            continue
+        with open(os.path.join(root, name + ".py"), encoding="utf-8") as f:
+            found[name] = f.read()
+        for imp in scan_imports(found[name]):
+            if os.path.exists(os.path.join(root, imp + ".py")):
+                todo.append(imp)
+            else:
+                external.add(imp)
+    return found, external
+
+
+def node(cmd, args, payload):
+    res = subprocess.run(["node", HELPER, cmd, *args], input=json.dumps(payload),
+                         capture_output=True, text=True, encoding="utf-8")
+    if res.returncode:
+        sys.stderr.write(res.stderr)
+        raise SystemExit(f"brython_compile.js {cmd} zlyhal")
+    return json.loads(res.stdout)
+
+
+def stdlib_modules(brython, stdlib, vfs, local, external, extra):
+    """Stdlib modules loaded when the external imports (and `extra`) run."""
+    wanted = sorted(name for name in external | set(extra) if name in vfs or name.split(".")[0] in vfs)
+    res = node("trace", [brython, stdlib], {"modules": {n: s for n, s in local.items() if n != ENTRY},
+                                            "imports": wanted})
+    for name, err in sorted(res["failed"].items()):
+        if name in vfs:
+            print(f"varovanie: import {name} zlyhal v Node ({err})", file=sys.stderr)
+    needed = {name for name in res["loaded"] if name in vfs}
+    # packages of submodules, and VFS entries imported directly (e.g. an
+    # empty browser/__init__.py that Brython already provides in Node)
+    needed |= {name for name in wanted if name in vfs}
+    for name in list(needed):
+        parts = name.split(".")
+        needed.update(".".join(parts[:i]) for i in range(1, len(parts)) if ".".join(parts[:i]) in vfs)
+    return sorted(needed)
+
+
+# -------- Output --------
+def build_bundle(brython, vfs, stdlib_names, local):
+    scripts = {"$timestamp": int(time.time() * 1000)}
+    for name in stdlib_names:
+        scripts[name] = vfs[name]
+    for name, src in sorted(local.items()):
+        scripts[name] = [".py", src, sorted(scan_imports(src))]
+    compile_req = {name: [entry[1], len(entry) > 3 and bool(entry[3])]
+                   for name, entry in scripts.items() if name != "$timestamp" and entry[0] == ".py"}
+    compiled = node("compile", [brython], {"modules": compile_req})
+    precompiled = {name: [js] if compile_req[name][1] else js for name, js in compiled.items()}
+    for name in stdlib_names:
+        if name in precompiled:
+            # the source only feeds tracebacks; keep it for the app's own modules
+            scripts[name] = [".py", ""] + vfs[name][2:]
+    return "\n".join([
+        "// generated by tools/build_bundle.py, do not edit",
+        "__BRYTHON__.use_VFS = true;",
+        VFS_HEAD + json.dumps(scripts, ensure_ascii=False, separators=(",", ":")),
+        VFS_TAIL,
+        "Object.assign(__BRYTHON__.precompiled, "
+        + json.dumps(precompiled, ensure_ascii=False, separators=(",", ":")) + ")",
+        "",
+    ])
+
+
+def _sub_once(pattern, repl, text, what):
+    text, n = re.subn(pattern, repl, text, flags=re.S)
+    if n != 1:
+        raise SystemExit(f"{what}: očakávaný vzor nenájdený ({pattern})")
+    return text
+
+
+def rewrite_index(html):
+    html = _sub_once(r"<!-- Brython from CDN[^>]*-->",
+                     "<!-- Brython + trimmed, precompiled modules (tools/build_bundle.py) -->", html, "index.html")
+    html = _sub_once(r'<script src="https://cdn\.jsdelivr\.net/npm/brython@[^"]*/brython(\.min)?\.js"></script>',
+                     '<script src="brython.js"></script>', html, "index.html")
+    # boot.js finds every app module precompiled and skips its IndexedDB cache
+    return _sub_once(r'<script src="https://cdn\.jsdelivr\.net/npm/brython@[^"]*/brython_stdlib(\.min)?\.js"></script>',
+                     '<script src="brython_modules.js"></script>', html, "index.html")
+
+
+def sw_assets(sw):
+    m = re.search(r"const ASSETS = \[(.*?)\];", sw, re.S)
+    if not m:
+        raise SystemExit("sw.js: ASSETS nenájdené")
+    return re.findall(r'"([^"]*)"', m.group(1))
+
+
+def rewrite_sw(sw):
+    assets = [a for a in sw_assets(sw) if not a.endswith(".py")]
+    assets += ["./brython.js", "./brython_modules.js"]
+    listing = "const ASSETS = [\n" + ",\n".join(f'  "{a}"' for a in assets) + "\n];"
+    sw = _sub_once(r"const ASSETS = \[.*?\];", lambda _: listing, sw, "sw.js")
+    sw = _sub_once(r'const CACHE = "([^"]*)";', r'const CACHE = "\1-bundle";', sw, "sw.js")
+    return _sub_once(r"const CDN = \[.*?\];", "const CDN = [];", sw, "sw.js")
+
+
+def fact_packs(root):
+    """Fact packs listed in the manifest (fetched on demand, not precached)."""
+    path = os.path.join(root, FACTS_MANIFEST)
+    if not os.path.exists(path):
+        return []
+    base = os.path.dirname(FACTS_MANIFEST)
+    return [f"{base}/{p['file']}" for p in json.loads(_read(path))["packs"]]
+
+
+def _read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def _write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Palermo – Osud: trimmed, precompiled Brython build")
+    ap.add_argument("--brython", metavar="DIR",
+                    help="directory with brython(.min).js and brython_stdlib.js "
+                         "(default: download the version pinned in index.html)")
+    ap.add_argument("-o", "--out", default=OUT)
+    ap.add_argument("--extra", nargs="*", default=[], metavar="MODULE",
+                    help="stdlib modules imported only lazily at run time")
+    args = ap.parse_args(argv)
+
+    index_html = _read(os.path.join(ROOT, "index.html"))
+    sw = _read(os.path.join(ROOT, "sw.js"))
+    pinned = pinned_version(index_html)
+    with tempfile.TemporaryDirectory() as tmp:
+        src_dir = args.brython
+        if src_dir is None:
+            src_dir = tmp
+            fetch_brython(pinned, tmp)
+        brython = _first(src_dir, ("brython.min.js", "brython.js"))
+        stdlib = _first(src_dir, ("brython_stdlib.js", "brython_stdlib.min.js"))
+        version = runtime_version(_read(brython))
+        if version != pinned:
+            print(f"pozor: Brython {version}, index.html používa {pinned}", file=sys.stderr)
+        vfs = read_vfs(_read(stdlib))
+
+        local, external = local_modules(ROOT, ENTRY)
+        stdlib_names = stdlib_modules(brython, stdlib, vfs, local, external, args.extra)
+        bundle = build_bundle(brython, vfs, stdlib_names, local)
+
+        out = os.path.join(ROOT, args.out)
+        if os.path.isdir(out):
+            shutil.rmtree(out)
+        for asset in sw_assets(sw) + [f"./{name}" for name in EXTRA_FILES + tuple(fact_packs(ROOT))]:
+            rel = asset[2:]
+            if not rel or rel in ("index.html", "sw.js") or rel.endswith(".py"):
+                continue
+            if os.path.exists(os.path.join(ROOT, rel)):
+                os.makedirs(os.path.dirname(os.path.join(out, rel)), exist_ok=True)
+                shutil.copy2(os.path.join(ROOT, rel), os.path.join(out, rel))
+        shutil.copy2(brython, os.path.join(out, "brython.js"))
+        _write(os.path.join(out, "brython_modules.js"), bundle)
+        _write(os.path.join(out, "index.html"), rewrite_index(index_html))
+        _write(os.path.join(out, "sw.js"), rewrite_sw(sw))
+
+    print(f"Brython {version}: {len(stdlib_names)} z {len(vfs)} modulov stdlib, "
+          f"{len(local)} vlastné -> {args.out}/brython_modules.js ({len(bundle.encode()) // 1024} kB)")
+    print("moduly:", " ".join(stdlib_names + sorted(local)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
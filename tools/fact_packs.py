@@ -0,0 +1,86 @@
+"""Split fact lists into the packs the app loads on demand.
+
+    python -m tools.fact_packs                       # every facts/src/<topic>.<lang>.json
+    python -m tools.fact_packs facts/src/chobotnica.sk.json --shard 50
+
+A source file is a JSON list of {"id", "spoiler", "text"}. Its facts are
+grouped by spoiler flag and cut into shards of at most --shard facts:
+
+    facts/<topic>.<lang>.<safe|spoiler>.<n>.json
+
+facts/manifest.json lists every pack with its topic, language, spoiler flag
+and count; the app fetches only the manifest at boot and a pack the first
+time a fact from it is shown (facts.FactDeck). Packs of the other topics
+already in the manifest are kept.
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+
+FACTS_DIR = "facts"
+MANIFEST = "manifest.json"
+SHARD = 100
+
+
+def read_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, MANIFEST), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"version": 1, "packs": []}
+
+
+def split(facts, topic, lang, shard):
+    """[(pack entry, facts)] for one source list."""
+    packs = []
+    for spoiler in (False, True):
+        group = [f for f in facts if bool(f.get("spoiler", False)) == spoiler]
+        for n, start in enumerate(range(0, len(group), shard)):
+            chunk = group[start:start + shard]
+            name = f"{topic}.{lang}.{'spoiler' if spoiler else 'safe'}.{n}.json"
+            packs.append(({"file": name, "topic": topic, "lang": lang,
+                           "spoiler": spoiler, "count": len(chunk)}, chunk))
+    return packs
+
+
+def build(sources, out_dir, shard):
+    manifest = read_manifest(out_dir)
+    for src in sources:
+        topic, lang = os.path.basename(src).split(".")[:2]
+        with open(src, encoding="utf-8") as f:
+            facts = json.load(f)
+        for old in manifest["packs"]:
+            if old["topic"] == topic and old["lang"] == lang:
+                path = os.path.join(out_dir, old["file"])
+                if os.path.exists(path):
+                    os.remove(path)
+        manifest["packs"] = [p for p in manifest["packs"]
+                             if not (p["topic"] == topic and p["lang"] == lang)]
+        for entry, chunk in split(facts, topic, lang, shard):
+            with open(os.path.join(out_dir, entry["file"]), "w", encoding="utf-8") as f:
+                json.dump(chunk, f, ensure_ascii=False, separators=(",", ":"))
+            manifest["packs"].append(entry)
+        print(f"{src}: {len(facts)} faktov")
+    manifest["packs"].sort(key=lambda p: (p["topic"], p["lang"], p["spoiler"], p["file"]))
+    with open(os.path.join(out_dir, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    return manifest
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Palermo – Osud: fact packs + manifest")
+    ap.add_argument("sources", nargs="*", help="default: facts/src/*.json")
+    ap.add_argument("-o", "--out", default=FACTS_DIR)
+    ap.add_argument("--shard", type=int, default=SHARD, help="max facts per pack")
+    args = ap.parse_args(argv)
+
+    sources = args.sources or sorted(glob.glob(os.path.join(FACTS_DIR, "src", "*.json")))
+    manifest = build(sources, args.out, args.shard)
+    print(f"{len(manifest['packs'])} balíčkov -> {os.path.join(args.out, MANIFEST)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,639 @@
+"""Game host on the LAN: many tables at once, parallel nights on the players' phones.
+
+    python -m tools.host                  # http://<LAN address>:8000/
+    python -m tools.host --port 8080 --bind 192.168.1.20 --data host-data
+
+Serves the PWA from the repo root and a JSON API next to it; open the app
+from the printed URL (the phones need the same origin, a PWA from GitHub
+Pages cannot call a plain-http host). Standard library only, one asyncio
+loop, one in-memory Table per game.
+
+A table is one of two kinds:
+
+  mirrored  the table phone owns the game (POST /api/tables) and uploads
+            its state when a night starts; the host collects the picks of
+            the seats and runs engine.resolve_night, the phone adopts the
+            result (the parallel night of the app)
+  hosted    the host owns the game (POST /api/games, engine.new_game) and
+            the client sends actions, the journal events of engine.py:
+            {"t": "step"} role seen / night turn done, {"t": "pick"},
+            {"t": "day"}, {"t": "judge"}. Each carries the table's action
+            count ("seq"), so a retried or stale action is refused instead
+            of applied twice. The end of the roles starts the night, the
+            last night turn (or the last seat pick in a parallel night)
+            resolves it and a decided game goes to "end", as in the app.
+
+Every seat of a table has a token; the role cards of the app show it as a
+QR code of <url>#seat=<token>. Changes are pushed as server-sent events;
+with --data every changed table is written to <dir>/<id>.json a few
+seconds later and read back at the next start.
+
+    GET  /api/ping                   {"ok", "url"}
+    POST /api/tables                 {"state"} -> {"table", "seats": {pid: token}}
+    POST /api/tables/<id>/night      {"state"} -> status
+    POST /api/games                  {"names", "mafia", "settings"?, "pin"?, "seed"?}
+                                     -> {"table", "seats", "status"}
+    POST /api/tables/<id>/act        {"seq", "ev"} -> {"result", "status"}
+    GET  /api/tables/<id>[?full=1]   status (+ "state" once a mirrored night
+                                     is resolved, or with full=1)
+    GET  /api/tables/<id>/stream     status on every change (SSE)
+    GET  /api/seat/<token>           what that player's phone shows
+    GET  /api/seat/<token>/stream    the same on every change (SSE)
+    POST /api/seat/<token>/pick      {"x": target id} -> seat view
+"""
+import argparse
+import asyncio
+import copy
+import json
+import mimetypes
+import os
+import random
+import secrets
+import signal
+import socket
+import sys
+import time
+import traceback
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import engine
+import qr
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PORT = 8000
+MAX_BODY = 64 * 1024
+SNAPSHOT_S = 2.0            # delay before a changed table is written to disk
+IDLE_S = 12 * 3600          # tables untouched this long are dropped
+HEARTBEAT_S = 15.0          # SSE comment line, finds dead connections
+# keys of an uploaded state (POST tables, night) and their types
+STATE_KEYS = {"phase": str, "day": int, "step_index": int, "players": list,
+              "settings": dict, "night": dict, "last": dict, "osud": dict}
+NIGHT_KEYS = ("mafia_votes", "katanyi_check", "doctor_save", "citizen_dummy")
+ROLES = ("citizen", "mafia", "katanyi", "doctor")
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class HostError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# -------- Games --------
+class Table:
+    """One game: its state, the open night and who has picked in it."""
+
+    def __init__(self, tid, state, hosted=False):
+        self.tid = tid
+        self.state = state
+        self.hosted = hosted
+        self.seats = {}        # token -> player id
+        self.night = None      # day of the open night
+        self.picks = {}        # player id -> (target id, katanyi verdict)
+        self.expected = 0      # players alive when the night opened
+        self.resolved = False
+        self.seq = 0           # actions applied (hosted games)
+        self.version = 0       # changes, streams wait for the next one
+        self.touched = time.time()
+        self.dirty = True
+        self._waiters = []
+
+    # -- change notification --
+    def changed(self):
+        self.version += 1
+        self.touched = time.time()
+        self.dirty = True
+        for fut in self._waiters:
+            if not fut.done():
+                fut.set_result(None)
+        self._waiters = []
+
+    async def wait(self, version, timeout):
+        """Return once the table is past `version` or after `timeout` s."""
+        if self.version != version:
+            return
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        try:
+            await asyncio.wait_for(fut, timeout)
+        except asyncio.TimeoutError:
+            if fut in self._waiters:
+                self._waiters.remove(fut)
+
+    # -- nights --
+    def parallel(self):
+        return self.state["settings"].get("parallel_night", False)
+
+    def _open_night(self):
+        self.night = self.state["day"]
+        self.picks = {}
+        self.expected = self.state["players"].alive_count
+        self.resolved = False
+
+    def _resolve(self):
+        state = self.state
+        engine.resolve_night(state)
+        self.resolved = True
+        # what the dawn screen of the app does with a decided game
+        if engine.win_check(state)["over"]:
+            state["phase"] = "end"
+
+    def _pick(self, pid, target):
+        state = self.state
+        player = engine.get_player(state, pid)
+        if type(target) is not int:
+            raise HostError(400, "not a valid target")
+        if self.night is None or self.resolved:
+            raise HostError(409, "no night in progress")
+        if not player.alive or pid in self.picks:
+            raise HostError(409, "no pick expected from this seat")
+        if target not in {p.id for p in engine.night_targets(state, player)}:
+            raise HostError(400, "not a valid target")
+        verdict = engine.record_pick(state, pid, target)
+        self.picks[pid] = (target, verdict)
+        return verdict
+
+    def waiting(self):
+        return [p for p in engine.alive_players(self.state) if p.id not in self.picks]
+
+    def open_night(self, state):
+        """Mirrored table: the table phone starts a night with its state."""
+        if self.hosted:
+            raise HostError(409, "the host owns this game")
+        if state.get("phase") != "night_turn" or state.get("step_index", 0) != 0:
+            raise HostError(409, "not at the start of a night")
+        if {p.id for p in state["players"]} != set(self.seats.values()):
+            raise HostError(409, "not the players of this table")
+        if self.night == state["day"]:
+            return             # the table phone re-rendered: keep the picks
+        self.state = state
+        self._open_night()
+        self.changed()
+
+    def pick(self, pid, target):
+        """A pick from the player's own phone."""
+        if self.hosted and not self.parallel():
+            raise HostError(409, "the night is played on the table phone")
+        # the last pick resolves the night: all or nothing, a failed
+        # resolution must not leave a recorded pick with no way to finish
+        last = len(self.waiting()) <= 1
+        before = (copy.deepcopy(self.state), dict(self.picks), self.resolved) if last else None
+        try:
+            self._pick(pid, target)
+            if not self.waiting():
+                self._resolve()
+        except Exception:
+            if before is not None:
+                self.state, self.picks, self.resolved = before
+            raise
+        self.changed()
+
+    # -- hosted games --
+    def act(self, seq, ev):
+        """Apply one action of the hosted game; returns the engine result
+        (the Katányi verdict of a pick, the winner after a judgement)."""
+        if not self.hosted:
+            raise HostError(409, "the table phone owns this game")
+        if seq != self.seq:
+            raise HostError(409, f"stale action, seq is {self.seq}")
+        state = self.state
+        phase, t = state["phase"], ev.get("t")
+        result = None
+        if phase == "role_pass" and t == "step":
+            engine.next_step(state)
+            if state["step_index"] >= len(state["players"]):
+                engine.start_night(state)
+                self._open_night()
+        elif phase == "night_turn" and t in ("pick", "step") and not self.parallel():
+            alive = engine.alive_players(state)
+            turn = alive[state["step_index"]]
+            if t == "pick":
+                if type(ev.get("v")) is not int:
+                    raise HostError(400, "expected a player id")
+                if ev["v"] != turn.id:
+                    raise HostError(409, "not this player's turn")
+                result = self._pick(turn.id, ev.get("x"))
+            else:
+                if turn.id not in self.picks:
+                    raise HostError(409, "the player has not picked yet")
+                engine.next_step(state)
+                if state["step_index"] >= len(alive):
+                    self._resolve()
+        elif phase == "dawn" and t == "day":
+            engine.apply_event(state, {"t": "day"})
+        elif phase == "day_admin" and t == "judge":
+            x = ev.get("x")
+            if x is not None and type(x) is not int:
+                raise HostError(400, "expected a player id")
+            if x is not None and not getattr(engine.get_player(state, x), "alive", False):
+                raise HostError(400, "not a living player")
+            victim, w = engine.apply_event(state, {"t": "judge", "x": x})
+            result = w.get("winner")
+            if state["phase"] == "night_turn":
+                self._open_night()
+        else:
+            raise HostError(409, f"{t!r} is not an action of phase {phase!r}")
+        self.seq += 1
+        self.changed()
+        return result
+
+    # -- views --
+    def status(self, full=False):
+        state = self.state
+        out = {"hosted": self.hosted, "seq": self.seq, "phase": state["phase"], "day": state["day"],
+               "step_index": state["step_index"], "night": self.night, "picked": len(self.picks),
+               "alive": self.expected, "resolved": self.resolved}
+        if full or (self.resolved and not self.hosted):
+            out["state"] = engine.state_to_json(state)
+        return out
+
+    def seat_view(self, pid):
+        """Only what the player on that seat may see."""
+        state = self.state
+        player = engine.get_player(state, pid)
+        view = {"name": player.name, "role": player.role, "alive": player.alive,
+                "phase": state["phase"], "night": None}
+        if player.role == "mafia" and state["settings"].get("mafia_know"):
+            view["mafia"] = [p.name for p in state["players"] if p.role == "mafia" and p.id != pid]
+        if self.night is None or not player.alive or not self.parallel():
+            return view
+        view["night"] = self.night
+        view["picked"] = len(self.picks)
+        view["expected"] = self.expected
+        if pid in self.picks:
+            target, verdict = self.picks[pid]
+            view["result"] = {"target": engine.get_player(state, target).name, "is_mafia": verdict}
+        elif not self.resolved:
+            view["targets"] = [[p.id, p.name] for p in engine.night_targets(state, player)]
+        return view
+
+    # -- disk --
+    def to_record(self):
+        return {"tid": self.tid, "hosted": self.hosted, "state": engine.state_to_json(self.state),
+                "seats": self.seats, "night": self.night, "expected": self.expected,
+                "picks": [[pid, t, v] for pid, (t, v) in self.picks.items()],
+                "resolved": self.resolved, "seq": self.seq, "touched": self.touched}
+
+    @classmethod
+    def from_record(cls, rec):
+        table = cls(rec["tid"], engine.state_from_json(rec["state"]), rec["hosted"])
+        table.seats = rec["seats"]
+        table.night = rec["night"]
+        table.expected = rec["expected"]
+        table.picks = {pid: (t, v) for pid, t, v in rec["picks"]}
+        table.resolved = rec["resolved"]
+        table.seq = rec["seq"]
+        table.touched = rec["touched"]
+        table.dirty = False
+        return table
+
+
+class Host:
+    """Tables by id and by seat token, and their snapshots on disk."""
+
+    def __init__(self, url="", data_dir=None):
+        self.url = url
+        self.data_dir = data_dir
+        self.tables = {}
+        self.seats = {}        # token -> (table, player id)
+
+    def _add(self, table):
+        self.tables[table.tid] = table
+        for token, pid in table.seats.items():
+            self.seats[token] = (table, pid)
+        return table
+
+    def _drop(self, table):
+        del self.tables[table.tid]
+        for token in table.seats:
+            self.seats.pop(token, None)
+
+    @staticmethod
+    def _state(body):
+        """The uploaded state, refused unless it has what the table reads."""
+        data = body.get("state")
+        if not (isinstance(data, dict)
+                and all(isinstance(data.get(k), t) for k, t in STATE_KEYS.items())
+                and data["players"]
+                and all(isinstance(r, dict) and type(r.get("id")) is int and isinstance(r.get("name"), str)
+                        and r.get("role", "citizen") in ROLES for r in data["players"])
+                and all(k in data["night"] for k in NIGHT_KEYS)
+                and isinstance(data["night"]["mafia_votes"], dict)
+                and isinstance(data["night"]["citizen_dummy"], dict)):
+            raise HostError(400, "invalid state")
+        # settings the engine reads: missing ones (older saves) take the
+        # defaults, present ones must have the default's type
+        settings = dict(engine.DEFAULTS)
+        settings.update(data["settings"])
+        if any(type(settings[k]) is not type(v) for k, v in engine.DEFAULTS.items()):
+            raise HostError(400, "invalid state")
+        data["settings"] = settings
+        try:
+            return engine.state_from_json(data)
+        except (KeyError, TypeError, ValueError, AttributeError):
+            raise HostError(400, "invalid state")
+
+    def _table(self, tid):
+        table = self.tables.get(tid)
+        if table is None:
+            raise HostError(404, "unknown table")
+        return table
+
+    def _seat(self, token):
+        seat = self.seats.get(token)
+        if seat is None:
+            raise HostError(404, "unknown seat")
+        return seat
+
+    def _register(self, state, hosted):
+        table = Table(secrets.token_hex(8), state, hosted)
+        for p in state["players"]:
+            table.seats[secrets.token_hex(6)] = p.id
+        self._add(table)
+        return table, {str(pid): token for token, pid in table.seats.items()}
+
+    def new_table(self, body):
+        table, seats = self._register(self._state(body), False)
+        return {"table": table.tid, "seats": seats}
+
+    def new_game(self, body):
+        if not isinstance(body.get("names"), list) or not isinstance(body.get("settings", {}), dict):
+            raise HostError(400, "expected names (list) and settings (object)")
+        if not isinstance(body.get("seed", 0), (int, str)):
+            raise HostError(400, "seed must be a number or a string")
+        names, _ = engine.normalize_names([str(n) for n in body["names"]])
+        if not engine.MIN_PLAYERS <= len(names) <= engine.MAX_PLAYERS:
+            raise HostError(400, f"{engine.MIN_PLAYERS}-{engine.MAX_PLAYERS} players")
+        mafia = body.get("mafia", max(engine.allowed_mafia_counts(len(names))))
+        if type(mafia) is not int or mafia not in engine.allowed_mafia_counts(len(names)):
+            raise HostError(400, "mafia count not allowed for this table")
+        settings = dict(engine.DEFAULTS)
+        settings.update({k: v for k, v in body.get("settings", {}).items()
+                         if k in engine.DEFAULTS and type(v) is type(engine.DEFAULTS[k])})
+        # a seed replays the same deal (benchmarks, tests)
+        rng = random.Random(body["seed"]) if "seed" in body else random
+        table, seats = self._register(engine.new_game(names, str(body.get("pin", "")), mafia, settings, rng), True)
+        return {"table": table.tid, "seats": seats, "status": table.status(full=True)}
+
+    def api(self, method, parts, query, body):
+        """(status, JSON object) of an /api/... request split at "/", or
+        (200, async generator) for a stream."""
+        route = (method, len(parts), parts[0] if parts else "")
+        last = parts[-1] if len(parts) == 3 else None
+        if route == ("GET", 1, "ping"):
+            return 200, {"ok": True, "url": self.url}
+        if route == ("POST", 1, "tables"):
+            return 200, self.new_table(body)
+        if route == ("POST", 1, "games"):
+            return 200, self.new_game(body)
+        if route == ("GET", 2, "tables"):
+            return 200, self._table(parts[1]).status("full" in query)
+        if route == ("GET", 3, "tables") and last == "stream":
+            table = self._table(parts[1])
+            return 200, self._stream(table, lambda: table.status())
+        if route == ("POST", 3, "tables") and last == "night":
+            table = self._table(parts[1])
+            table.open_night(self._state(body))
+            return 200, table.status()
+        if route == ("POST", 3, "tables") and last == "act":
+            table = self._table(parts[1])
+            if not isinstance(body.get("seq"), int) or not isinstance(body.get("ev"), dict):
+                raise HostError(400, "expected seq and ev")
+            result = table.act(body["seq"], body["ev"])
+            return 200, {"result": result, "status": table.status()}
+        if route == ("GET", 2, "seat"):
+            table, pid = self._seat(parts[1])
+            return 200, table.seat_view(pid)
+        if route == ("GET", 3, "seat") and last == "stream":
+            table, pid = self._seat(parts[1])
+            return 200, self._stream(table, lambda: table.seat_view(pid))
+        if route == ("POST", 3, "seat") and last == "pick":
+            table, pid = self._seat(parts[1])
+            if not isinstance(body.get("x"), int):
+                raise HostError(400, "missing target")
+            table.pick(pid, body["x"])
+            return 200, table.seat_view(pid)
+        raise HostError(404 if method in ("GET", "POST") else 405, "no such endpoint")
+
+    async def _stream(self, table, view):
+        """SSE body: view() now and after every change that alters it."""
+        sent = None
+        while self.tables.get(table.tid) is table:
+            version = table.version
+            data = json.dumps(view(), ensure_ascii=False)
+            if data != sent:
+                sent = data
+                yield f"data: {data}\n\n".encode("utf-8")
+            else:
+                yield b": ping\n\n"
+            await table.wait(version, HEARTBEAT_S)
+
+    # -- snapshots --
+    def load(self):
+        if not self.data_dir:
+            return
+        os.makedirs(self.data_dir, exist_ok=True)
+        for name in sorted(os.listdir(self.data_dir)):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.data_dir, name), encoding="utf-8") as f:
+                    self._add(Table.from_record(json.load(f)))
+            except (OSError, ValueError, KeyError, TypeError):
+                print(f"skipping unreadable snapshot {name}", file=sys.stderr)
+
+    def _write(self, records, removed):
+        # runs in a worker thread: file I/O stays off the event loop
+        for tid, data in records:
+            path = os.path.join(self.data_dir, f"{tid}.json")
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(path + ".tmp", path)
+        for tid in removed:
+            try:
+                os.remove(os.path.join(self.data_dir, f"{tid}.json"))
+            except FileNotFoundError:
+                pass
+
+    async def snapshots(self):
+        """Write changed tables every SNAPSHOT_S and drop idle ones."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(SNAPSHOT_S)
+            cutoff = time.time() - IDLE_S
+            removed = [t for t in self.tables.values() if t.touched < cutoff]
+            for table in removed:
+                self._drop(table)
+            if not self.data_dir:
+                continue
+            records = []
+            for table in self.tables.values():
+                if table.dirty:
+                    table.dirty = False
+                    records.append((table.tid, json.dumps(table.to_record(), ensure_ascii=False)))
+            if records or removed:
+                await loop.run_in_executor(None, self._write, records, [t.tid for t in removed])
+
+
+# -------- HTTP --------
+def _static(path, private=None):
+    """(status, content type, bytes) of a file under ROOT, except those
+    under the `private` directory (the host's snapshots)."""
+    rel = unquote(path).lstrip("/") or "index.html"
+    parts = rel.split("/")
+    if any(not p or p.startswith(".") or p == "__pycache__" for p in parts):
+        return 404, "text/plain", b"not found"
+    full = os.path.join(ROOT, *parts)
+    if not os.path.isfile(full):
+        return 404, "text/plain", b"not found"
+    if private:
+        real, private = os.path.realpath(full), os.path.realpath(private)
+        if os.path.commonpath([real, private]) == private:
+            return 404, "text/plain", b"not found"
+    with open(full, "rb") as f:
+        data = f.read()
+    ctype = mimetypes.guess_type(full)[0] or "application/octet-stream"
+    if ctype.startswith("text/") or ctype in ("application/json", "application/javascript"):
+        ctype += "; charset=utf-8"
+    return 200, ctype, data
+
+
+def respond(host, method, target, raw):
+    """(status, content type, bytes or an async generator of bytes)."""
+    url = urlsplit(target)
+    if not url.path.startswith("/api/"):
+        if method not in ("GET", "HEAD"):
+            return 405, "text/plain", b"method not allowed"
+        return _static(url.path, host.data_dir)
+    try:
+        body = json.loads(raw) if raw else {}
+    except ValueError:
+        body = None
+    try:
+        if body is None:
+            raise HostError(400, "invalid JSON")
+        if not isinstance(body, dict):
+            raise HostError(400, "expected a JSON object")
+        status, obj = host.api(method, url.path[5:].strip("/").split("/"), parse_qs(url.query), body)
+    except HostError as e:
+        status, obj = e.status, {"error": str(e)}
+    except Exception:
+        # a bug, not the client: answer instead of dropping the connection
+        traceback.print_exc()
+        status, obj = 500, {"error": "internal error"}
+    if not isinstance(obj, dict):
+        return status, "text/event-stream", obj
+    return status, "application/json", json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+
+async def serve_client(host, reader, writer):
+    """HTTP/1.1 with keep-alive; one request at a time per connection, a
+    stream keeps the connection until the client goes away."""
+    try:
+        while True:
+            line = await reader.readline()
+            if not line.strip():
+                break
+            method, target, version = line.decode("latin-1").split()
+            headers = {}
+            while True:
+                h = await reader.readline()
+                if not h.strip():
+                    break
+                k, _, v = h.decode("latin-1").partition(":")
+                headers[k.strip().lower()] = v.strip()
+            size = int(headers.get("content-length") or 0)
+            if size > MAX_BODY:
+                status, ctype, payload = 413, "text/plain", b"too large"
+                keep = False
+            else:
+                raw = await reader.readexactly(size) if size else b""
+                status, ctype, payload = respond(host, method, target, raw)
+                keep = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+            if not isinstance(payload, bytes):
+                writer.write(f"HTTP/1.1 200 OK\r\nContent-Type: {ctype}\r\n"
+                             "Cache-Control: no-cache\r\nConnection: close\r\n\r\n".encode("latin-1"))
+                async for chunk in payload:
+                    writer.write(chunk)
+                    await writer.drain()
+                break
+            head = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                    f"Content-Type: {ctype}\r\nContent-Length: {len(payload)}\r\n"
+                    f"Cache-Control: no-cache\r\nConnection: {'keep-alive' if keep else 'close'}\r\n\r\n")
+            writer.write(head.encode("latin-1") + (b"" if method == "HEAD" else payload))
+            await writer.drain()
+            if not keep:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+def lan_address():
+    """Address other devices reach this machine at (no packet is sent)."""
+    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        s.connect(("192.0.2.1", 9))
+        return s.getsockname()[0]
+    except OSError:
+        return "127.0.0.1"
+    finally:
+        s.close()
+
+
+def print_qr(text):
+    rows = qr.encode(text, "L")
+    border = [False] * (len(rows[0]) + 4)
+    rows = [border, border] + [[False, False] + r + [False, False] for r in rows] + [border, border]
+    # two modules per character cell; light modules are drawn, so it scans
+    # on a dark terminal
+    for top, bottom in zip(rows[0::2], rows[1::2] + [border]):
+        print("".join(" " if t and b else "▄" if t else "▀" if b else "█" for t, b in zip(top, bottom)))
+
+
+async def run(bind, port, data_dir=None, show_qr=True):
+    url = f"http://{lan_address() if bind in ('', '0.0.0.0') else bind}:{port}/"
+    host = Host(url, data_dir)
+    host.load()
+    server = await asyncio.start_server(lambda r, w: serve_client(host, r, w), bind or None, port,
+                                        backlog=1024)
+    print(f"Palermo – Osud host: {url} ({len(host.tables)} tables loaded)", flush=True)
+    if show_qr:
+        print_qr(url)
+    snapshots = asyncio.ensure_future(host.snapshots())
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, server.close)
+    except (NotImplementedError, AttributeError):
+        pass                   # no signal handlers on Windows
+    try:
+        async with server:
+            await server.serve_forever()
+    except asyncio.CancelledError:
+        pass                   # SIGTERM
+    finally:
+        snapshots.cancel()
+        if data_dir:
+            # the last changes of a clean shutdown
+            host._write([(t.tid, json.dumps(t.to_record(), ensure_ascii=False))
+                         for t in host.tables.values() if t.dirty], [])
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Palermo – Osud: game host for the LAN")
+    ap.add_argument("--bind", default="0.0.0.0", help="address to listen on")
+    ap.add_argument("--port", type=int, default=PORT)
+    ap.add_argument("--data", metavar="DIR", help="keep table snapshots in DIR across restarts")
+    ap.add_argument("--no-qr", action="store_true", help="do not print the QR code of the URL")
+    args = ap.parse_args(argv)
+    try:
+        asyncio.run(run(args.bind, args.port, args.data, not args.no_qr))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
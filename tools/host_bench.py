@@ -0,0 +1,305 @@
+"""Load generator and latency benchmark for the game host (tools/host.py).
+
+    python -m tools.host_bench -n 10 100 300            # tables per run
+    python -m tools.host_bench -n 300 --think 500 --parallel --json bench.json
+    python -m tools.host_bench --url http://127.0.0.1:8000/ -n 50
+
+Each run starts a fresh host on localhost (or uses --url) and N bot
+tables. A table plays --games hosted games one after another through the
+host protocol: every role seen, every night pick and turn (or, with
+--parallel, the picks of all seats at once), the dawn and the day
+judgement. The bots are seeded: the same -n/--games/--seed deal the same
+games and make the same choices in every release, so the numbers stay
+comparable. The mafia agrees on one victim, the others pick at random.
+
+Every table keeps a local copy of its game and advances it with the engine
+(record_pick, resolve_night, win_check, apply_judgement); at the end of
+each game the host's state must match it, otherwise the run fails.
+
+Reported per run: actions and games per second, action latency (p50, p99,
+max, overall and per action kind), host CPU time and resident memory per
+game (RSS growth over the games it holds; /proc, so Linux only and only
+for a host the tool started). --clients spreads the tables over several
+processes when one client process cannot saturate the host.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+
+import engine
+
+try:
+    import resource
+except ImportError:            # Windows
+    resource = None
+
+NAMES = ["Anna", "Boris", "Cyril", "Dáša", "Ema", "Fero", "Gabo", "Hana", "Igor", "Jana", "Karol", "Lucia"]
+
+
+class Conn:
+    """One keep-alive HTTP/1.1 connection speaking JSON."""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = self.writer = None
+
+    async def request(self, method, path, obj=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        body = json.dumps(obj).encode("utf-8") if obj is not None else b""
+        self.writer.write(f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+                          f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+                          .encode("latin-1") + body)
+        status = int((await self.reader.readline()).split()[1])
+        size = 0
+        while True:
+            line = await self.reader.readline()
+            if not line.strip():
+                break
+            k, _, v = line.decode("latin-1").partition(":")
+            if k.strip().lower() == "content-length":
+                size = int(v)
+        data = json.loads(await self.reader.readexactly(size)) if size else None
+        return status, data
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+class Bench:
+    """Latencies by action kind, one list of seconds each."""
+
+    def __init__(self):
+        self.lat = {}
+        self.games = 0
+
+    async def timed(self, kind, conn, method, path, obj=None):
+        t0 = time.perf_counter()
+        status, data = await conn.request(method, path, obj)
+        self.lat.setdefault(kind, []).append(time.perf_counter() - t0)
+        if status != 200:
+            raise RuntimeError(f"{kind} {path}: {status} {data}")
+        return data
+
+
+async def play_table(addr, bench, seed, games, players, parallel, think):
+    rng = random.Random(seed)
+    table_conn = Conn(*addr)
+    seat_conns = [Conn(*addr) for _ in range(players)] if parallel else []
+
+    async def pause():
+        if think:
+            await asyncio.sleep(rng.uniform(0, 2 * think) / 1000)
+
+    try:
+        for g in range(games):
+            names = NAMES[:players]
+            mafia = max(engine.allowed_mafia_counts(players))
+            await pause()      # with --think the tables do not all start at once
+            res = await bench.timed("new", table_conn, "POST", "/api/games", {
+                "names": names, "mafia": mafia, "seed": seed * 1000 + g,
+                "settings": {"parallel_night": parallel, "include_doctor": players >= 8}})
+            tid, seats = res["table"], res["seats"]
+            local = engine.state_from_json(res["status"]["state"])
+            seq = [0]
+
+            async def act(ev):
+                await pause()
+                out = await bench.timed(ev["t"], table_conn, "POST", f"/api/tables/{tid}/act",
+                                        {"seq": seq[0], "ev": ev})
+                seq[0] = out["status"]["seq"]
+                return out
+
+            for _ in local["players"]:
+                await act({"t": "step"})
+                engine.next_step(local)
+            engine.start_night(local)
+            while True:
+                # night: the mafia agrees on a victim, everybody else picks at random
+                alive = engine.alive_players(local)
+                others = [p for p in alive if p.role != "mafia"]
+                victim = rng.choice(others).id
+                picks = [(p, victim if p.role == "mafia" else rng.choice(engine.night_targets(local, p)).id)
+                         for p in alive]
+                if parallel:
+                    async def seat_pick(p, x):
+                        await pause()
+                        await bench.timed("seat_pick", seat_conns[p.id], "POST",
+                                          f"/api/seat/{seats[str(p.id)]}/pick", {"x": x})
+                    await asyncio.gather(*(seat_pick(p, x) for p, x in picks))
+                else:
+                    for p, x in picks:
+                        await act({"t": "pick", "v": p.id, "x": x})
+                        await act({"t": "step"})
+                for p, x in picks:
+                    engine.record_pick(local, p.id, x)
+                engine.resolve_night(local)
+                if engine.win_check(local)["over"]:
+                    local["phase"] = "end"
+                    break
+                await act({"t": "day"})
+                engine.goto(local, "day_admin")
+                x = rng.choice(engine.alive_players(local)).id
+                await act({"t": "judge", "x": x})
+                engine.apply_judgement(local, x)
+                if local["phase"] == "end":
+                    break
+            status, res = await table_conn.request("GET", f"/api/tables/{tid}?full=1")
+            mine = engine.state_to_json(local)
+            if status != 200 or any(res["state"][k] != mine[k] for k in ("phase", "day", "players", "last")):
+                raise RuntimeError(f"table {tid}: the host's game differs from the engine's")
+            bench.games += 1
+    finally:
+        table_conn.close()
+        for c in seat_conns:
+            c.close()
+
+
+async def run_tables(addr, seeds, games, players, parallel, think):
+    bench = Bench()
+    await asyncio.gather(*(play_table(addr, bench, s, games, players, parallel, think) for s in seeds))
+    return bench
+
+
+def _client(args):
+    """One client process: (latencies by kind, games played)."""
+    addr, seeds, games, players, parallel, think = args
+    bench = asyncio.run(run_tables(addr, seeds, games, players, parallel, think))
+    return bench.lat, bench.games
+
+
+# -------- Host process --------
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _proc_stat(pid):
+    """(RSS in kB, CPU seconds) of a local process, (None, None) without /proc."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            rss = next(int(line.split()[1]) for line in f if line.startswith("VmRSS:"))
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        cpu = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+        return rss, cpu
+    except (OSError, StopIteration, ValueError, IndexError):
+        return None, None
+
+
+def start_host(port):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    proc = subprocess.Popen([sys.executable, "-m", "tools.host", "--bind", "127.0.0.1",
+                             "--port", str(port), "--no-qr"],
+                            cwd=root, stdout=subprocess.PIPE, text=True)
+    proc.stdout.readline()     # listening
+    return proc
+
+
+def _raise_fd_limit():
+    # a table with --parallel keeps one connection per seat
+    if resource is not None:
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if hard == resource.RLIM_INFINITY or soft < hard:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard if hard != resource.RLIM_INFINITY else 65536, hard))
+
+
+def percentile(sorted_xs, q):
+    if not sorted_xs:
+        return None
+    return sorted_xs[min(len(sorted_xs) - 1, int(q * len(sorted_xs)))]
+
+
+def bench_run(n, args):
+    proc = None
+    if args.url:
+        u = urlsplit(args.url)
+        addr = (u.hostname, u.port or 80)
+    else:
+        addr = ("127.0.0.1", _free_port())
+        proc = start_host(addr[1])
+    try:
+        rss0, cpu0 = _proc_stat(proc.pid) if proc else (None, None)
+        seeds = [args.seed + i for i in range(n)]
+        k = max(1, min(args.clients, n))
+        jobs = [(addr, seeds[i::k], args.games, args.players, args.parallel, args.think) for i in range(k)]
+        t0 = time.perf_counter()
+        if k == 1:
+            results = [_client(jobs[0])]
+        else:
+            with multiprocessing.Pool(k) as pool:
+                results = pool.map(_client, jobs)
+        wall = time.perf_counter() - t0
+        rss1, cpu1 = _proc_stat(proc.pid) if proc else (None, None)
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait()
+    lat = {}
+    games = 0
+    for kinds, g in results:
+        games += g
+        for kind, xs in kinds.items():
+            lat.setdefault(kind, []).extend(xs)
+    every = sorted(x for xs in lat.values() for x in xs)
+    ms = lambda x: None if x is None else round(1000 * x, 2)
+    return {
+        "tables": n, "games": games, "actions": len(every), "seconds": round(wall, 3),
+        "actions_per_s": round(len(every) / wall, 1), "games_per_s": round(games / wall, 2),
+        "p50_ms": ms(percentile(every, 0.5)), "p99_ms": ms(percentile(every, 0.99)), "max_ms": ms(every[-1] if every else None),
+        "kinds": {kind: {"n": len(xs), "p50_ms": ms(percentile(sorted(xs), 0.5)), "p99_ms": ms(percentile(sorted(xs), 0.99))}
+                  for kind, xs in sorted(lat.items())},
+        "host_cpu_pct": round(100 * (cpu1 - cpu0) / wall, 1) if cpu0 is not None else None,
+        "kb_per_game": round((rss1 - rss0) / games, 1) if rss0 is not None and games else None,
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Palermo – Osud: game host load and latency benchmark")
+    ap.add_argument("-n", "--tables", type=int, nargs="+", default=[10, 100, 300], help="tables per run")
+    ap.add_argument("-g", "--games", type=int, default=3, help="games per table")
+    ap.add_argument("-m", "--players", type=int, default=9, choices=range(engine.MIN_PLAYERS, engine.MAX_PLAYERS + 1),
+                    metavar="M", help="bot players per table")
+    ap.add_argument("--parallel", action="store_true", help="nights picked on the seats, all at once")
+    ap.add_argument("--think", type=float, default=0, help="mean pause before each action in ms (0: flat out)")
+    ap.add_argument("--clients", type=int, default=1, help="client processes")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--url", help="benchmark a running host instead of starting one per run")
+    ap.add_argument("--json", metavar="FILE", help="also write the results as JSON")
+    args = ap.parse_args(argv)
+    _raise_fd_limit()
+
+    print(f"{args.players} players, {args.games} games per table, "
+          f"{'parallel' if args.parallel else 'table phone'} nights, think {args.think:g} ms")
+    print(f"{'tables':>6} {'games':>6} {'actions':>8} {'s':>7} {'act/s':>8} {'p50 ms':>7} {'p99 ms':>7} "
+          f"{'max ms':>7} {'host CPU':>8} {'kB/game':>8}")
+    rows = []
+    for n in args.tables:
+        r = bench_run(n, args)
+        rows.append(r)
+        cpu = "-" if r["host_cpu_pct"] is None else f"{r['host_cpu_pct']:.0f} %"
+        kb = "-" if r["kb_per_game"] is None else f"{r['kb_per_game']:.1f}"
+        print(f"{r['tables']:>6} {r['games']:>6} {r['actions']:>8} {r['seconds']:>7.2f} {r['actions_per_s']:>8.0f} "
+              f"{r['p50_ms']:>7.2f} {r['p99_ms']:>7.2f} {r['max_ms']:>7.2f} {cpu:>8} {kb:>8}")
+        print("       " + "  ".join(f"{kind} {k['p50_ms']}/{k['p99_ms']}" for kind, k in r["kinds"].items()))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"players": args.players, "games": args.games, "parallel": args.parallel,
+                       "think_ms": args.think, "seed": args.seed, "runs": rows}, f, indent=1)
+            f.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,22 @@
+// Web Worker of tasks.py: a second Brython that runs worker.py.
+//
+// The page's first message lists the Brython scripts it loaded itself (the
+// CDN runtime + stdlib, or dist/'s brython.js + brython_modules.js), so the
+// worker uses the same, SW-cached runtime. boot.js then registers the
+// worker's modules with the compiled-module cache the page filled, and
+// worker.main() takes over the message handler.
+"use strict";
+self.onmessage = function (ev) {
+  self.onmessage = null;
+  importScripts.apply(self, JSON.parse(ev.data).scripts.concat(["boot.js"]));
+  bootBrython({debug: 0, pythonpath: ["./"]}, ["worker", "codec", "qr"]).then(function () {
+    var B = __BRYTHON__, src = "import worker\nworker.main()\n";
+    if (B.runPythonSource) {
+      B.runPythonSource(src, {id: "worker_main"});
+      return;
+    }
+    // Brython < 3.12
+    B.imported.worker_main = B.module.$factory("worker_main");
+    new Function(B.py2js({src: src, filename: "worker_main"}, "worker_main", "worker_main").to_js())();
+  });
+};
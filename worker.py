@@ -0,0 +1,43 @@
+"""Výpočty mimo hlavného vlákna (Brython vo Web Workeri, worker.js).
+
+The slow pure-Python work of the app: packing a snapshot with LZW
+(codec.repack) and encoding a QR code (qr.py). The module itself has no
+`browser` import, so tasks.py runs the same handle() on the page when
+there is no worker; only main() binds to the worker's global scope.
+
+Messages are strings "<id>|<task>|<arg>", replies "<id>|ok|<result>" or
+"<id>|error|<message>", concatenated rather than JSON: packed snapshots
+are arbitrary code units and Brython's formatting mangles combining marks.
+"""
+import codec
+import qr
+
+
+def qr_svg(url):
+    return qr.svg(qr.encode(url))
+
+
+TASKS = {
+    "pack": codec.repack,
+    "qr": qr_svg,
+}
+
+
+def handle(msg):
+    """One request -> its reply."""
+    mid, task, arg = msg.split("|", 2)
+    try:
+        return mid + "|ok|" + TASKS[task](arg)
+    except Exception as e:
+        return mid + "|error|" + task + ": " + str(e)
+
+
+def main():
+    """Serve requests in the worker; "0|ok|ready" tells the page the
+    handler is bound (messages sent before it would be lost)."""
+    from browser import self as scope
+
+    def on_message(ev):
+        scope.postMessage(handle(ev.data))
+    scope.onmessage = on_message
+    scope.postMessage("0|ok|ready")